@@ -1,9 +1,7 @@
 import streamlit as st
-from supabase import create_client, Client
-import pandas as pd
-import os 
-import time
+from supabase import Client
 from auth_utils import fetch_user_profile, render_sidebar_auth
+from storage import create_storage_client, is_local_client
 
 # ---設置與初始化 ---
 st.set_page_config(
@@ -109,22 +107,9 @@ st.warning("""
 # --- 置頂公告區塊 結束 ---
 
 def init_connection(is_admin=False) -> Client:
-    """初始化 Supabase 連線 """
-    if "supabase" not in st.secrets or "url" not in st.secrets["supabase"]:
-        return None
-        
+    """初始化資料連線 (Supabase，或依 [storage] 設定使用本機 SQLite)"""
     try:
-        config_section = st.secrets["supabase"]
-        url = config_section["url"]
-        
-        if is_admin:
-            key = config_section["service_role_key"] 
-        else:
-            key = config_section["key"] 
-        if key:
-            return create_client(url, key)
-        else:
-            return None
+        return create_storage_client(st.secrets, is_admin=is_admin)
     except Exception as e:
         return None 
 
@@ -137,6 +122,9 @@ if st.session_state.supabase_admin is None:
 is_connected = st.session_state.supabase is not None
 supabase = st.session_state.supabase
 
+if is_connected and is_local_client(supabase):
+    st.info("📴 目前為離線模式：資料暫存於本機，活動結束後將同步至雲端。")
+
 
 # --- RLS Session 狀態恢復機制  ---
 if is_connected and st.session_state.user is None:
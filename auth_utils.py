@@ -1,18 +1,67 @@
+import time
+
 import streamlit as st
 from supabase import Client
 
+from shared_cache import on_role_change, role_generation
+from startup_utils import start_warmup
+
+ROLE_TTL = 60  # 秒；Session 中的角色超過此時間即重新讀取
+
+# 所有頁面都會載入本模組：第一位訪客不論直接開啟哪一頁都會開始預熱 (每個程序只執行一次)
+start_warmup()
+
+
+@st.cache_data(ttl=ROLE_TTL, show_spinner=False)
+def _load_profile(_supabase_client: Client, user_id):
+    # profiles 的 role / username 為公開欄位，可跨 Session 共用；管理員變更角色時整批清除
+    response = _supabase_client.table('profiles').select("role, username").eq('id', user_id).single().execute()
+    return response.data['role'], response.data['username']
+
+
+# 管理員變更角色時 (本程序或其他副本) 只清除角色快取
+on_role_change(_load_profile.clear)
 
 
 def fetch_user_profile(supabase_client: Client, user_id):
     """表格獲取使用者角色與暱稱"""
+    previous_role = st.session_state.get('role')
     try:
         if supabase_client:
-            response = supabase_client.table('profiles').select("role, username").eq('id', user_id).single().execute()
-            st.session_state.role = response.data['role']
-            st.session_state.username = response.data['username']
+            st.session_state.role, st.session_state.username = _load_profile(supabase_client, str(user_id))
     except Exception:
-        st.session_state.role = "user"
-        st.session_state.username = None
+        # 暫時讀取失敗時沿用目前角色 (首次登入才預設為 user)，下次檢查再重試
+        if previous_role in (None, "guest"):
+            st.session_state.role = "user"
+            st.session_state.username = None
+    st.session_state.role_checked_at = time.monotonic()
+    st.session_state.role_generation = role_generation()
+
+    if previous_role not in (None, "guest", st.session_state.role):
+        # 角色已變更：重新簽發 JWT，讓 RLS 讀到新的 user_role claim
+        try:
+            supabase_client.auth.refresh_session()
+        except Exception:
+            # 降級時資料庫已撤銷此使用者的 Session (見 dashboard.sql)，需重新登入
+            try:
+                supabase_client.auth.sign_out()
+            except Exception:
+                pass
+            st.session_state.user = None
+            st.session_state.role = "guest"
+            st.session_state.username = None
+            st.sidebar.warning("您的角色已變更，請重新登入。")
+
+
+def refresh_user_role(supabase_client: Client):
+    """角色超過 ROLE_TTL 秒或管理員變更角色後重新讀取，不需重新登入"""
+    user = st.session_state.get('user')
+    if user is None or supabase_client is None:
+        return
+    checked_at = st.session_state.get('role_checked_at')
+    if (checked_at is None or time.monotonic() - checked_at > ROLE_TTL
+            or st.session_state.get('role_generation') != role_generation()):
+        fetch_user_profile(supabase_client, user.id)
 
 
 def render_sidebar_auth(supabase: Client | None, is_connected: bool):
@@ -72,6 +121,10 @@ def render_sidebar_auth(supabase: Client | None, is_connected: bool):
                         st.sidebar.warning("請輸入 Email 地址。")
     # --- 已登入邏輯 ---
     else:
+        refresh_user_role(supabase)
+        if st.session_state.user is None:
+            return  # 角色已變更且 Session 已撤銷，下次操作時顯示登入表單
+
         # 已登入：顯示稱謂
         user_role = st.session_state.role
         user_email = st.session_state.user.email
@@ -120,6 +173,7 @@ def auto_update_username(supabase: Client, new_username):
         if st.session_state.user:
             supabase.table('profiles').update({"username": new_username}).eq('id', st.session_state.user.id).execute()
             st.session_state.username = new_username
+            _load_profile.clear()
             st.toast("暱稱已自動儲存！")
     except Exception as e:
         st.error(f"儲存失敗: {e}")
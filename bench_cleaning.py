@@ -0,0 +1,126 @@
+"""
+cleaning_utils 的微基準測試：以合成的大型版本 AIGO_OnlineCourse / AI_Grant / corpus_collect，
+比較原本逐列 .apply 的清洗方式與向量化版本的耗時與記憶體用量。
+
+    python bench_cleaning.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from cleaning_utils import minguo_date_years, minguo_years, read_csv_typed, strip_unit
+
+
+# --- 合成資料 ---
+
+def write_synthetic(directory, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    years = rng.integers(105, 115, rows)
+    paths = {}
+
+    paths['courses'] = os.path.join(directory, "courses.csv")
+    pd.DataFrame({
+        '年度': years,
+        '合作單位': 'AIGO',
+        '課程名稱': '人工智慧概論',
+        '時數': pd.Series(rng.integers(1, 6, rows)).astype(str) + 'hr',
+        '網址': 'https://youtu.be/example',
+    }).to_csv(paths['courses'], index=False)
+
+    paths['grant'] = os.path.join(directory, "grant.csv")
+    pd.DataFrame({
+        '補助計畫': '補助計畫',
+        '發布日期': years * 10000 + rng.integers(1, 13, rows) * 100 + rng.integers(1, 29, rows),
+        '主辦單位': '經濟部',
+    }).to_csv(paths['grant'], index=False)
+
+    # 與原始檔相同：所有欄位皆以引號包住，並有部分空值
+    paths['corpus'] = os.path.join(directory, "corpus.csv")
+    counts = rng.integers(0, 100, rows).astype(str)
+    counts[rng.random(rows) < 0.05] = ''
+    pd.DataFrame({
+        'Seq': np.arange(rows),
+        'DateListed': '20230829',
+        '年度': years,
+        '區域': rng.choice(['宜蘭縣', '花蓮縣', '臺北市', '臺東縣'], rows),
+        '縣市別代碼': '10002',
+        '採集數': counts,
+    }).to_csv(paths['corpus'], index=False, quoting=1)
+    return paths
+
+
+# --- 原本的清洗方式 ---
+
+def _legacy_minguo_to_gregorian(minguo_year):
+    return minguo_year + 1911
+
+
+def legacy_clean(paths):
+    df_courses = pd.read_csv(paths['courses'])
+    df_courses['年度_西元'] = df_courses['年度'].apply(_legacy_minguo_to_gregorian)
+    df_courses['時數_num'] = df_courses['時數'].astype(str).str.replace('hr', '', regex=False)
+    df_courses['時數_num'] = pd.to_numeric(df_courses['時數_num'], errors='coerce').fillna(0)
+
+    df_grant = pd.read_csv(paths['grant'])
+    df_grant['發布年份_西元'] = df_grant['發布日期'].astype(str).str[:3].astype(int).apply(_legacy_minguo_to_gregorian)
+
+    df_corpus = pd.read_csv(paths['corpus'])
+    df_corpus['年度_西元'] = df_corpus['年度'].apply(_legacy_minguo_to_gregorian)
+    df_corpus_agg = df_corpus.groupby('年度_西元')['採集數'].sum().reset_index()
+    return df_courses, df_grant, df_corpus_agg
+
+
+# --- 向量化版本 ---
+
+def vectorized_clean(paths):
+    df_courses = read_csv_typed(paths['courses'], usecols=['年度', '時數'], dtype={'年度': 'int64'})
+    df_courses['年度_西元'] = minguo_years(df_courses['年度'])
+    df_courses['時數_num'] = strip_unit(df_courses['時數'], 'hr')
+
+    df_grant = read_csv_typed(paths['grant'], usecols=['發布日期'], dtype={'發布日期': 'int64'})
+    df_grant['發布年份_西元'] = minguo_date_years(df_grant['發布日期'])
+
+    df_corpus = read_csv_typed(paths['corpus'], usecols=['年度', '採集數'], dtype={'年度': 'int64', '採集數': 'float64'})
+    df_corpus['年度_西元'] = minguo_years(df_corpus['年度'])
+    df_corpus_agg = df_corpus.groupby('年度_西元', as_index=False)['採集數'].sum()
+    return df_courses, df_grant, df_corpus_agg
+
+
+def _measure(func, paths, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        frames = func(paths)
+        best = min(best, time.perf_counter() - started)
+    memory = sum(int(df.memory_usage(deep=True).sum()) for df in frames)
+    return best, memory, frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比較參考資料 CSV 清洗的耗時 (原本 vs 向量化)")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_synthetic(directory, args.rows)
+        legacy_seconds, legacy_memory, legacy_frames = _measure(legacy_clean, paths, args.repeat)
+        new_seconds, new_memory, new_frames = _measure(vectorized_clean, paths, args.repeat)
+
+    # 兩種方式的結果應一致
+    assert (legacy_frames[1]['發布年份_西元'].to_numpy() == new_frames[1]['發布年份_西元'].to_numpy()).all()
+    assert legacy_frames[2]['採集數'].astype('int64').tolist() == new_frames[2]['採集數'].astype('int64').tolist()
+
+    print(f"{args.rows:,} 列 x 3 檔 (取 {args.repeat} 次最佳)")
+    print(f"  原本     {legacy_seconds:7.2f} 秒  {legacy_memory / 2**20:8.1f} MiB")
+    print(f"  向量化   {new_seconds:7.2f} 秒  {new_memory / 2**20:8.1f} MiB  (x{legacy_seconds / new_seconds:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
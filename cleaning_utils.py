@@ -0,0 +1,64 @@
+"""
+開放資料 CSV 的向量化清洗工具 (民國年、民國日期、帶單位數字)。
+
+所有函式皆以整欄 Series 運算，不使用逐列 .apply；
+數字欄位 (包含 corpus_collect.csv 這類以引號包住的數字) 直接在 read_csv 以明確 dtype 解析。
+"""
+import pandas as pd
+
+MINGUO_OFFSET = 1911
+
+
+def minguo_to_gregorian(minguo_year):
+    """將民國年轉換為西元年 (民國年 + 1911)；可傳入單一數值或整欄 Series"""
+    return minguo_year + MINGUO_OFFSET
+
+
+def _to_integer(series):
+    # 沒有空值時維持 int64；有空值才轉為可為空的 Int64，避免年份顯示為 2019.0
+    values = pd.to_numeric(series, errors='coerce')
+    if values.isna().any() or not pd.api.types.is_integer_dtype(values):
+        values = values.astype('Int64')
+    return values
+
+
+def minguo_years(series):
+    """民國年欄位 (數字或字串) -> 西元年；無法解析者為 <NA>"""
+    return minguo_to_gregorian(_to_integer(series))
+
+
+def _minguo_date_parts(series):
+    # YYYMMDD / YYMMDD 皆以數值拆解，避免逐列字串切割
+    value = _to_integer(series)
+    return value // 10000, value // 100 % 100, value % 100
+
+
+def minguo_date_years(series):
+    """民國日期 (例如 1130821) -> 西元年"""
+    year, _, _ = _minguo_date_parts(series)
+    return minguo_to_gregorian(year)
+
+
+def minguo_dates(series):
+    """民國日期 (例如 1130821) -> datetime64；不合法的日期為 NaT"""
+    year, month, day = _minguo_date_parts(series)
+    return pd.to_datetime(
+        pd.DataFrame({'year': minguo_to_gregorian(year), 'month': month, 'day': day}).astype('float64'),
+        errors='coerce',
+    )
+
+
+def strip_unit(series, suffix, fill=0):
+    """去除單位字尾 (例如 '1hr' -> 1.0)；無法解析者以 fill 取代，fill=None 則保留 NaN"""
+    if not pd.api.types.is_numeric_dtype(series):
+        series = series.str.removesuffix(suffix)
+    values = pd.to_numeric(series, errors='coerce')
+    return values if fill is None else values.fillna(fill)
+
+
+def read_csv_typed(path, usecols=None, dtype=None, **kwargs):
+    """
+    以明確 dtype 讀取 CSV：只讀需要的欄位，引號包住的數字直接解析為數字，不需先讀成字串再轉換。
+    不會有空值的欄位宜用 int64，可能有空值的欄位用 float64；C 解析器處理 Int64 明顯較慢。
+    """
+    return pd.read_csv(path, usecols=usecols, dtype=dtype, encoding='utf-8-sig', **kwargs)
@@ -0,0 +1,186 @@
+import threading
+from collections import Counter
+
+import numpy as np
+
+from dedup_utils import normalize_text
+
+# --- 參數設定 ---
+NGRAM_SIZE = 2          # 字元 bigram，不依賴斷詞或網路模型
+MAX_FEATURES = 5000     # 詞彙表上限，超過後新詞不再加入
+DEFAULT_CLUSTERS = 6
+
+
+def _term_counts(text, n=NGRAM_SIZE):
+    normalized = normalize_text(text)
+    if len(normalized) < n:
+        return Counter([normalized]) if normalized else Counter()
+    return Counter(normalized[i:i + n] for i in range(len(normalized) - n + 1))
+
+
+class IncrementalTopicClusterer:
+    """
+    新聞牆子主題分群：字元 n-gram TF-IDF + Mini-batch (球面) K-means。
+    只處理尚未看過的貼文，既有群集中心以累積平均方式更新，不需重算整個語料。
+    """
+
+    def __init__(self, n_clusters=DEFAULT_CLUSTERS, max_features=MAX_FEATURES, seed=2025):
+        self.n_clusters = n_clusters
+        self.max_features = max_features
+        self._rng = np.random.RandomState(seed)
+        self._lock = threading.Lock()
+
+        self.vocab = {}
+        self.terms = []
+        self._doc_freq = np.zeros(0, dtype=np.float64)
+        self.n_docs = 0
+
+        self.centroids = None               # (k, V)
+        self._center_counts = np.zeros(n_clusters, dtype=np.float64)
+        self.assignments = {}               # post_id -> cluster
+        self._pending = []                  # 文章數不足 k 時先暫存
+
+    # --- 向量化 ---
+
+    def _update_vocab(self, docs_counts):
+        for counts in docs_counts:
+            for term in counts:
+                if term not in self.vocab and len(self.terms) < self.max_features:
+                    self.vocab[term] = len(self.terms)
+                    self.terms.append(term)
+        grow = len(self.terms) - self._doc_freq.shape[0]
+        if grow > 0:
+            self._doc_freq = np.concatenate([self._doc_freq, np.zeros(grow)])
+            if self.centroids is not None:
+                self.centroids = np.hstack([self.centroids, np.zeros((self.n_clusters, grow))])
+        for counts in docs_counts:
+            cols = [self.vocab[t] for t in counts if t in self.vocab]
+            self._doc_freq[cols] += 1
+        self.n_docs += len(docs_counts)
+
+    def _to_csr(self, docs_counts):
+        """將文件轉成稀疏 (row_ids, indices, data) 陣列，並做 TF-IDF 與 L2 正規化"""
+        indptr = [0]
+        indices = []
+        data = []
+        for counts in docs_counts:
+            for term, tf in counts.items():
+                col = self.vocab.get(term)
+                if col is not None:
+                    indices.append(col)
+                    data.append(tf)
+            indptr.append(len(indices))
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(data, dtype=np.float64)
+
+        idf = np.log((1.0 + self.n_docs) / (1.0 + self._doc_freq)) + 1.0
+        data = (1.0 + np.log(data)) * idf[indices] if data.size else data
+
+        row_ids = np.repeat(np.arange(len(docs_counts)), np.diff(indptr))
+        norms = np.zeros(len(docs_counts))
+        np.add.at(norms, row_ids, data ** 2)
+        norms = np.sqrt(norms)
+        norms[norms == 0] = 1.0
+        data = data / norms[row_ids]
+        return row_ids, indices, data
+
+    def _similarity(self, row_ids, indices, data, n_rows):
+        """稀疏列 x 稠密中心的內積 (n_rows, k)"""
+        scores = np.zeros((n_rows, self.n_clusters))
+        if data.size:
+            np.add.at(scores, row_ids, data[:, None] * self.centroids[:, indices].T)
+        return scores
+
+    def _dense_rows(self, row_ids, indices, data, rows, n_rows):
+        """只將指定的列轉為稠密陣列 (len(rows), V)，不展開整個語料；沒有任何詞的列為零向量"""
+        position = np.full(n_rows, -1, dtype=np.int64)
+        position[rows] = np.arange(len(rows))
+        keep = position[row_ids] >= 0
+        dense = np.zeros((len(rows), len(self.terms)))
+        np.add.at(dense, (position[row_ids[keep]], indices[keep]), data[keep])
+        return dense
+
+    def _normalize_centroids(self):
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids = self.centroids / norms
+
+    # --- 增量更新 ---
+
+    def partial_fit(self, items):
+        """items: [(post_id, content), ...]；已處理過的貼文會被略過"""
+        with self._lock:
+            pending_ids = {pid for pid, _ in self._pending}
+            new_items = [
+                (pid, text) for pid, text in items
+                if pid not in self.assignments and pid not in pending_ids
+            ]
+            if not new_items:
+                return 0
+
+            if self.centroids is None:
+                self._pending.extend(new_items)
+                if len(self._pending) < self.n_clusters:
+                    return 0
+                new_items, self._pending = self._pending, []
+
+            ids = [pid for pid, _ in new_items]
+            docs_counts = [_term_counts(text) for _, text in new_items]
+            self._update_vocab(docs_counts)
+            row_ids, indices, data = self._to_csr(docs_counts)
+            n_rows = len(ids)
+
+            if self.centroids is None:
+                # 優先以有內容的貼文 (例如非純表情符號) 作為初始中心
+                with_terms = np.unique(row_ids)
+                pool = with_terms if len(with_terms) >= self.n_clusters else np.arange(n_rows)
+                seeds = self._rng.choice(pool, size=self.n_clusters, replace=False)
+                self.centroids = self._dense_rows(row_ids, indices, data, seeds, n_rows)
+
+            labels = self._similarity(row_ids, indices, data, n_rows).argmax(axis=1)
+
+            # Mini-batch 更新：中心 = 既有累積平均與本批成員的加權平均
+            batch_sums = np.zeros_like(self.centroids)
+            np.add.at(batch_sums, (labels[row_ids], indices), data)
+            batch_counts = np.bincount(labels, minlength=self.n_clusters).astype(np.float64)
+            total = self._center_counts + batch_counts
+            touched = batch_counts > 0
+            self.centroids[touched] = (
+                self.centroids[touched] * self._center_counts[touched, None] + batch_sums[touched]
+            ) / total[touched, None]
+            self._center_counts = total
+            self._normalize_centroids()
+
+            self.assignments.update(zip(ids, labels.tolist()))
+            return n_rows
+
+    def forget(self, post_ids):
+        """貼文刪除後移出成員統計 (中心不回溯)"""
+        with self._lock:
+            for pid in post_ids:
+                self.assignments.pop(pid, None)
+
+    # --- 摘要 ---
+
+    def summary(self, active_ids=None, top_n=8):
+        """回傳每個群集的成員數與代表詞 [{'群集', '成員數', '代表詞'}, ...]"""
+        with self._lock:
+            if self.centroids is None:
+                return []
+            assignments = self.assignments
+            if active_ids is not None:
+                active_ids = set(active_ids)
+                assignments = {pid: c for pid, c in assignments.items() if pid in active_ids}
+            member_counts = Counter(assignments.values())
+            top_cols = np.argsort(-self.centroids, axis=1)[:, :top_n]
+
+            rows = []
+            for cluster in range(self.n_clusters):
+                terms = [self.terms[c] for c in top_cols[cluster] if self.centroids[cluster, c] > 0]
+                rows.append({
+                    "群集": cluster + 1,
+                    "成員數": member_counts.get(cluster, 0),
+                    "代表詞": "、".join(terms),
+                })
+            return sorted(rows, key=lambda r: r["成員數"], reverse=True)
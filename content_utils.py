@@ -0,0 +1,178 @@
+"""
+靜態頁面內容 (議程、名單、致謝) 與使用者貼文的 HTML 產生。
+
+內容放在 content/*.json，修改內容不需改動頁面程式。
+產生的 HTML 以 (檔名, 路徑, 檔案修改時間) 快取，每位訪客只需一次快取查詢與一次 st.markdown。
+使用者貼文於寫入時清理 (normalize_post)；顯示用的 HTML 一律由伺服器從 content 產生 (render_post_html，有快取)，
+不信任任何由客戶端寫入的 HTML。
+"""
+import functools
+import html
+import json
+import os
+import re
+import unicodedata
+
+import streamlit as st
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content')
+
+TABLE_STYLE = "width:100%; border-collapse:collapse; font-size:0.9rem;"
+CELL_STYLE = "padding:6px 8px; border-bottom:1px solid rgba(128,128,128,0.3); vertical-align:top; text-align:left;"
+
+
+def _content_path(name):
+    return os.path.join(CONTENT_DIR, f"{name}.json")
+
+
+@st.cache_data(show_spinner=False)
+def _load(name, mtime):
+    with open(_content_path(name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_content(name):
+    """讀取 content/<name>.json；檔案修改後自動重新載入"""
+    return _load(name, os.path.getmtime(_content_path(name)))
+
+
+def _resolve(data, path):
+    for key in path:
+        data = data[key]
+    return data
+
+
+def _cell_html(value):
+    # 內容中的換行以 <br> 呈現
+    return html.escape(str(value)).replace('\n', '<br>')
+
+
+def _item_html(item):
+    text = html.escape(item['text'])
+    if item.get('url') and _is_safe_url(item['url']):
+        text = f'<a href="{html.escape(item["url"])}" target="_blank">{text}</a>'
+    return f"<li><strong>{html.escape(item['label'])}：</strong> {text}</li>"
+
+
+@st.cache_data(show_spinner=False)
+def _table_html(name, path, mtime):
+    table = _resolve(_load(name, mtime), path)
+    columns = table['columns']
+    widths = table.get('widths') or [1] * len(columns)
+    total = sum(widths)
+
+    parts = [f'<table style="{TABLE_STYLE}"><colgroup>']
+    parts.extend(f'<col style="width:{w / total:.0%}">' for w in widths)
+    parts.append('</colgroup><thead><tr>')
+    parts.extend(f'<th style="{CELL_STYLE}">{html.escape(c)}</th>' for c in columns)
+    parts.append('</tr></thead><tbody>')
+    for row in table['rows']:
+        parts.append('<tr>' + ''.join(f'<td style="{CELL_STYLE}">{_cell_html(v)}</td>' for v in row) + '</tr>')
+    parts.append('</tbody></table>')
+    return ''.join(parts)
+
+
+@st.cache_data(show_spinner=False)
+def _sections_html(name, path, mtime):
+    parts = []
+    for section in _resolve(_load(name, mtime), path):
+        parts.append(f"<h3>{html.escape(section['title'])}</h3><ul>")
+        parts.extend(_item_html(item) for item in section['items'])
+        parts.append("</ul>")
+    return ''.join(parts)
+
+
+def render_table(name, *path):
+    """以單一 HTML 表格呈現 content/<name>.json 中 path 指向的 {'columns', 'rows', 'widths'}"""
+    if not os.path.exists(_content_path(name)):
+        st.info("無數據可顯示。")
+        return
+    st.markdown(_table_html(name, path, os.path.getmtime(_content_path(name))), unsafe_allow_html=True)
+
+
+def render_sections(name, *path):
+    """以單一 HTML 區塊呈現 [{'title', 'items': [{'label', 'text', 'url'}]}]"""
+    st.markdown(_sections_html(name, path, os.path.getmtime(_content_path(name))), unsafe_allow_html=True)
+
+
+# --- 使用者貼文 ---
+
+MAX_POST_LENGTH = 2000
+SAFE_URL_SCHEMES = ('http://', 'https://', 'mailto:')
+
+# 控制字元與零寬/方向控制字元 (可用於隱藏或反轉顯示的文字)
+_INVISIBLE_CHARS = re.compile('[\x00-\x08\x0b-\x1f\x7f\u200b-\u200f\u202a-\u202e\u2060-\u2069\ufeff]')
+_INLINE_SPACES = re.compile(r'[ \t]+')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+# 允許的 Markdown 子集 (在 HTML 跳脫之後套用，因此只會產生下列標籤)
+_CODE = re.compile(r'`([^`\n]+)`')
+_URL = r'https?://(?:(?!&(?:quot|lt|gt|#x27);)[^\s<)])+'  # 跳脫後的引號與角括號不算網址
+_LINK = re.compile(r'\[([^\]\n]+)\]\((' + _URL + r')\)')
+_BARE_URL = re.compile(r'(?<![=">])(' + _URL + r')')
+_TRAILING_PUNCT = re.compile(r'[.,;:!?*_~]+$')  # 與 GFM 相同，結尾的標點與強調符號不算網址
+_PLACEHOLDER = re.compile(r'\x00(\d+)\x00')  # normalize_post 已移除 \x00，不會與內容衝突
+_BOLD = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+_ITALIC = re.compile(r'(?<!\*)\*(?=[^\s*])(.+?)(?<=[^\s*])\*(?!\*)')
+_LINK_ATTRS = 'target="_blank" rel="noopener noreferrer nofollow"'
+
+
+def _is_safe_url(url):
+    return str(url).strip().lower().startswith(SAFE_URL_SCHEMES)
+
+
+def normalize_post(text):
+    """統一換行與 Unicode 形式、移除不可見字元、壓縮多餘空白與空行，並限制長度"""
+    text = unicodedata.normalize('NFC', str(text)).replace('\r\n', '\n').replace('\r', '\n')
+    text = _INVISIBLE_CHARS.sub('', text)
+    text = '\n'.join(_INLINE_SPACES.sub(' ', line).strip() for line in text.split('\n'))
+    return _BLANK_LINES.sub('\n\n', text).strip()[:MAX_POST_LENGTH]
+
+
+def _inline_html(text):
+    # 先跳脫所有 HTML，再把允許的 Markdown 語法轉為固定標籤；程式碼片段內不再套用其他語法
+    parts = _CODE.split(text)
+    out = []
+    for i, part in enumerate(parts):
+        escaped = html.escape(part)
+        if i % 2:
+            out.append(f"<code>{escaped}</code>")
+            continue
+        # 連結先換成佔位符，網址中的 * 不會被粗體/斜體改寫
+        links = []
+
+        def hold(anchor):
+            links.append(anchor)
+            return f"\x00{len(links) - 1}\x00"
+
+        escaped = _LINK.sub(lambda m: hold(f'<a href="{m.group(2)}" {_LINK_ATTRS}>{m.group(1)}</a>'), escaped)
+        escaped = _BARE_URL.sub(lambda m: _bare_link(m.group(1), hold), escaped)
+        escaped = _BOLD.sub(r'<strong>\1</strong>', escaped)
+        escaped = _ITALIC.sub(r'<em>\1</em>', escaped)
+        out.append(_PLACEHOLDER.sub(lambda m: links[int(m.group(1))], escaped))
+    return ''.join(out)
+
+
+def _bare_link(url, hold):
+    trailing = _TRAILING_PUNCT.search(url)
+    tail = trailing.group(0) if trailing else ''
+    url = url[:len(url) - len(tail)]
+    if url.split('://', 1)[1]:  # 只有 scheme 時不產生連結
+        return hold(f'<a href="{url}" {_LINK_ATTRS}>{url}</a>') + tail
+    return url + tail
+
+
+@functools.lru_cache(maxsize=4096)
+def render_post_html(text):
+    """
+    貼文內容 -> 安全的 HTML (單行、無空行，st.markdown 會原樣輸出不再解析 Markdown)。
+    只支援 **粗體**、*斜體*、`程式碼`、[文字](https://...) 與網址自動連結，其餘 HTML 一律跳脫。
+    """
+    paragraphs = normalize_post(text).split('\n\n')
+    body = ''.join(f"<p>{'<br>'.join(_inline_html(line) for line in p.split(chr(10)))}</p>" for p in paragraphs if p)
+    return f'<div class="post-content">{body}</div>'
+
+
+def render_post(content):
+    """由貼文內容產生 HTML 並顯示 (不使用資料庫中的任何 HTML)"""
+    st.markdown(render_post_html(content), unsafe_allow_html=True)
@@ -7,48 +7,155 @@ CREATE TABLE IF NOT EXISTS public.profiles (
   CONSTRAINT profiles_pkey PRIMARY KEY (id)
 );
 
+-- 活動 (每場會議一筆；同一時間只有一場 is_active)
+CREATE TABLE IF NOT EXISTS public.events (
+  id text NOT NULL, -- 例如 'lt25'
+  name text NOT NULL,
+  is_active boolean DEFAULT false NOT NULL,
+  created_at timestamp with time zone DEFAULT now() NOT NULL,
+  CONSTRAINT events_pkey PRIMARY KEY (id)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_single_active ON public.events (is_active) WHERE is_active;
+
+INSERT INTO public.events (id, name, is_active)
+VALUES ('lt25', '2025 青年代號：GenAI', true)
+ON CONFLICT (id) DO NOTHING;
+
+-- 目前進行中的活動 (未指定 event_id 時的預設值)
+CREATE OR REPLACE FUNCTION public.active_event_id()
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT id FROM public.events WHERE is_active LIMIT 1;
+$$;
+
 -- 儀表板意見彙整
 CREATE TABLE IF NOT EXISTS public.suggestions (
   id uuid DEFAULT gen_random_uuid() NOT NULL,
+  event_id text DEFAULT public.active_event_id() NOT NULL REFERENCES public.events (id),
   content text NOT NULL,
   cate text NULL, 
+  is_hidden boolean DEFAULT false NOT NULL, -- 版主隱藏
   created_at timestamp with time zone DEFAULT now() NOT NULL,
+  updated_at timestamp with time zone DEFAULT now() NOT NULL,
   CONSTRAINT suggestions_pkey PRIMARY KEY (id)
 );
 
+-- 升級舊資料庫：CREATE TABLE IF NOT EXISTS 不會替既有表格加欄位
+ALTER TABLE public.suggestions ADD COLUMN IF NOT EXISTS event_id text DEFAULT public.active_event_id() NOT NULL REFERENCES public.events (id);
+ALTER TABLE public.suggestions ADD COLUMN IF NOT EXISTS is_hidden boolean DEFAULT false NOT NULL;
+ALTER TABLE public.suggestions ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT now() NOT NULL;
+
 --
 CREATE TABLE IF NOT EXISTS public.votes (
   id uuid DEFAULT gen_random_uuid() NOT NULL,
+  event_id text NOT NULL REFERENCES public.events (id), -- 由觸發器沿用所屬建議的活動
   suggestion_id uuid NOT NULL REFERENCES public.suggestions(id) ON DELETE CASCADE,
   user_id uuid NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
   vote_type text NOT NULL,
+  created_at timestamp with time zone DEFAULT now() NOT NULL,
+  updated_at timestamp with time zone DEFAULT now() NOT NULL,
   CONSTRAINT votes_pkey PRIMARY KEY (id),
   CONSTRAINT unique_vote UNIQUE (suggestion_id, user_id) -- 每個使用者對每個意見只能投一票
 );
 
+-- 升級舊資料庫：既有投票沿用所屬建議的活動；舊投票沒有時間紀錄，以升級當下為準
+ALTER TABLE public.votes ADD COLUMN IF NOT EXISTS event_id text REFERENCES public.events (id);
+UPDATE public.votes v SET event_id = s.event_id
+FROM public.suggestions s
+WHERE v.event_id IS NULL AND s.id = v.suggestion_id;
+ALTER TABLE public.votes ALTER COLUMN event_id SET NOT NULL;
+ALTER TABLE public.votes ADD COLUMN IF NOT EXISTS created_at timestamp with time zone DEFAULT now() NOT NULL;
+ALTER TABLE public.votes ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT now() NOT NULL;
+
+-- 每分鐘投票增減量 (共識變化時間軸，由觸發器維護)
+CREATE TABLE IF NOT EXISTS public.vote_tally_minutes (
+  bucket timestamp with time zone NOT NULL,
+  suggestion_id uuid NOT NULL, -- 不設外鍵：建議刪除時的連鎖刪票仍需寫入
+  vote_type text NOT NULL,
+  event_id text NOT NULL,
+  delta integer DEFAULT 0 NOT NULL,
+  CONSTRAINT vote_tally_minutes_pkey PRIMARY KEY (bucket, suggestion_id, vote_type)
+);
+
 -- 共創新聞牆貼文
 CREATE TABLE IF NOT EXISTS public.posts (
   id uuid DEFAULT gen_random_uuid() NOT NULL,
+  event_id text DEFAULT public.active_event_id() NOT NULL REFERENCES public.events (id),
   user_id uuid NOT NULL REFERENCES auth.users (id) ON DELETE CASCADE,
   topic text NOT NULL,
   post_type text NOT NULL,
   content text NOT NULL,
+  is_hidden boolean DEFAULT false NOT NULL, -- 版主隱藏
   created_at timestamp with time zone DEFAULT now() NOT NULL,
+  updated_at timestamp with time zone DEFAULT now() NOT NULL,
   CONSTRAINT posts_pkey PRIMARY KEY (id)
 );
 
+-- 升級舊資料庫：CREATE TABLE IF NOT EXISTS 不會替既有表格加欄位
+ALTER TABLE public.posts ADD COLUMN IF NOT EXISTS event_id text DEFAULT public.active_event_id() NOT NULL REFERENCES public.events (id);
+-- 顯示用的 HTML 改由頁面從 content 產生，不保存客戶端寫入的 HTML
+ALTER TABLE public.posts DROP COLUMN IF EXISTS content_html;
+ALTER TABLE public.posts ADD COLUMN IF NOT EXISTS is_hidden boolean DEFAULT false NOT NULL;
+ALTER TABLE public.posts ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT now() NOT NULL;
+
 -- 貼文反應 React
 CREATE TABLE IF NOT EXISTS public.reactions (
   id uuid DEFAULT gen_random_uuid() NOT NULL,
+  event_id text NOT NULL REFERENCES public.events (id), -- 由觸發器沿用所屬貼文的活動
   post_id uuid NOT NULL REFERENCES public.posts (id) ON DELETE CASCADE,
   user_id uuid NOT NULL REFERENCES auth.users (id) ON DELETE CASCADE,
   reaction_type text NOT NULL,
+  created_at timestamp with time zone DEFAULT now() NOT NULL,
+  updated_at timestamp with time zone DEFAULT now() NOT NULL,
   CONSTRAINT reactions_pkey PRIMARY KEY (id),
   CONSTRAINT unique_reaction UNIQUE (post_id, user_id)
 );
 
+-- 升級舊資料庫：既有反應沿用所屬貼文的活動；舊反應沒有時間紀錄，以升級當下為準
+ALTER TABLE public.reactions ADD COLUMN IF NOT EXISTS event_id text REFERENCES public.events (id);
+UPDATE public.reactions r SET event_id = p.event_id
+FROM public.posts p
+WHERE r.event_id IS NULL AND p.id = r.post_id;
+ALTER TABLE public.reactions ALTER COLUMN event_id SET NOT NULL;
+ALTER TABLE public.reactions ADD COLUMN IF NOT EXISTS created_at timestamp with time zone DEFAULT now() NOT NULL;
+ALTER TABLE public.reactions ADD COLUMN IF NOT EXISTS updated_at timestamp with time zone DEFAULT now() NOT NULL;
 
--- 觸發器設置
+-- 活動數據分析：每分鐘活動量 (由觸發器維護，分析頁只讀取彙總表)
+-- actions 為操作次數 (新增/變更)，delta 為目前數量的增減 (刪除為 -1)
+CREATE TABLE IF NOT EXISTS public.activity_minutes (
+  event_id text NOT NULL,
+  bucket timestamp with time zone NOT NULL,
+  metric text NOT NULL,              -- vote / reaction / post
+  dimension text NOT NULL,           -- vote_type / reaction_type / topic
+  actions integer DEFAULT 0 NOT NULL,
+  delta integer DEFAULT 0 NOT NULL,
+  CONSTRAINT activity_minutes_pkey PRIMARY KEY (event_id, bucket, metric, dimension)
+);
+
+-- 各活動目前的累計數量 (投票分布、各主題貼文數、反應分布)
+CREATE TABLE IF NOT EXISTS public.activity_totals (
+  event_id text NOT NULL,
+  metric text NOT NULL,
+  dimension text NOT NULL,
+  total integer DEFAULT 0 NOT NULL,
+  CONSTRAINT activity_totals_pkey PRIMARY KEY (event_id, metric, dimension)
+);
+
+-- 參與者 (每人每種活動一列)，用於計算參與人數與近期活躍人數
+CREATE TABLE IF NOT EXISTS public.participants (
+  event_id text NOT NULL,
+  user_id uuid NOT NULL,
+  metric text NOT NULL,
+  first_seen timestamp with time zone DEFAULT now() NOT NULL,
+  last_seen timestamp with time zone DEFAULT now() NOT NULL,
+  CONSTRAINT participants_pkey PRIMARY KEY (event_id, metric, user_id)
+);
+
+
+-- 觸發器設置 (先移除同名觸發器，本檔可重複執行)
 
 CREATE OR REPLACE FUNCTION public.handle_new_user()
 RETURNS trigger
@@ -62,11 +169,296 @@ BEGIN
 END;
 $$;
 
+DROP TRIGGER IF EXISTS on_auth_user_created ON auth.users;
 CREATE TRIGGER on_auth_user_created
   AFTER INSERT ON auth.users
   FOR EACH ROW
   EXECUTE PROCEDURE public.handle_new_user();
 
+-- 更新時間 (同步寫入時若已指定 updated_at 則保留來源端時間，避免兩端來回傳遞)
+CREATE OR REPLACE FUNCTION public.set_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+    NEW.updated_at := now();
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_vote_updated ON public.votes;
+CREATE TRIGGER on_vote_updated
+  BEFORE UPDATE ON public.votes
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.set_updated_at();
+
+DROP TRIGGER IF EXISTS on_suggestion_updated ON public.suggestions;
+CREATE TRIGGER on_suggestion_updated
+  BEFORE UPDATE ON public.suggestions
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.set_updated_at();
+
+DROP TRIGGER IF EXISTS on_post_updated ON public.posts;
+CREATE TRIGGER on_post_updated
+  BEFORE UPDATE ON public.posts
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.set_updated_at();
+
+DROP TRIGGER IF EXISTS on_reaction_updated ON public.reactions;
+CREATE TRIGGER on_reaction_updated
+  BEFORE UPDATE ON public.reactions
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.set_updated_at();
+
+-- 投票與反應沿用上層資料的活動，頁面查詢不需再 JOIN
+CREATE OR REPLACE FUNCTION public.inherit_event_id()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_TABLE_NAME = 'votes' THEN
+    SELECT event_id INTO NEW.event_id FROM public.suggestions WHERE id = NEW.suggestion_id;
+  ELSE
+    SELECT event_id INTO NEW.event_id FROM public.posts WHERE id = NEW.post_id;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_vote_event ON public.votes;
+CREATE TRIGGER on_vote_event
+  BEFORE INSERT ON public.votes
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.inherit_event_id();
+
+DROP TRIGGER IF EXISTS on_reaction_event ON public.reactions;
+CREATE TRIGGER on_reaction_event
+  BEFORE INSERT ON public.reactions
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.inherit_event_id();
+
+-- 依活動分區的索引：每場活動的查詢成本不隨歷史資料增加
+CREATE INDEX IF NOT EXISTS idx_suggestions_event_created ON public.suggestions (event_id, created_at DESC) WHERE NOT is_hidden;
+CREATE INDEX IF NOT EXISTS idx_suggestions_event_hidden ON public.suggestions (event_id) WHERE is_hidden;
+CREATE INDEX IF NOT EXISTS idx_votes_event_suggestion ON public.votes (event_id, suggestion_id, vote_type);
+CREATE INDEX IF NOT EXISTS idx_posts_event_created ON public.posts (event_id, created_at DESC) WHERE NOT is_hidden;
+CREATE INDEX IF NOT EXISTS idx_posts_event_hidden ON public.posts (event_id) WHERE is_hidden;
+CREATE INDEX IF NOT EXISTS idx_reactions_event_post ON public.reactions (event_id, post_id, reaction_type);
+CREATE INDEX IF NOT EXISTS idx_tally_event_bucket ON public.vote_tally_minutes (event_id, bucket);
+CREATE INDEX IF NOT EXISTS idx_participants_event_seen ON public.participants (event_id, metric, last_seen);
+
+-- 同步用：建議與貼文的刪除紀錄 (sync_engine 拉取後在本機套用；子表由 CASCADE 處理)
+CREATE TABLE IF NOT EXISTS public.sync_tombstones (
+  table_name text NOT NULL,
+  row_id uuid NOT NULL,
+  deleted_at timestamp with time zone DEFAULT now() NOT NULL,
+  CONSTRAINT sync_tombstones_pkey PRIMARY KEY (table_name, row_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_at ON public.sync_tombstones (deleted_at);
+
+CREATE OR REPLACE FUNCTION public.record_tombstone()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO public.sync_tombstones (table_name, row_id)
+    VALUES (TG_TABLE_NAME, OLD.id)
+    ON CONFLICT (table_name, row_id) DO UPDATE SET deleted_at = now();
+  ELSE
+    -- 復原 (重新新增同一 id) 時移除刪除紀錄
+    DELETE FROM public.sync_tombstones WHERE table_name = TG_TABLE_NAME AND row_id = NEW.id;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_suggestion_tombstone ON public.suggestions;
+CREATE TRIGGER on_suggestion_tombstone
+  AFTER INSERT OR DELETE ON public.suggestions
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.record_tombstone();
+
+DROP TRIGGER IF EXISTS on_post_tombstone ON public.posts;
+CREATE TRIGGER on_post_tombstone
+  AFTER INSERT OR DELETE ON public.posts
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.record_tombstone();
+
+-- 增量同步游標索引
+CREATE INDEX IF NOT EXISTS idx_suggestions_updated_at ON public.suggestions (updated_at);
+CREATE INDEX IF NOT EXISTS idx_votes_updated_at ON public.votes (updated_at);
+CREATE INDEX IF NOT EXISTS idx_posts_updated_at ON public.posts (updated_at);
+CREATE INDEX IF NOT EXISTS idx_reactions_updated_at ON public.reactions (updated_at);
+
+-- 投票變動寫入每分鐘增減量
+-- 新增/變更以資料列的 updated_at 歸入時間區間 (同步寫入的離線投票保留原本的時間)，刪除以當下時間
+CREATE OR REPLACE FUNCTION public.record_vote_tally()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  current_bucket timestamp with time zone := date_trunc('minute',
+    CASE WHEN TG_OP = 'DELETE' THEN now() ELSE LEAST(NEW.updated_at, now()) END);
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND (TG_OP = 'DELETE' OR OLD.vote_type IS DISTINCT FROM NEW.vote_type) THEN
+    INSERT INTO public.vote_tally_minutes (bucket, suggestion_id, vote_type, event_id, delta)
+    VALUES (current_bucket, OLD.suggestion_id, OLD.vote_type, OLD.event_id, -1)
+    ON CONFLICT (bucket, suggestion_id, vote_type)
+    DO UPDATE SET delta = public.vote_tally_minutes.delta - 1;
+  END IF;
+
+  IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND OLD.vote_type IS DISTINCT FROM NEW.vote_type) THEN
+    INSERT INTO public.vote_tally_minutes (bucket, suggestion_id, vote_type, event_id, delta)
+    VALUES (current_bucket, NEW.suggestion_id, NEW.vote_type, NEW.event_id, 1)
+    ON CONFLICT (bucket, suggestion_id, vote_type)
+    DO UPDATE SET delta = public.vote_tally_minutes.delta + 1;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_vote_changed ON public.votes;
+CREATE TRIGGER on_vote_changed
+  AFTER INSERT OR UPDATE OR DELETE ON public.votes
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.record_vote_tally();
+
+-- 既有投票回填 (僅於升級舊資料庫、彙總表仍為空時執行一次)
+-- 重複執行時不可再回填：投票改變 vote_type 後，觸發器寫入的列與此處計算的鍵不同，會重複計數
+INSERT INTO public.vote_tally_minutes (bucket, suggestion_id, vote_type, event_id, delta)
+SELECT date_trunc('minute', v.created_at), v.suggestion_id, v.vote_type, v.event_id, COUNT(*)
+FROM public.votes v
+WHERE NOT EXISTS (SELECT 1 FROM public.vote_tally_minutes)
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (bucket, suggestion_id, vote_type) DO NOTHING;
+
+-- 活動數據彙總：累加每分鐘活動量與累計數量 (p_at 為操作時間)
+DROP FUNCTION IF EXISTS public.bump_activity(text, text, text, integer, integer);
+CREATE OR REPLACE FUNCTION public.bump_activity(
+    p_event_id text, p_metric text, p_dimension text, p_actions integer, p_delta integer,
+    p_at timestamp with time zone
+)
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO public.activity_minutes (event_id, bucket, metric, dimension, actions, delta)
+  VALUES (p_event_id, date_trunc('minute', p_at), p_metric, p_dimension, p_actions, p_delta)
+  ON CONFLICT (event_id, bucket, metric, dimension)
+  DO UPDATE SET actions = public.activity_minutes.actions + EXCLUDED.actions,
+                delta = public.activity_minutes.delta + EXCLUDED.delta;
+
+  INSERT INTO public.activity_totals (event_id, metric, dimension, total)
+  VALUES (p_event_id, p_metric, p_dimension, p_delta)
+  ON CONFLICT (event_id, metric, dimension)
+  DO UPDATE SET total = public.activity_totals.total + EXCLUDED.total;
+$$;
+
+-- 只供觸發器呼叫，不開放 RPC
+REVOKE EXECUTE ON FUNCTION public.bump_activity FROM public, anon, authenticated;
+
+-- 觸發器參數：TG_ARGV[0] 為 metric，TG_ARGV[1] 為分組欄位
+-- 與 record_vote_tally 相同，新增/變更以資料列的 updated_at 為操作時間
+CREATE OR REPLACE FUNCTION public.record_activity()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  old_dimension text;
+  new_dimension text;
+  acted_at timestamp with time zone := CASE WHEN TG_OP = 'DELETE' THEN now() ELSE LEAST(NEW.updated_at, now()) END;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    old_dimension := to_jsonb(OLD) ->> TG_ARGV[1];
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    new_dimension := to_jsonb(NEW) ->> TG_ARGV[1];
+  END IF;
+  IF TG_OP = 'UPDATE' AND old_dimension IS NOT DISTINCT FROM new_dimension THEN
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM public.bump_activity(OLD.event_id, TG_ARGV[0], old_dimension, 0, -1, acted_at);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.bump_activity(NEW.event_id, TG_ARGV[0], new_dimension, 1, 1, acted_at);
+    -- 活躍時間每分鐘最多更新一次，避免熱點列
+    INSERT INTO public.participants (event_id, user_id, metric, first_seen, last_seen)
+    VALUES (NEW.event_id, NEW.user_id, TG_ARGV[0], acted_at, acted_at)
+    ON CONFLICT (event_id, metric, user_id)
+    DO UPDATE SET first_seen = LEAST(public.participants.first_seen, EXCLUDED.first_seen),
+                  last_seen = GREATEST(public.participants.last_seen, EXCLUDED.last_seen)
+    WHERE public.participants.last_seen < EXCLUDED.last_seen - interval '1 minute'
+       OR public.participants.first_seen > EXCLUDED.first_seen;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS on_vote_activity ON public.votes;
+CREATE TRIGGER on_vote_activity
+  AFTER INSERT OR UPDATE OF vote_type OR DELETE ON public.votes
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.record_activity('vote', 'vote_type');
+
+DROP TRIGGER IF EXISTS on_reaction_activity ON public.reactions;
+CREATE TRIGGER on_reaction_activity
+  AFTER INSERT OR UPDATE OF reaction_type OR DELETE ON public.reactions
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.record_activity('reaction', 'reaction_type');
+
+DROP TRIGGER IF EXISTS on_post_activity ON public.posts;
+CREATE TRIGGER on_post_activity
+  AFTER INSERT OR UPDATE OF topic OR DELETE ON public.posts
+  FOR EACH ROW
+  EXECUTE PROCEDURE public.record_activity('post', 'topic');
+
+-- 既有資料回填 (僅於升級舊資料庫、彙總表仍為空時執行一次)
+-- 重複執行時不可再回填：觸發器已累加的增量旁再插入目前狀態的計數會使數據膨脹
+INSERT INTO public.activity_minutes (event_id, bucket, metric, dimension, actions, delta)
+SELECT event_id, date_trunc('minute', created_at), metric, dimension, COUNT(*), COUNT(*)
+FROM (
+  SELECT event_id, created_at, 'vote' AS metric, vote_type AS dimension FROM public.votes
+  UNION ALL
+  SELECT event_id, created_at, 'reaction', reaction_type FROM public.reactions
+  UNION ALL
+  SELECT event_id, created_at, 'post', topic FROM public.posts
+) existing
+WHERE NOT EXISTS (SELECT 1 FROM public.activity_minutes)
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (event_id, bucket, metric, dimension) DO NOTHING;
+
+INSERT INTO public.activity_totals (event_id, metric, dimension, total)
+SELECT event_id, metric, dimension, SUM(delta)
+FROM public.activity_minutes
+WHERE NOT EXISTS (SELECT 1 FROM public.activity_totals)
+GROUP BY 1, 2, 3
+ON CONFLICT (event_id, metric, dimension) DO NOTHING;
+
+INSERT INTO public.participants (event_id, user_id, metric, first_seen, last_seen)
+SELECT event_id, user_id, metric, MIN(created_at), MAX(updated_at)
+FROM (
+  SELECT event_id, user_id, 'vote' AS metric, created_at, updated_at FROM public.votes
+  UNION ALL
+  SELECT event_id, user_id, 'reaction', created_at, updated_at FROM public.reactions
+  UNION ALL
+  SELECT event_id, user_id, 'post', created_at, updated_at FROM public.posts
+) existing
+GROUP BY 1, 2, 3
+ON CONFLICT (event_id, metric, user_id) DO NOTHING;
+
 -- 檢查使用者角色
 CREATE OR REPLACE FUNCTION public.user_role(user_uuid uuid)
 RETURNS text
@@ -76,8 +468,71 @@ AS $$
   SELECT role FROM public.profiles WHERE id = user_uuid;
 $$;
 
--- 儀表板意見統計 
-CREATE OR REPLACE FUNCTION public.get_suggestion_status()
+-- 自訂 Access Token Hook：簽發 JWT 時寫入 user_role claim，RLS 不需再查 profiles
+-- (於 Supabase Dashboard → Authentication → Hooks 啟用 custom_access_token_hook)
+CREATE OR REPLACE FUNCTION public.custom_access_token_hook(event jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  claims jsonb;
+  v_role text;
+BEGIN
+  SELECT role INTO v_role FROM public.profiles WHERE id = (event->>'user_id')::uuid;
+  claims := event->'claims';
+  claims := jsonb_set(claims, '{user_role}', to_jsonb(COALESCE(v_role, 'user')));
+  RETURN jsonb_set(event, '{claims}', claims);
+END;
+$$;
+
+GRANT USAGE ON SCHEMA public TO supabase_auth_admin;
+GRANT EXECUTE ON FUNCTION public.custom_access_token_hook TO supabase_auth_admin;
+REVOKE EXECUTE ON FUNCTION public.custom_access_token_hook FROM authenticated, anon, public;
+GRANT SELECT ON TABLE public.profiles TO supabase_auth_admin;
+
+-- 目前請求的角色：優先讀 JWT claim；未啟用 Hook 的舊 Token 才查 profiles
+-- RLS 中以 (SELECT public.jwt_role()) 呼叫，每個語句只計算一次而非每列一次
+CREATE OR REPLACE FUNCTION public.jwt_role()
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT COALESCE(auth.jwt() ->> 'user_role', public.user_role(auth.uid()));
+$$;
+
+-- JWT claim 優先：降級後舊 Token 仍帶原本的 user_role，直到過期為止。
+-- 因此版主/管理員被降級時撤銷其所有 Session (Refresh Token 一併失效)，
+-- 無法換發新 Token；剩餘風險為 Access Token 的效期 (建議於 Auth 設定縮短 JWT expiry)
+CREATE OR REPLACE FUNCTION public.revoke_demoted_sessions()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  DELETE FROM auth.sessions WHERE user_id = NEW.id;
+  RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION public.revoke_demoted_sessions FROM public, anon, authenticated;
+
+DROP TRIGGER IF EXISTS on_profile_demoted ON public.profiles;
+CREATE TRIGGER on_profile_demoted
+  AFTER UPDATE OF role ON public.profiles
+  FOR EACH ROW
+  WHEN (OLD.role IN ('system_admin', 'moderator') AND NEW.role IS DISTINCT FROM OLD.role
+        AND NOT (OLD.role = 'moderator' AND NEW.role = 'system_admin'))
+  EXECUTE PROCEDURE public.revoke_demoted_sessions();
+
+-- 舊版 (不分活動) 的 RPC 簽章
+DROP FUNCTION IF EXISTS public.get_suggestion_status();
+DROP FUNCTION IF EXISTS public.get_consensus_timeline(uuid, integer);
+DROP FUNCTION IF EXISTS public.get_post_reaction_status();
+
+-- 儀表板意見統計 (p_event_id 未指定時為進行中的活動)
+CREATE OR REPLACE FUNCTION public.get_suggestion_status(p_event_id text DEFAULT NULL)
  RETURNS TABLE(
      id uuid,
      cate text,
@@ -100,48 +555,235 @@ SELECT
 FROM
     public.suggestions s
 LEFT JOIN
-    public.votes v ON s.id = v.suggestion_id
+    public.votes v ON s.id = v.suggestion_id AND v.event_id = s.event_id
+WHERE
+    s.event_id = COALESCE(p_event_id, public.active_event_id())
+    AND NOT s.is_hidden
 GROUP BY
     s.id, s.cate, s.content, s.created_at
 ORDER BY
     s.created_at DESC;
 $function$;
 
+-- 共識變化時間軸 (累計票數，依 p_bucket_minutes 降採樣)
+CREATE OR REPLACE FUNCTION public.get_consensus_timeline(
+    p_suggestion_id uuid DEFAULT NULL,
+    p_bucket_minutes integer DEFAULT 1,
+    p_event_id text DEFAULT NULL
+)
+ RETURNS TABLE(
+     bucket timestamp with time zone,
+     vote_type text,
+     vote_count bigint
+ )
+ LANGUAGE sql
+AS $function$
+WITH bucketed AS (
+    SELECT
+        to_timestamp(floor(extract(epoch FROM t.bucket) / (p_bucket_minutes * 60)) * (p_bucket_minutes * 60)) AS bucket,
+        t.vote_type,
+        SUM(t.delta) AS delta
+    FROM
+        public.vote_tally_minutes t
+    JOIN
+        public.suggestions s ON s.id = t.suggestion_id AND NOT s.is_hidden
+    WHERE
+        t.event_id = COALESCE(p_event_id, public.active_event_id())
+        AND (p_suggestion_id IS NULL OR t.suggestion_id = p_suggestion_id)
+    GROUP BY
+        1, 2
+)
+SELECT
+    b.bucket,
+    b.vote_type,
+    SUM(b.delta) OVER (PARTITION BY b.vote_type ORDER BY b.bucket)::bigint AS vote_count
+FROM
+    bucketed b
+ORDER BY
+    b.bucket, b.vote_type;
+$function$;
+
+-- 活動數據摘要：累計數量、參與人數、近 p_active_minutes 分鐘的活躍人數，
+-- 以及最近 p_rate_minutes 個完整分鐘的操作數 ('recent'，不含進行中的這一分鐘)
+-- 只讀取彙總表 (列數與類別數、參與人數相關)，不掃描原始資料
+DROP FUNCTION IF EXISTS public.get_activity_summary(text, integer);
+CREATE OR REPLACE FUNCTION public.get_activity_summary(
+    p_event_id text DEFAULT NULL,
+    p_active_minutes integer DEFAULT 15,
+    p_rate_minutes integer DEFAULT 5
+)
+ RETURNS TABLE(
+     metric text,
+     dimension text,
+     total bigint
+ )
+ LANGUAGE sql
+ SECURITY DEFINER
+ SET search_path = public
+AS $function$
+SELECT t.metric, t.dimension, t.total::bigint
+FROM public.activity_totals t
+WHERE t.event_id = COALESCE(p_event_id, public.active_event_id())
+UNION ALL
+SELECT 'participants', p.metric, COUNT(*)
+FROM public.participants p
+WHERE p.event_id = COALESCE(p_event_id, public.active_event_id())
+GROUP BY p.metric
+UNION ALL
+SELECT 'active', p.metric, COUNT(*)
+FROM public.participants p
+WHERE p.event_id = COALESCE(p_event_id, public.active_event_id())
+  AND p.last_seen >= now() - make_interval(mins => p_active_minutes)
+GROUP BY p.metric
+UNION ALL
+SELECT 'recent', a.metric, SUM(a.actions)::bigint
+FROM public.activity_minutes a
+WHERE a.event_id = COALESCE(p_event_id, public.active_event_id())
+  AND a.bucket >= date_trunc('minute', now()) - make_interval(mins => p_rate_minutes)
+  AND a.bucket < date_trunc('minute', now())
+GROUP BY a.metric;
+$function$;
+
+-- 近 p_since_minutes 分鐘的活動量時間序列 (依 p_bucket_minutes 降採樣)
+CREATE OR REPLACE FUNCTION public.get_activity_timeline(
+    p_event_id text DEFAULT NULL,
+    p_since_minutes integer DEFAULT 120,
+    p_bucket_minutes integer DEFAULT 5
+)
+ RETURNS TABLE(
+     bucket timestamp with time zone,
+     metric text,
+     actions bigint
+ )
+ LANGUAGE sql
+AS $function$
+SELECT
+    to_timestamp(floor(extract(epoch FROM a.bucket) / (p_bucket_minutes * 60)) * (p_bucket_minutes * 60)) AS bucket,
+    a.metric,
+    SUM(a.actions)::bigint AS actions
+FROM
+    public.activity_minutes a
+WHERE
+    a.event_id = COALESCE(p_event_id, public.active_event_id())
+    AND a.bucket >= now() - make_interval(mins => p_since_minutes)
+GROUP BY
+    1, 2
+ORDER BY
+    1, 2;
+$function$;
+
+-- 新聞牆貼文反應統計 (供匯出使用)
+CREATE OR REPLACE FUNCTION public.get_post_reaction_status(p_event_id text DEFAULT NULL)
+ RETURNS TABLE(
+     id uuid,
+     topic text,
+     post_type text,
+     content text,
+     user_id uuid,
+     support_count bigint,
+     neutral_count bigint,
+     oppose_count bigint,
+     created_at timestamp with time zone
+ )
+ LANGUAGE sql
+AS $function$
+SELECT
+    p.id,
+    p.topic,
+    p.post_type,
+    p.content,
+    p.user_id,
+    COALESCE(SUM(CASE WHEN r.reaction_type = '支持' THEN 1 ELSE 0 END), 0) AS support_count,
+    COALESCE(SUM(CASE WHEN r.reaction_type = '中立' THEN 1 ELSE 0 END), 0) AS neutral_count,
+    COALESCE(SUM(CASE WHEN r.reaction_type = '反對' THEN 1 ELSE 0 END), 0) AS oppose_count,
+    p.created_at
+FROM
+    public.posts p
+LEFT JOIN
+    public.reactions r ON p.id = r.post_id AND r.event_id = p.event_id
+WHERE
+    p.event_id = COALESCE(p_event_id, public.active_event_id())
+    AND NOT p.is_hidden
+GROUP BY
+    p.id, p.topic, p.post_type, p.content, p.user_id, p.created_at
+ORDER BY
+    p.created_at DESC;
+$function$;
+
 -- 啟用所有表格的 RLS
+-- 以下 Policy 皆先移除再建立：重複執行本檔時以新版定義取代舊版 (例如改用 jwt_role() 前的 user_role() 版本)
 ALTER TABLE public.profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.suggestions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.votes ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.posts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.reactions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.vote_tally_minutes ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.events ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.activity_minutes ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.activity_totals ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.participants ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.sync_tombstones ENABLE ROW LEVEL SECURITY; -- 不設 Policy：僅 service_role (同步) 可讀取
 
 ----------------------------------------------------------------------
 -- 個資隔離
 ----------------------------------------------------------------------
 
 -- 所有人只能查看 id, username 和 role
+DROP POLICY IF EXISTS "Public can view non-sensitive profiles" ON public.profiles;
 CREATE POLICY "Public can view non-sensitive profiles"
 ON public.profiles
 FOR SELECT
 USING (TRUE);
 
+-- Access Token Hook 讀取角色用
+DROP POLICY IF EXISTS "Auth admin can read roles" ON public.profiles;
+CREATE POLICY "Auth admin can read roles"
+ON public.profiles
+AS PERMISSIVE
+FOR SELECT
+TO supabase_auth_admin
+USING (TRUE);
+
 -- 系統管理員可以查看所有欄位
+DROP POLICY IF EXISTS "System Admin full access to profiles" ON public.profiles;
 CREATE POLICY "System Admin full access to profiles"
 ON public.profiles
 FOR SELECT
-USING (public.user_role(auth.uid()) = 'system_admin');
+USING ((SELECT public.jwt_role()) = 'system_admin');
 
 -- 使用者只能更新自己的 username
+DROP POLICY IF EXISTS "Users can update their own username" ON public.profiles;
 CREATE POLICY "Users can update their own username"
 ON public.profiles
 FOR UPDATE
 USING (auth.uid() = id)
 WITH CHECK (auth.uid() = id);
 
+----------------------------------------------------------------------
+-- 活動
+----------------------------------------------------------------------
+
+-- 允許所有人查看活動列表
+DROP POLICY IF EXISTS "Public can view events" ON public.events;
+CREATE POLICY "Public can view events"
+ON public.events
+FOR SELECT
+USING (TRUE);
+
+-- 只有系統管理員可以新增或切換活動
+DROP POLICY IF EXISTS "System Admin manages events" ON public.events;
+CREATE POLICY "System Admin manages events"
+ON public.events
+FOR ALL
+USING ((SELECT public.jwt_role()) = 'system_admin')
+WITH CHECK ((SELECT public.jwt_role()) = 'system_admin');
+
 ----------------------------------------------------------------------
 -- 共創新聞牆
 ----------------------------------------------------------------------
 
 -- 允許已登入使用者插入自己的貼文
+DROP POLICY IF EXISTS "Users can insert own post" ON public.posts;
 CREATE POLICY "Users can insert own post"
 ON public.posts
 FOR INSERT
@@ -149,17 +791,31 @@ TO authenticated
 WITH CHECK (auth.uid() = user_id);
 
 -- 允許所有人查看所有貼文
+DROP POLICY IF EXISTS "Public can view all posts" ON public.posts;
 CREATE POLICY "Public can view all posts"
 ON public.posts
 FOR SELECT
 USING (TRUE);
 
 -- 允許系統管理員刪除貼文
+DROP POLICY IF EXISTS "Allow admins and moderators to delete posts" ON public.posts;
 CREATE POLICY "Allow admins and moderators to delete posts"
 ON public.posts
 FOR DELETE
 USING (
-  public.user_role(auth.uid()) IN ('system_admin', 'moderator')
+  (SELECT public.jwt_role()) IN ('system_admin', 'moderator')
+);
+
+-- 允許系統管理員/版主隱藏貼文
+DROP POLICY IF EXISTS "Allow admins and moderators to hide posts" ON public.posts;
+CREATE POLICY "Allow admins and moderators to hide posts"
+ON public.posts
+FOR UPDATE
+USING (
+  (SELECT public.jwt_role()) IN ('system_admin', 'moderator')
+)
+WITH CHECK (
+  (SELECT public.jwt_role()) IN ('system_admin', 'moderator')
 );
 
 ----------------------------------------------------------------------
@@ -167,6 +823,7 @@ USING (
 ----------------------------------------------------------------------
 
 -- 允許已登入使用者操作自己的投票 (防止刷票)
+DROP POLICY IF EXISTS "Users can upsert own vote" ON public.votes;
 CREATE POLICY "Users can upsert own vote"
 ON public.votes
 FOR ALL
@@ -175,16 +832,49 @@ USING (auth.uid() = user_id)
 WITH CHECK (auth.uid() = user_id);
 
 -- 允許所有人查看投票結果
+DROP POLICY IF EXISTS "Public can view all votes" ON public.votes;
 CREATE POLICY "Public can view all votes"
 ON public.votes
 FOR SELECT
 USING (TRUE);
 
+-- 允許所有人查看共識時間軸 (寫入僅經由觸發器)
+DROP POLICY IF EXISTS "Public can view vote tallies" ON public.vote_tally_minutes;
+CREATE POLICY "Public can view vote tallies"
+ON public.vote_tally_minutes
+FOR SELECT
+USING (TRUE);
+
+----------------------------------------------------------------------
+-- 活動數據分析 (寫入僅經由觸發器)
+----------------------------------------------------------------------
+
+-- 彙總數量不含個資，允許所有人查看
+DROP POLICY IF EXISTS "Public can view activity rollups" ON public.activity_minutes;
+CREATE POLICY "Public can view activity rollups"
+ON public.activity_minutes
+FOR SELECT
+USING (TRUE);
+
+DROP POLICY IF EXISTS "Public can view activity totals" ON public.activity_totals;
+CREATE POLICY "Public can view activity totals"
+ON public.activity_totals
+FOR SELECT
+USING (TRUE);
+
+-- 參與者名單只有管理員/版主可以查看 (人數經由 get_activity_summary 取得)
+DROP POLICY IF EXISTS "Admin/Mod can view participants" ON public.participants;
+CREATE POLICY "Admin/Mod can view participants"
+ON public.participants
+FOR SELECT
+USING ((SELECT public.jwt_role()) IN ('system_admin', 'moderator'));
+
 ----------------------------------------------------------------------
 -- React
 ----------------------------------------------------------------------
 
 -- 允許已登入使用者操作自己的 reaction
+DROP POLICY IF EXISTS "Users can upsert own reaction" ON public.reactions;
 CREATE POLICY "Users can upsert own reaction"
 ON public.reactions
 FOR ALL 
@@ -193,6 +883,7 @@ USING (auth.uid() = user_id)
 WITH CHECK (auth.uid() = user_id);
 
 -- 允許所有人查看所有反應結果
+DROP POLICY IF EXISTS "Public can view all reactions" ON public.reactions;
 CREATE POLICY "Public can view all reactions"
 ON public.reactions
 FOR SELECT
@@ -204,13 +895,15 @@ USING (TRUE);
 ----------------------------------------------------------------------
 
 -- 確保只有 Admin/Mod 才能操作 Suggestions
+DROP POLICY IF EXISTS "Admin/Mod full control over suggestions" ON public.suggestions;
 CREATE POLICY "Admin/Mod full control over suggestions"
 ON public.suggestions
 FOR ALL 
-USING (public.user_role(auth.uid()) IN ('system_admin', 'moderator'))
-WITH CHECK (public.user_role(auth.uid()) IN ('system_admin', 'moderator'));
+USING ((SELECT public.jwt_role()) IN ('system_admin', 'moderator'))
+WITH CHECK ((SELECT public.jwt_role()) IN ('system_admin', 'moderator'));
 
 -- 允許所有人查看 Suggestions
+DROP POLICY IF EXISTS "Public can view all suggestions" ON public.suggestions;
 CREATE POLICY "Public can view all suggestions"
 ON public.suggestions
 FOR SELECT
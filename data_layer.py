@@ -0,0 +1,355 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import streamlit as st
+from supabase import Client
+
+from shared_cache import get_shared_cache
+from storage import create_storage_client
+
+# --- 參數設定 ---
+DEFAULT_MAX_AGE = 2.0       # 秒；超過即在背景重新整理，期間先回傳舊快照
+DEFAULT_REFRESH_INTERVAL = 5.0  # 秒；背景排程固定更新熱門資料的間隔
+IDLE_TIMEOUT = 300.0        # 秒；超過此時間無人讀取即暫停排程更新
+WRITE_WAIT_TIMEOUT = 2.0    # 秒；寫入者等待新快照的上限
+COLD_START_TIMEOUT = 15.0   # 秒；尚無快照時，其他 Session 等待首次讀取的上限
+FAILURE_THRESHOLD = 3       # 連續失敗幾次後斷路
+RESET_TIMEOUT = 30.0        # 斷路後多久允許一次試探請求
+SHARED_LOCK_TTL = 10.0      # 秒；副本取得查詢權後的最長持有時間
+SHARED_SNAPSHOT_TTL = 600.0  # 秒；共用快照無人更新時的保留時間
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snapshot-refresh")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """某一時間點的資料快照；value 由讀取端自行複製後再修改"""
+    value: Any
+    fetched_at: datetime.datetime | None
+    error: str | None = None
+    generation: int = 0
+
+    @property
+    def is_empty(self):
+        return self.value is None
+
+    def age(self):
+        if self.fetched_at is None:
+            return float('inf')
+        return (datetime.datetime.now(datetime.timezone.utc) - self.fetched_at).total_seconds()
+
+
+class CircuitBreaker:
+    """連續失敗達門檻即斷路，一段時間後放行一次試探 (half-open)"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class SnapshotReader:
+    """
+    Stale-while-revalidate 讀取器：
+    有快照就立即回傳，過期時交給背景更新；每次成功讀取都發布一份新的不可變快照 (generation + 1)。
+    設定共用快取 (shared) 時，各副本先沿用其他副本剛取得的快照，同一時間只有一個副本實際查詢。
+    """
+
+    def __init__(self, name, fetcher, max_age=DEFAULT_MAX_AGE, breaker=None, refresh_interval=None, shared=None):
+        self.name = name
+        self.fetcher = fetcher
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.breaker = breaker or CircuitBreaker()
+        self.shared = shared
+        self._snapshot = Snapshot(value=None, fetched_at=None)
+        self._cond = threading.Condition()
+        self._refreshing = False
+        self._rerun_requested = False
+        self._invalidated_at = None
+        self.last_read = time.monotonic()
+        if shared is not None:
+            try:
+                shared.subscribe(self._channel, lambda _message: self.adopt_shared())
+            except Exception:
+                pass  # 收不到通知時仍會在每次更新前檢查共用快照
+
+    @property
+    def _channel(self):
+        return f"snapshot:{self.name}"
+
+    def refresh(self, force=False):
+        """
+        執行一次讀取並發布新快照；失敗時保留舊快照並記錄錯誤。
+        force (寫入後) 時不沿用共用快照，也不等待其他副本。
+        """
+        try:
+            claim = self._claim(force)
+            if claim != 'skip':
+                self._fetch(holding_lock=claim == 'locked')
+        finally:
+            with self._cond:
+                rerun, self._rerun_requested = self._rerun_requested, False
+                self._refreshing = rerun
+            if rerun:
+                _executor.submit(self.refresh, True)
+        return self._snapshot
+
+    def _claim(self, force):
+        # 'skip'：已沿用共用快照或其他副本正在查詢；'locked'：取得查詢權；'fetch'：直接查詢
+        if self.shared is None or force:
+            return 'fetch'
+        try:
+            if self.adopt_shared(max_age=self.refresh_interval or self.max_age):
+                return 'skip'
+            if self.shared.acquire(self._channel, SHARED_LOCK_TTL):
+                return 'locked'
+        except Exception:
+            return 'fetch'  # 共用快取無法使用時退回各自查詢
+        # 尚無任何資料時不等待其他副本
+        return 'fetch' if self._snapshot.is_empty else 'skip'
+
+    def _fetch(self, holding_lock=False):
+        if not self.breaker.allow_request():
+            self._publish_error("資料來源暫時斷路中")
+            return
+        try:
+            value = self.fetcher()
+        except Exception as e:
+            self.breaker.record_failure()
+            self._publish_error(str(e))
+        else:
+            self.breaker.record_success()
+            fetched_at = datetime.datetime.now(datetime.timezone.utc)
+            self._publish(value, fetched_at)
+            self._share(value, fetched_at)
+        finally:
+            if holding_lock:
+                try:
+                    self.shared.release(self._channel)
+                except Exception:
+                    pass
+
+    def _publish(self, value, fetched_at):
+        with self._cond:
+            self._snapshot = Snapshot(
+                value=value,
+                fetched_at=fetched_at,
+                generation=self._snapshot.generation + 1,
+            )
+            self._cond.notify_all()
+
+    def _share(self, value, fetched_at):
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(self._channel, (value, fetched_at), ttl=SHARED_SNAPSHOT_TTL)
+            self.shared.publish(self._channel)
+        except Exception:
+            pass  # 其他副本會自行查詢
+
+    def adopt_shared(self, max_age=None):
+        """
+        其他副本的快照較新時改用之；回傳目前快照是否在 max_age 秒內。
+        寫入後尚未重新查詢前，不沿用早於寫入時間的快照。
+        """
+        try:
+            shared = self.shared.get(self._channel) if self.shared is not None else None
+        except Exception:
+            shared = None
+        if shared is not None:
+            value, fetched_at = shared
+            with self._cond:
+                current = self._snapshot.fetched_at
+                newer = current is None or fetched_at > current
+                after_write = self._invalidated_at is None or fetched_at >= self._invalidated_at
+                if newer and after_write:
+                    self._snapshot = Snapshot(
+                        value=value, fetched_at=fetched_at,
+                        generation=self._snapshot.generation + 1,
+                    )
+                    self._cond.notify_all()
+        return max_age is None or self._snapshot.age() <= max_age
+
+    def _publish_error(self, message):
+        with self._cond:
+            current = self._snapshot
+            self._snapshot = Snapshot(
+                value=current.value, fetched_at=current.fetched_at,
+                error=message, generation=current.generation,
+            )
+            self._cond.notify_all()
+
+    def refresh_in_background(self):
+        with self._cond:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        _executor.submit(self.refresh)
+
+    def get(self, min_generation=None, timeout=WRITE_WAIT_TIMEOUT):
+        """
+        回傳目前快照，不阻塞。
+        僅在尚無任何資料，或呼叫端剛寫入 (min_generation) 時，最多等待 timeout 秒取得新快照。
+        """
+        self.last_read = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot.is_empty:
+            return self._first_load(snapshot)
+        if min_generation is not None and snapshot.generation < min_generation:
+            self.refresh_in_background()
+            with self._cond:
+                self._cond.wait_for(lambda: self._snapshot.generation >= min_generation, timeout=timeout)
+            return self._snapshot
+        if self.refresh_interval is None and snapshot.age() > self.max_age:
+            self.refresh_in_background()
+        return snapshot
+
+    def _first_load(self, snapshot):
+        # 冷啟動時只由第一個 Session 查詢，其餘等待同一次結果 (成功或失敗)，不同時湧向 Supabase
+        with self._cond:
+            leader = not self._refreshing
+            if leader:
+                self._refreshing = True
+        if leader:
+            return self.refresh()
+        with self._cond:
+            self._cond.wait_for(lambda: self._snapshot is not snapshot, timeout=COLD_START_TIMEOUT)
+        return self._snapshot
+
+    def peek(self):
+        """只讀取目前快照，不觸發任何查詢"""
+        return self._snapshot
+
+    def invalidate(self):
+        """
+        寫入後呼叫：立即排入背景更新，並回傳寫入者應等待的 generation。
+        其他使用者不受影響，仍讀取現有快照直到新快照發布。
+        """
+        with self._cond:
+            self._invalidated_at = datetime.datetime.now(datetime.timezone.utc)
+            if self._refreshing:
+                # 進行中的查詢可能早於這次寫入，需再多等一輪
+                self._rerun_requested = True
+                return self._snapshot.generation + 2
+            self._refreshing = True
+            target = self._snapshot.generation + 1
+        _executor.submit(self.refresh, True)
+        return target
+
+
+class BackgroundRefresher:
+    """整個程序唯一的排程執行緒，定期讓已註冊的熱門資料保持最新"""
+
+    def __init__(self):
+        self._readers = {}
+        self._next_due = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def register(self, reader):
+        with self._lock:
+            self._readers[reader.name] = reader
+            self._next_due[reader.name] = time.monotonic() + reader.refresh_interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                readers = list(self._readers.values())
+            next_wake = now + DEFAULT_REFRESH_INTERVAL
+            for reader in readers:
+                due = self._next_due.get(reader.name, now)
+                if due <= now:
+                    # 無人讀取時暫停，避免空轉查詢
+                    if now - reader.last_read <= IDLE_TIMEOUT:
+                        reader.refresh_in_background()
+                    due = now + reader.refresh_interval
+                    with self._lock:
+                        self._next_due[reader.name] = due
+                next_wake = min(next_wake, due)
+            self._wake.wait(timeout=max(0.05, next_wake - time.monotonic()))
+            self._wake.clear()
+
+
+_refresher = BackgroundRefresher()
+
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def get_reader(name, fetcher, max_age=DEFAULT_MAX_AGE, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+    """
+    取得 (或建立) 整個程序共用的讀取器。
+    refresh_interval 不為 None 時交由背景排程定期更新，頁面讀取永遠不需等待查詢。
+    有設定 [cache] 時快照也透過共用快取與其他副本交換 (見 shared_cache.py)。
+    """
+    with _readers_lock:
+        if name not in _readers:
+            reader = SnapshotReader(
+                name, fetcher, max_age=max_age, refresh_interval=refresh_interval,
+                shared=get_shared_cache(),
+            )
+            _readers[name] = reader
+            if refresh_interval is not None:
+                _refresher.register(reader)
+        return _readers[name]
+
+
+def invalidate_reader(name):
+    """要求名為 name 的讀取器 (若已建立) 提早更新；供其他頁面的寫入使用"""
+    with _readers_lock:
+        reader = _readers.get(name)
+    return reader.invalidate() if reader is not None else None
+
+
+@st.cache_resource
+def get_read_client() -> Client:
+    """供背景讀取使用的匿名連線 (不綁定任何使用者 Session)"""
+    try:
+        return create_storage_client(st.secrets)
+    except Exception:
+        return None
+
+
+def format_snapshot_time(snapshot, tz):
+    """快照時間 (HH:MM:SS)，尚無資料時回傳 '--:--:--'"""
+    if snapshot.fetched_at is None:
+        return "--:--:--"
+    return snapshot.fetched_at.astimezone(tz).strftime('%H:%M:%S')
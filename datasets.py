@@ -0,0 +1,221 @@
+"""
+議題參考資料頁的資料集登錄表。
+
+每個資料集以一個 dict 宣告：檔案、需讀取的欄位與型別、民國年轉換、melt / 彙總方式、圖表與表格設定。
+新增政府開放資料只需在 DATASETS 增加一筆，頁面會依序呈現；
+讀取時只載入宣告的欄位，整理後的結果依檔案修改時間快取。
+宣告 'stream' 的資料集若放有完整的逐筆資料檔，圖表改用 stream_agg 分塊彙總的結果。
+"""
+import os
+
+import streamlit as st
+
+from cleaning_utils import minguo_date_years, minguo_years, read_csv_typed, strip_unit
+from stream_agg import PIPELINES
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DATASETS = {
+    'hotspots': {
+        'file': "iTaiwan_spots.csv",
+        'columns': ['地區'],
+        'column_patterns': ['熱點數量'],
+        'dtype': {'地區': 'string'},
+        'melt': {
+            'id_vars': ['地區'],
+            'value_patterns': ['熱點數量'],
+            'var_name': '年度',
+            'value_name': '熱點數量',
+            'var_strip': '年(熱點數量)',
+            'rows': {'column': '地區', 'in': ['北部區域', '中部區域', '南部區域', '東部區域', '離島區域']},
+        },
+        'stream': {'file': "iTaiwan_hotspot_records.csv", 'pipeline': 'hotspots', 'frame': 'melt'},
+        'header': "資訊與社會防護｜數位基礎建設：iTaiwan 熱點覆蓋趨勢",
+        'caption': "數據來源：iTaiwan熱點數。圖表顯示五大區域熱點數量隨西元年的變化。",
+        'chart': {
+            'kind': 'line', 'frame': 'melt', 'x': '年度', 'y': '熱點數量', 'color': '地區',
+            'title': 'iTaiwan 熱點數量分區域趨勢', 'x_title': "年度 (西元)", 'y_title': "熱點數量",
+        },
+        'table': {
+            'expander': "查看原始數據：iTaiwan 熱點數",
+            'rows': {'column': '地區', 'not_in': ['臺閩地區', '臺灣地區']},
+        },
+    },
+    'talent': {
+        'file': "AI_Talent.csv",
+        'columns': ['年度', '樂觀推估新增專才人數', '持平推估新增專才人數', '保守推估新增專才人數'],
+        'dtype': {'年度': 'int64', '樂觀推估新增專才人數': 'int64', '持平推估新增專才人數': 'int64', '保守推估新增專才人數': 'int64'},
+        'melt': {
+            'id_vars': ['年度'],
+            'value_vars': ['樂觀推估新增專才人數', '持平推估新增專才人數', '保守推估新增專才人數'],
+            'var_name': '推估情境',
+            'value_name': '新增專才人數',
+        },
+        'header': "勞動及產業轉型｜人才需求：AI 專才新增人數推估",
+        'caption': "數據來源：AI專才推估。圖表呈現三種不同情境下，AI 專才新增人數隨西元年的推估趨勢。",
+        'chart': {
+            'kind': 'line', 'frame': 'melt', 'x': '年度', 'y': '新增專才人數', 'color': '推估情境',
+            'title': 'AI 專才新增人數推估趨勢', 'x_title': "年度 (西元)", 'y_title': "新增專才人數",
+        },
+        'table': {'expander': "查看原始數據：專才推估"},
+    },
+    'courses': {
+        'file': "AIGO_OnlineCourse.csv",
+        'columns': ['年度', '合作單位', '課程名稱', '時數', '網址'],
+        'dtype': {'年度': 'int64', '合作單位': 'string', '課程名稱': 'string', '網址': 'string'},
+        'minguo_years': {'年度': '年度_西元'},
+        'numbers': {'時數': ('時數_num', 'hr')},
+        'header': "全民AI識能與教育：AIGO 自製線上課程總覽",
+        'caption': "資料來源：政府開放資料平台，最新資訊請看AIGO網站。圖表顯示各年課程總時數。經濟部另提供中小企業線上課程，請看本頁最上方連結區域。",
+        'table': {
+            'subheader': "完整課程列表 (含連結)",
+            'columns': ['年度_西元', '合作單位', '課程名稱', '時數', '網址'],
+            'rename': {'年度_西元': '年度'},
+        },
+    },
+    'grant': {
+        'file': "AI_Grant.csv",
+        'columns': ['補助計畫', '發布日期', '主辦單位', '補助對象', '簡介與補助範疇'],
+        'dtype': {'補助計畫': 'string', '發布日期': 'string', '主辦單位': 'string', '補助對象': 'string', '簡介與補助範疇': 'string'},
+        'minguo_dates': {'發布日期': '發布年份_西元'},
+        'header': "相關補助計畫列表",
+        'caption': "資料來源：行政院智慧國家2.0推動小組。",
+        'table': {'columns': ['補助計畫', '發布日期', '主辦單位', '補助對象', '簡介與補助範疇']},
+    },
+    'corpus': {
+        'file': "corpus_collect.csv",
+        'columns': ['年度', '區域', '縣市別代碼', '採集數'],
+        'dtype': {'年度': 'int64', '區域': 'string', '縣市別代碼': 'string', '採集數': 'float64'},
+        'minguo_years': {'年度': '年度_西元'},
+        'aggregate': {'by': '年度_西元', 'value': '採集數', 'func': 'sum'},
+        'stream': {'file': "corpus_collect_full.csv", 'pipeline': 'corpus', 'frame': 'aggregate'},
+        'header': "文化：全國語言推廣人員工作成果語料採集與紀錄則數統計",
+        'caption': "資料來源：原民會開放資料",
+        'chart': {
+            'kind': 'line', 'frame': 'aggregate', 'x': '年度_西元', 'y': '採集數',
+            'title': '語料庫採集數年度趨勢', 'x_title': "年度", 'y_title': "總採集數",
+        },
+        'table': {'expander': "查看原始數據：語料庫採集數", 'rename': {'年度_西元': '年度(西元）'}},
+    },
+}
+
+
+# --- 讀取與整理 ---
+
+def _usecols(spec):
+    columns = set(spec.get('columns', []))
+    patterns = spec.get('column_patterns', [])
+    return lambda c: c in columns or any(p in c for p in patterns)
+
+
+def _select_rows(df, rule):
+    if not rule:
+        return df
+    mask = df[rule['column']].isin(rule.get('in') or rule.get('not_in'))
+    return df[mask] if 'in' in rule else df[~mask]
+
+
+def _prepare(spec, path):
+    df = read_csv_typed(path, usecols=_usecols(spec), dtype=spec.get('dtype'))
+
+    for source, target in spec.get('minguo_years', {}).items():
+        df[target] = minguo_years(df[source])
+    for source, target in spec.get('minguo_dates', {}).items():
+        df[target] = minguo_date_years(df[source])
+    for source, (target, suffix) in spec.get('numbers', {}).items():
+        df[target] = strip_unit(df[source], suffix)
+
+    frames = {'raw': df}
+
+    melt = spec.get('melt')
+    if melt:
+        value_vars = melt.get('value_vars') or [c for c in df.columns if any(p in c for p in melt['value_patterns'])]
+        df_melt = _select_rows(df, melt.get('rows')).melt(
+            id_vars=melt['id_vars'], value_vars=value_vars,
+            var_name=melt['var_name'], value_name=melt['value_name'],
+        )
+        if melt.get('var_strip'):
+            df_melt[melt['var_name']] = df_melt[melt['var_name']].str.replace(melt['var_strip'], '', regex=False).astype(int)
+        frames['melt'] = df_melt
+
+    aggregate = spec.get('aggregate')
+    if aggregate:
+        frames['aggregate'] = df.groupby(aggregate['by'], as_index=False)[aggregate['value']].agg(aggregate['func'])
+
+    return frames
+
+
+def _mtime(filename):
+    path = os.path.join(DATA_DIR, filename)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+@st.cache_data(show_spinner=False)
+def _load(name, mtime, stream_mtime=None):
+    spec = DATASETS[name]
+    frames = _prepare(spec, os.path.join(DATA_DIR, spec['file']))
+    if stream_mtime is not None:
+        stream = spec['stream']
+        frames[stream['frame']] = PIPELINES[stream['pipeline']](os.path.join(DATA_DIR, stream['file']))
+    return frames
+
+
+def load_dataset(name):
+    """回傳 {'raw': df, 'melt': df, 'aggregate': df} (依宣告而定)；檔案不存在時回傳 None"""
+    spec = DATASETS[name]
+    mtime = _mtime(spec['file'])
+    if mtime is None:
+        return None
+    stream_mtime = _mtime(spec['stream']['file']) if spec.get('stream') else None
+    return _load(name, mtime, stream_mtime)
+
+
+# --- 呈現 ---
+
+def render_chart(chart, frames):
+    import plotly.express as px
+
+    df = frames[chart['frame']].copy()
+    df[chart['x']] = df[chart['x']].astype(str)
+    plot = px.bar if chart['kind'] == 'bar' else px.line
+    kwargs = {'markers': True} if chart['kind'] == 'line' else {'text_auto': True}
+    fig = plot(
+        df, x=chart['x'], y=chart['y'], color=chart.get('color'), title=chart['title'],
+        category_orders={chart['x']: sorted(df[chart['x']].unique())}, **kwargs,
+    )
+    fig.update_layout(xaxis_title=chart['x_title'], yaxis_title=chart['y_title'], xaxis_type='category')
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def _table_frame(table, df):
+    df = _select_rows(df, table.get('rows'))
+    if table.get('columns'):
+        df = df[table['columns']]
+    return df.rename(columns=table.get('rename', {}))
+
+
+def render_dataset(name):
+    """依登錄表呈現一個資料集：標題、說明、圖表與資料表"""
+    spec = DATASETS[name]
+    st.header(spec['header'])
+    if spec.get('caption'):
+        st.caption(spec['caption'])
+
+    frames = load_dataset(name)
+    if frames is None:
+        st.error(f"無法載入數據：請確認 {spec['file']} 已正確放置在專案根目錄。")
+        return
+
+    if spec.get('chart'):
+        render_chart(spec['chart'], frames)
+
+    table = spec.get('table')
+    if table:
+        df_display = _table_frame(table, frames['raw'])
+        if table.get('subheader'):
+            st.subheader(table['subheader'])
+        if table.get('expander'):
+            with st.expander(table['expander']):
+                st.dataframe(df_display, use_container_width=True, hide_index=True)
+        else:
+            st.dataframe(df_display, use_container_width=True, hide_index=True)
@@ -0,0 +1,117 @@
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+
+# --- 參數設定 ---
+NGRAM_SIZE = 2            # 中文以字元 bigram 切分，不需斷詞
+NUM_PERM = 64             # MinHash 簽章長度
+NUM_BANDS = 16            # LSH 分段數 (每段 4 列)，約在 Jaccard 0.5 以上開始命中
+DUPLICATE_THRESHOLD = 0.6 # 視為「相似建議」的 Jaccard 門檻
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(2025)
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+
+_STRIP_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+# --- 文字前處理 ---
+
+def normalize_text(text):
+    """全形轉半形、轉小寫並移除空白與標點，讓排版差異不影響比對"""
+    text = unicodedata.normalize("NFKC", str(text or "")).lower()
+    return _STRIP_PATTERN.sub("", text)
+
+
+def char_ngrams(text, n=NGRAM_SIZE):
+    """將正規化後的文字切成字元 n-gram 集合"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def minhash_signature(shingles):
+    """計算 n-gram 集合的 MinHash 簽章"""
+    if not shingles:
+        return np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.int64)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") % _MERSENNE_PRIME
+         for s in shingles),
+        dtype=np.int64,
+        count=len(shingles),
+    )
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+# --- 相似建議索引 ---
+
+class SuggestionDedupIndex:
+    """
+    以 MinHash + LSH 建立的記憶體索引。
+    查詢時只比對同一個 LSH 桶內的候選，再以精確 Jaccard 確認。
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._rows_per_band = NUM_PERM // NUM_BANDS
+        self._buckets = [dict() for _ in range(NUM_BANDS)]
+        self._shingles = {}
+        self._contents = {}
+        self._exact = {}
+
+    def __len__(self):
+        return len(self._contents)
+
+    def _band_keys(self, signature):
+        r = self._rows_per_band
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(NUM_BANDS)]
+
+    def add(self, item_id, content):
+        """加入一筆既有建議"""
+        normalized = normalize_text(content)
+        shingles = char_ngrams(normalized)
+        self._shingles[item_id] = shingles
+        self._contents[item_id] = content
+        self._exact.setdefault(normalized, item_id)
+        for band, key in zip(self._buckets, self._band_keys(minhash_signature(shingles))):
+            band.setdefault(key, []).append(item_id)
+
+    def find_duplicates(self, content, limit=3):
+        """回傳 [(id, 內容, 相似度), ...]，依相似度由高到低排序"""
+        normalized = normalize_text(content)
+        if not normalized:
+            return []
+
+        exact_id = self._exact.get(normalized)
+        if exact_id is not None:
+            return [(exact_id, self._contents[exact_id], 1.0)]
+
+        shingles = char_ngrams(normalized)
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(minhash_signature(shingles))):
+            candidates.update(band.get(key, ()))
+
+        matches = []
+        for item_id in candidates:
+            score = jaccard(shingles, self._shingles[item_id])
+            if score >= self.threshold:
+                matches.append((item_id, self._contents[item_id], round(score, 3)))
+        matches.sort(key=lambda m: m[2], reverse=True)
+        return matches[:limit]
+
+
+def build_index(items, threshold=DUPLICATE_THRESHOLD):
+    """由 (id, content) 序列建立索引"""
+    index = SuggestionDedupIndex(threshold)
+    for item_id, content in items:
+        index.add(item_id, content)
+    return index
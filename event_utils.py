@@ -0,0 +1,21 @@
+"""
+多場活動共用同一個資料庫：所有頁面的查詢與寫入都限定在目前的活動 (event_id)。
+
+下一場會議只需在 events 表新增一筆並在 secrets 設定：
+
+    [event]
+    id = "lt26"
+
+頁面與匯出工具 (export_data.py) 皆以此設定為準；資料庫的 events.is_active 只是未指定 event_id 時的預設值，
+請與 secrets 設為同一場活動。
+"""
+
+DEFAULT_EVENT_ID = "lt25"
+
+
+def active_event_id(secrets=None):
+    """secrets 中 [event] id 的值；未設定時為 DEFAULT_EVENT_ID"""
+    try:
+        return secrets.get("event", {}).get("id") or DEFAULT_EVENT_ID
+    except Exception:
+        return DEFAULT_EVENT_ID
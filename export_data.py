@@ -0,0 +1,157 @@
+"""
+活動資料匯出 (建議統計、貼文反應統計、原始投票與反應)。
+
+以 range 分頁逐批讀取 Supabase，邊讀邊寫，記憶體用量只與分頁大小有關。
+可在管理員後台使用，也可直接於命令列執行：
+
+    python export_data.py suggestions --format csv --output suggestions.csv
+    python export_data.py votes --format parquet --output votes.parquet
+    python export_data.py posts --event lt25
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+
+DEFAULT_PAGE_SIZE = 1000
+FORMATS = ['csv', 'jsonl', 'parquet']
+
+# 資料集名稱 -> (來源類型, 表名/RPC 名稱, 排序欄位)
+EXPORTS = {
+    'suggestions': ('rpc', 'get_suggestion_status', 'created_at'),
+    'posts': ('rpc', 'get_post_reaction_status', 'created_at'),
+    'votes': ('table', 'votes', 'id'),
+    'reactions': ('table', 'reactions', 'id'),
+}
+
+
+# --- 分頁讀取 ---
+
+def iter_pages(client, dataset, page_size=DEFAULT_PAGE_SIZE, event_id=None):
+    """逐頁產生資料列 (list[dict])，每次只保留一頁在記憶體中；event_id 為 None 時 RPC 使用進行中的活動、原始表匯出全部活動"""
+    if dataset not in EXPORTS:
+        raise ValueError(f"未知的資料集: {dataset}")
+    kind, name, order_col = EXPORTS[dataset]
+
+    start = 0
+    while True:
+        if kind == 'rpc':
+            query = client.rpc(name, {'p_event_id': event_id})
+        else:
+            query = client.table(name).select("*")
+            if event_id is not None:
+                query = query.eq('event_id', event_id)
+        # 以 id 作為次要排序，避免同一時間戳記的資料在分頁間重複或遺漏
+        if order_col != 'id':
+            query = query.order(order_col).order('id')
+        else:
+            query = query.order('id')
+        response = query.range(start, start + page_size - 1).execute()
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            break
+        start += page_size
+
+
+# --- 寫出 ---
+
+def _write_csv(pages, fp):
+    text_fp = io.TextIOWrapper(fp, encoding='utf-8-sig', newline='')
+    writer = None
+    for rows in pages:
+        if writer is None:
+            writer = csv.DictWriter(text_fp, fieldnames=list(rows[0].keys()), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerows(rows)
+    text_fp.flush()
+    text_fp.detach()
+
+
+def _write_jsonl(pages, fp):
+    for rows in pages:
+        fp.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode('utf-8'))
+
+
+def _write_parquet(pages, fp):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet 匯出需要安裝 pyarrow：pip install pyarrow")
+
+    writer = None
+    try:
+        for rows in pages:
+            table = pa.Table.from_pylist(rows)
+            if writer is None:
+                writer = pq.ParquetWriter(fp, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+
+def export_dataset(client, dataset, fmt, fp, page_size=DEFAULT_PAGE_SIZE, event_id=None):
+    """將資料集串流寫入二進位檔案物件 fp，回傳 (筆數, 秒數)"""
+    if fmt not in WRITERS:
+        raise ValueError(f"不支援的格式: {fmt}")
+
+    stats = {'rows': 0}
+
+    def counted(pages):
+        for rows in pages:
+            stats['rows'] += len(rows)
+            yield rows
+
+    started = time.perf_counter()
+    WRITERS[fmt](counted(iter_pages(client, dataset, page_size, event_id)), fp)
+    return stats['rows'], time.perf_counter() - started
+
+
+# --- 命令列 ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="匯出活動資料 (供政策報告使用)")
+    parser.add_argument('dataset', choices=list(EXPORTS))
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--output', help="輸出檔案路徑，預設為 <dataset>.<format>")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--sqlite', help="改從本機離線資料庫 (SQLite 檔案) 匯出")
+    parser.add_argument('--event', help="活動代號 (events.id)，預設與頁面相同 (secrets 的 [event] id)")
+    args = parser.parse_args(argv)
+
+    from event_utils import active_event_id
+    from storage import load_cli_secrets
+    event_id = args.event or active_event_id(load_cli_secrets())
+
+    if args.sqlite:
+        from local_store import create_local_client
+        client = create_local_client(args.sqlite)
+    else:
+        from storage import load_cli_credentials
+        url, key = load_cli_credentials()
+        if not url or not key:
+            print("找不到 Supabase 連線設定：請設定 SUPABASE_URL 與 SUPABASE_SERVICE_ROLE_KEY。", file=sys.stderr)
+            return 1
+
+        from supabase import create_client
+        client = create_client(url, key)
+
+    output = args.output or f"{args.dataset}.{args.format}"
+    with open(output, 'wb') as fp:
+        rows, seconds = export_dataset(client, args.dataset, args.format, fp, args.page_size, event_id)
+    print(f"已匯出活動 {event_id} 的 {rows} 筆 {args.dataset} 至 {output} ({seconds:.1f} 秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,809 @@
+"""
+離線 / 本機優先模式的 SQLite 儲存後端。
+
+提供與 supabase-py 相同寫法的 table(...) / rpc(...) 查詢介面，讓各頁面不需修改即可在
+場地網路或 Supabase 無法使用時，以一台筆電上的 SQLite 檔案支撐整場活動，會後再同步回 Supabase。
+
+注意：本機模式沒有 RLS，權限僅由各頁面的角色檢查把關。
+"""
+import hashlib
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from event_utils import DEFAULT_EVENT_ID
+
+DEFAULT_DB_PATH = "lt25_local.db"
+
+_NOW_SQL = "(strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))"
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS users (
+  id TEXT PRIMARY KEY,
+  email TEXT NOT NULL UNIQUE,
+  password_hash TEXT NULL,
+  created_at TEXT NOT NULL DEFAULT {_NOW_SQL}
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+  id TEXT PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+  role TEXT NOT NULL DEFAULT 'user',
+  username TEXT NULL,
+  email TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS events (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL,
+  is_active INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT {_NOW_SQL}
+);
+
+INSERT OR IGNORE INTO events (id, name, is_active) VALUES ('{DEFAULT_EVENT_ID}', '{DEFAULT_EVENT_ID}', 1);
+
+CREATE TABLE IF NOT EXISTS suggestions (
+  id TEXT PRIMARY KEY,
+  event_id TEXT NOT NULL DEFAULT '{DEFAULT_EVENT_ID}' REFERENCES events (id),
+  content TEXT NOT NULL,
+  cate TEXT NULL,
+  is_hidden INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  updated_at TEXT NOT NULL DEFAULT {_NOW_SQL}
+);
+
+CREATE TABLE IF NOT EXISTS votes (
+  id TEXT PRIMARY KEY,
+  event_id TEXT NOT NULL DEFAULT '{DEFAULT_EVENT_ID}' REFERENCES events (id),
+  suggestion_id TEXT NOT NULL REFERENCES suggestions (id) ON DELETE CASCADE,
+  user_id TEXT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+  vote_type TEXT NOT NULL,
+  created_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  updated_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  CONSTRAINT unique_vote UNIQUE (suggestion_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS vote_tally_minutes (
+  bucket TEXT NOT NULL,
+  suggestion_id TEXT NOT NULL,
+  vote_type TEXT NOT NULL,
+  delta INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, suggestion_id, vote_type)
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+  id TEXT PRIMARY KEY,
+  event_id TEXT NOT NULL DEFAULT '{DEFAULT_EVENT_ID}' REFERENCES events (id),
+  user_id TEXT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  post_type TEXT NOT NULL,
+  content TEXT NOT NULL,
+  is_hidden INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  updated_at TEXT NOT NULL DEFAULT {_NOW_SQL}
+);
+
+CREATE TABLE IF NOT EXISTS reactions (
+  id TEXT PRIMARY KEY,
+  event_id TEXT NOT NULL DEFAULT '{DEFAULT_EVENT_ID}' REFERENCES events (id),
+  post_id TEXT NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+  user_id TEXT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+  reaction_type TEXT NOT NULL,
+  created_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  updated_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  CONSTRAINT unique_reaction UNIQUE (post_id, user_id)
+);
+
+-- 同步用：刪除紀錄與游標
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+  table_name TEXT NOT NULL,
+  row_id TEXT NOT NULL,
+  deleted_at TEXT NOT NULL DEFAULT {_NOW_SQL},
+  PRIMARY KEY (table_name, row_id)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+  key TEXT PRIMARY KEY,
+  value TEXT NULL
+);
+
+-- 活動數據分析 (與 dashboard.sql 相同，由觸發器維護)
+CREATE TABLE IF NOT EXISTS activity_minutes (
+  event_id TEXT NOT NULL,
+  bucket TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  dimension TEXT NOT NULL,
+  actions INTEGER NOT NULL DEFAULT 0,
+  delta INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, bucket, metric, dimension)
+);
+
+CREATE TABLE IF NOT EXISTS activity_totals (
+  event_id TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  dimension TEXT NOT NULL,
+  total INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (event_id, metric, dimension)
+);
+
+CREATE TABLE IF NOT EXISTS participants (
+  event_id TEXT NOT NULL,
+  user_id TEXT NOT NULL,
+  metric TEXT NOT NULL,
+  first_seen TEXT NOT NULL DEFAULT {_NOW_SQL},
+  last_seen TEXT NOT NULL DEFAULT {_NOW_SQL},
+  PRIMARY KEY (event_id, metric, user_id)
+);
+
+-- 索引：對應各頁面的排序與篩選
+DROP INDEX IF EXISTS idx_suggestions_created_at;
+DROP INDEX IF EXISTS idx_posts_created_at;
+CREATE INDEX IF NOT EXISTS idx_suggestions_event_created ON suggestions (event_id, created_at DESC) WHERE is_hidden = 0;
+CREATE INDEX IF NOT EXISTS idx_suggestions_event_hidden ON suggestions (event_id) WHERE is_hidden = 1;
+CREATE INDEX IF NOT EXISTS idx_votes_suggestion ON votes (suggestion_id, vote_type);
+CREATE INDEX IF NOT EXISTS idx_votes_event ON votes (event_id, suggestion_id);
+CREATE INDEX IF NOT EXISTS idx_posts_event_created ON posts (event_id, created_at DESC) WHERE is_hidden = 0;
+CREATE INDEX IF NOT EXISTS idx_posts_event_hidden ON posts (event_id) WHERE is_hidden = 1;
+CREATE INDEX IF NOT EXISTS idx_reactions_post ON reactions (post_id, reaction_type);
+CREATE INDEX IF NOT EXISTS idx_reactions_event ON reactions (event_id, post_id);
+CREATE INDEX IF NOT EXISTS idx_tally_suggestion ON vote_tally_minutes (suggestion_id, bucket);
+CREATE INDEX IF NOT EXISTS idx_suggestions_updated_at ON suggestions (updated_at);
+CREATE INDEX IF NOT EXISTS idx_votes_updated_at ON votes (updated_at);
+CREATE INDEX IF NOT EXISTS idx_posts_updated_at ON posts (updated_at);
+CREATE INDEX IF NOT EXISTS idx_reactions_updated_at ON reactions (updated_at);
+
+-- 觸發器：與 dashboard.sql 相同的每分鐘投票增減量
+CREATE TRIGGER IF NOT EXISTS on_vote_inserted_tally
+AFTER INSERT ON votes
+FOR EACH ROW
+BEGIN
+  INSERT INTO vote_tally_minutes (bucket, suggestion_id, vote_type, delta)
+  VALUES (strftime('%Y-%m-%dT%H:%M:00+00:00', 'now'), NEW.suggestion_id, NEW.vote_type, 1)
+  ON CONFLICT (bucket, suggestion_id, vote_type) DO UPDATE SET delta = delta + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS on_vote_changed_tally
+AFTER UPDATE OF vote_type ON votes
+FOR EACH ROW WHEN OLD.vote_type IS NOT NEW.vote_type
+BEGIN
+  INSERT INTO vote_tally_minutes (bucket, suggestion_id, vote_type, delta)
+  VALUES (strftime('%Y-%m-%dT%H:%M:00+00:00', 'now'), OLD.suggestion_id, OLD.vote_type, -1)
+  ON CONFLICT (bucket, suggestion_id, vote_type) DO UPDATE SET delta = delta - 1;
+  INSERT INTO vote_tally_minutes (bucket, suggestion_id, vote_type, delta)
+  VALUES (strftime('%Y-%m-%dT%H:%M:00+00:00', 'now'), NEW.suggestion_id, NEW.vote_type, 1)
+  ON CONFLICT (bucket, suggestion_id, vote_type) DO UPDATE SET delta = delta + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS on_vote_deleted_tally
+AFTER DELETE ON votes
+FOR EACH ROW
+BEGIN
+  INSERT INTO vote_tally_minutes (bucket, suggestion_id, vote_type, delta)
+  VALUES (strftime('%Y-%m-%dT%H:%M:00+00:00', 'now'), OLD.suggestion_id, OLD.vote_type, -1)
+  ON CONFLICT (bucket, suggestion_id, vote_type) DO UPDATE SET delta = delta - 1;
+END;
+
+DROP TRIGGER IF EXISTS on_vote_updated;
+
+-- 與 dashboard.sql 的 inherit_event_id 相同：投票與反應沿用上層資料的活動
+CREATE TRIGGER IF NOT EXISTS on_vote_event
+AFTER INSERT ON votes
+FOR EACH ROW WHEN NEW.event_id IS NOT (SELECT event_id FROM suggestions WHERE id = NEW.suggestion_id)
+BEGIN
+  UPDATE votes SET event_id = (SELECT event_id FROM suggestions WHERE id = NEW.suggestion_id) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS on_reaction_event
+AFTER INSERT ON reactions
+FOR EACH ROW WHEN NEW.event_id IS NOT (SELECT event_id FROM posts WHERE id = NEW.post_id)
+BEGIN
+  UPDATE reactions SET event_id = (SELECT event_id FROM posts WHERE id = NEW.post_id) WHERE id = NEW.id;
+END;
+"""
+
+# 與 dashboard.sql 的 set_updated_at 相同：寫入者未指定 updated_at 時才更新為現在時間，
+# 同步寫入時保留來源端的時間戳記，避免同一筆資料在兩端來回傳遞
+SYNCED_TABLES = ['suggestions', 'posts', 'votes', 'reactions']
+SCHEMA += "".join(f"""
+CREATE TRIGGER IF NOT EXISTS on_{table}_touched
+AFTER UPDATE ON {table}
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at
+BEGIN
+  UPDATE {table} SET updated_at = {_NOW_SQL} WHERE id = NEW.id;
+END;
+""" for table in SYNCED_TABLES)
+
+# 刪除紀錄 (子表由 ON DELETE CASCADE 處理)
+SCHEMA += "".join(f"""
+CREATE TRIGGER IF NOT EXISTS on_{table}_deleted
+AFTER DELETE ON {table}
+FOR EACH ROW
+BEGIN
+  INSERT OR REPLACE INTO sync_tombstones (table_name, row_id) VALUES ('{table}', OLD.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS on_{table}_restored
+AFTER INSERT ON {table}
+FOR EACH ROW
+BEGIN
+  DELETE FROM sync_tombstones WHERE table_name = '{table}' AND row_id = NEW.id;
+END;
+""" for table in ['suggestions', 'posts'])
+
+# 與 dashboard.sql 的 record_activity 相同：每分鐘活動量、累計數量與參與者
+# 表名: (metric, 分組欄位, 新增時的活動來源)；刪除/變更時直接使用 OLD.event_id
+# (連鎖刪除時上層資料已不存在)
+ACTIVITY_SOURCES = {
+    'votes': ('vote', 'vote_type', "(SELECT event_id FROM suggestions WHERE id = NEW.suggestion_id)"),
+    'reactions': ('reaction', 'reaction_type', "(SELECT event_id FROM posts WHERE id = NEW.post_id)"),
+    'posts': ('post', 'topic', "NEW.event_id"),
+}
+_MINUTE_SQL = "strftime('%Y-%m-%dT%H:%M:00+00:00', 'now')"
+
+
+def _bump_activity_sql(event, metric, dimension, actions, delta):
+    return f"""
+  INSERT INTO activity_minutes (event_id, bucket, metric, dimension, actions, delta)
+  VALUES ({event}, {_MINUTE_SQL}, '{metric}', {dimension}, {actions}, {delta})
+  ON CONFLICT (event_id, bucket, metric, dimension) DO UPDATE SET actions = actions + {actions}, delta = delta + {delta};
+  INSERT INTO activity_totals (event_id, metric, dimension, total)
+  VALUES ({event}, '{metric}', {dimension}, {delta})
+  ON CONFLICT (event_id, metric, dimension) DO UPDATE SET total = total + {delta};"""
+
+
+def _seen_sql(event, metric):
+    # 活躍時間每分鐘最多更新一次
+    return f"""
+  INSERT INTO participants (event_id, user_id, metric) VALUES ({event}, NEW.user_id, '{metric}')
+  ON CONFLICT (event_id, metric, user_id) DO UPDATE SET last_seen = {_NOW_SQL}
+  WHERE last_seen < strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now', '-1 minute');"""
+
+
+for _table, (_metric, _column, _event) in ACTIVITY_SOURCES.items():
+    SCHEMA += f"""
+CREATE TRIGGER IF NOT EXISTS on_{_table}_activity_inserted
+AFTER INSERT ON {_table}
+FOR EACH ROW
+BEGIN{_bump_activity_sql(_event, _metric, f"NEW.{_column}", 1, 1)}{_seen_sql(_event, _metric)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS on_{_table}_activity_changed
+AFTER UPDATE OF {_column} ON {_table}
+FOR EACH ROW WHEN OLD.{_column} IS NOT NEW.{_column}
+BEGIN{_bump_activity_sql("OLD.event_id", _metric, f"OLD.{_column}", 0, -1)}{_bump_activity_sql("NEW.event_id", _metric, f"NEW.{_column}", 1, 1)}{_seen_sql("NEW.event_id", _metric)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS on_{_table}_activity_deleted
+AFTER DELETE ON {_table}
+FOR EACH ROW
+BEGIN{_bump_activity_sql("OLD.event_id", _metric, f"OLD.{_column}", 0, -1)}
+END;
+"""
+
+# 舊版本機資料庫在建立觸發器前已有的資料 (表名為空時才回填)
+ACTIVITY_BACKFILL = "\n".join(f"""
+INSERT INTO activity_minutes (event_id, bucket, metric, dimension, actions, delta)
+SELECT event_id, strftime('%Y-%m-%dT%H:%M:00+00:00', created_at), '{metric}', {column}, COUNT(*), COUNT(*)
+FROM {table} WHERE TRUE GROUP BY 1, 2, 4
+ON CONFLICT DO NOTHING;
+INSERT INTO activity_totals (event_id, metric, dimension, total)
+SELECT event_id, '{metric}', {column}, COUNT(*) FROM {table} WHERE TRUE GROUP BY 1, 3
+ON CONFLICT DO NOTHING;
+INSERT INTO participants (event_id, user_id, metric, first_seen, last_seen)
+SELECT event_id, user_id, '{metric}', MIN(created_at), MAX(updated_at) FROM {table} WHERE TRUE GROUP BY 1, 2
+ON CONFLICT DO NOTHING;""" for table, (metric, column, _) in ACTIVITY_SOURCES.items())
+
+# 舊版本機資料庫補欄位 (表名, 欄位, 型別, 初始值來源欄位)
+MIGRATIONS = [
+    ('suggestions', 'updated_at', 'TEXT', 'created_at'),
+    ('posts', 'updated_at', 'TEXT', 'created_at'),
+    ('reactions', 'created_at', 'TEXT', None),
+    ('reactions', 'updated_at', 'TEXT', None),
+] + [
+    (table, 'event_id', f"TEXT NOT NULL DEFAULT '{DEFAULT_EVENT_ID}'", f"'{DEFAULT_EVENT_ID}'")
+    for table in SYNCED_TABLES
+]
+
+BOOLEAN_COLUMNS = {'is_hidden', 'is_active'}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class LocalStoreError(Exception):
+    pass
+
+
+# --- RPC (對應 dashboard.sql 中的函式) ---
+
+# p_event_id 未指定時為進行中的活動
+_EVENT_SQL = "COALESCE(:p_event_id, (SELECT id FROM events WHERE is_active = 1 LIMIT 1))"
+
+RPC_SQL = {
+    'get_suggestion_status': f"""
+        SELECT
+            s.id, s.cate, s.content,
+            COALESCE(SUM(CASE WHEN v.vote_type = '未解決' THEN 1 ELSE 0 END), 0) AS unresolved_count,
+            COALESCE(SUM(CASE WHEN v.vote_type = '部分解決' THEN 1 ELSE 0 END), 0) AS partial_count,
+            COALESCE(SUM(CASE WHEN v.vote_type = '已解決' THEN 1 ELSE 0 END), 0) AS resolved_count,
+            s.created_at
+        FROM suggestions s
+        LEFT JOIN votes v ON s.id = v.suggestion_id
+        WHERE s.event_id = {_EVENT_SQL} AND s.is_hidden = 0
+        GROUP BY s.id
+        ORDER BY s.created_at DESC
+    """,
+    'get_post_reaction_status': f"""
+        SELECT
+            p.id, p.topic, p.post_type, p.content, p.user_id,
+            COALESCE(SUM(CASE WHEN r.reaction_type = '支持' THEN 1 ELSE 0 END), 0) AS support_count,
+            COALESCE(SUM(CASE WHEN r.reaction_type = '中立' THEN 1 ELSE 0 END), 0) AS neutral_count,
+            COALESCE(SUM(CASE WHEN r.reaction_type = '反對' THEN 1 ELSE 0 END), 0) AS oppose_count,
+            p.created_at
+        FROM posts p
+        LEFT JOIN reactions r ON p.id = r.post_id
+        WHERE p.event_id = {_EVENT_SQL} AND p.is_hidden = 0
+        GROUP BY p.id
+        ORDER BY p.created_at DESC
+    """,
+    'get_consensus_timeline': f"""
+        WITH bucketed AS (
+            SELECT
+                strftime('%Y-%m-%dT%H:%M:%S+00:00',
+                    (CAST(strftime('%s', t.bucket) AS INTEGER) / (:p_bucket_minutes * 60)) * (:p_bucket_minutes * 60),
+                    'unixepoch') AS bucket,
+                t.vote_type,
+                SUM(t.delta) AS delta
+            FROM vote_tally_minutes t
+            JOIN suggestions s ON s.id = t.suggestion_id AND s.is_hidden = 0
+            WHERE s.event_id = {_EVENT_SQL}
+              AND (:p_suggestion_id IS NULL OR t.suggestion_id = :p_suggestion_id)
+            GROUP BY 1, 2
+        )
+        SELECT
+            bucket, vote_type,
+            SUM(delta) OVER (PARTITION BY vote_type ORDER BY bucket) AS vote_count
+        FROM bucketed
+        ORDER BY bucket, vote_type
+    """,
+}
+
+RPC_SQL['get_activity_summary'] = f"""
+    SELECT metric, dimension, total FROM activity_totals WHERE event_id = {_EVENT_SQL}
+    UNION ALL
+    SELECT 'participants', metric, COUNT(*) FROM participants WHERE event_id = {_EVENT_SQL} GROUP BY metric
+    UNION ALL
+    SELECT 'active', metric, COUNT(*) FROM participants
+    WHERE event_id = {_EVENT_SQL}
+      AND last_seen >= strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now', '-' || :p_active_minutes || ' minutes')
+    GROUP BY metric
+    UNION ALL
+    SELECT 'recent', metric, SUM(actions) FROM activity_minutes
+    WHERE event_id = {_EVENT_SQL}
+      AND bucket >= strftime('%Y-%m-%dT%H:%M:00+00:00', 'now', '-' || :p_rate_minutes || ' minutes')
+      AND bucket < strftime('%Y-%m-%dT%H:%M:00+00:00', 'now')
+    GROUP BY metric
+"""
+
+RPC_SQL['get_activity_timeline'] = f"""
+    SELECT
+        strftime('%Y-%m-%dT%H:%M:%S+00:00',
+            (CAST(strftime('%s', bucket) AS INTEGER) / (:p_bucket_minutes * 60)) * (:p_bucket_minutes * 60),
+            'unixepoch') AS bucket,
+        metric,
+        SUM(actions) AS actions
+    FROM activity_minutes
+    WHERE event_id = {_EVENT_SQL}
+      AND bucket >= strftime('%Y-%m-%dT%H:%M:00+00:00', 'now', '-' || :p_since_minutes || ' minutes')
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+RPC_DEFAULTS = {
+    'get_suggestion_status': {'p_event_id': None},
+    'get_post_reaction_status': {'p_event_id': None},
+    'get_consensus_timeline': {'p_suggestion_id': None, 'p_bucket_minutes': 1, 'p_event_id': None},
+    'get_activity_summary': {'p_event_id': None, 'p_active_minutes': 15, 'p_rate_minutes': 5},
+    'get_activity_timeline': {'p_event_id': None, 'p_since_minutes': 120, 'p_bucket_minutes': 5},
+}
+
+
+# --- 儲存層 ---
+
+class LocalStore:
+    """單一 SQLite 檔案 (WAL 模式)，整個程序共用一條連線並以鎖序列化寫入"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._migrate()
+        backfill = self._needs_activity_backfill()
+        self._conn.executescript(SCHEMA)
+        if backfill:
+            self._conn.executescript(ACTIVITY_BACKFILL)
+        self._columns = {}
+        self._in_batch = False
+
+    def _migrate(self):
+        """為舊版資料庫補上後來新增的欄位 (SQLite 的 ADD COLUMN 不支援函式預設值)"""
+        for table, column, col_type, source in MIGRATIONS:
+            existing = [r['name'] for r in self._conn.execute(f"PRAGMA table_info({table})").fetchall()]
+            if existing and column not in existing:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_type}")
+                self._conn.execute(f"UPDATE {table} SET {column} = {source or _NOW_SQL}")
+
+    def _needs_activity_backfill(self):
+        # 彙總表尚未建立但已有資料的舊資料庫
+        tables = {r['name'] for r in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+        return 'votes' in tables and 'activity_totals' not in tables
+
+    def columns(self, table):
+        if table not in self._columns:
+            rows = self._conn.execute(f"PRAGMA table_info({table})").fetchall()
+            if not rows:
+                raise LocalStoreError(f"未知的資料表: {table}")
+            self._columns[table] = [r['name'] for r in rows]
+        return self._columns[table]
+
+    @contextmanager
+    def batch(self):
+        """將多筆寫入合併為單一交易"""
+        with self._lock:
+            if self._in_batch:
+                yield self
+                return
+            self._in_batch = True
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+            finally:
+                self._in_batch = False
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return [_row_to_dict(r) for r in self._conn.execute(sql, params).fetchall()]
+
+    def write_many(self, sql, param_rows):
+        """批次寫入 (單一交易)，回傳 RETURNING 的資料列"""
+        results = []
+        with self.batch():
+            for params in param_rows:
+                results.extend(_row_to_dict(r) for r in self._conn.execute(sql, params).fetchall())
+        return results
+
+
+def _row_to_dict(row):
+    data = dict(row)
+    for col in BOOLEAN_COLUMNS & data.keys():
+        if data[col] is not None:
+            data[col] = bool(data[col])
+    return data
+
+
+def _check_identifier(name):
+    if not _IDENTIFIER.match(name):
+        raise LocalStoreError(f"不合法的欄位名稱: {name}")
+    return name
+
+
+# --- 查詢建構器 (supabase-py 相容子集) ---
+
+class LocalResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+
+    def __init__(self, store, table=None, rpc=None, params=None):
+        self.store = store
+        self.table_name = table
+        self.rpc_name = rpc
+        self.rpc_params = params or {}
+        self._action = 'select'
+        self._columns = '*'
+        self._count = None
+        self._payload = None
+        self._on_conflict = None
+        self._filters = []
+        self._orders = []
+        self._limit = None
+        self._offset = None
+        self._single = False
+        self._head = False
+
+    # 動作
+    def select(self, columns='*', count=None, head=False):
+        self._action, self._columns, self._count, self._head = 'select', columns, count, head
+        return self
+
+    def insert(self, rows):
+        self._action, self._payload = 'insert', rows
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._action, self._payload, self._on_conflict = 'upsert', rows, on_conflict
+        return self
+
+    def update(self, values):
+        self._action, self._payload = 'update', values
+        return self
+
+    def delete(self):
+        self._action = 'delete'
+        return self
+
+    # 篩選
+    def _add_filter(self, column, op, value):
+        self._filters.append((_check_identifier(column), op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._add_filter(column, '=', value)
+
+    def neq(self, column, value):
+        return self._add_filter(column, '!=', value)
+
+    def gt(self, column, value):
+        return self._add_filter(column, '>', value)
+
+    def gte(self, column, value):
+        return self._add_filter(column, '>=', value)
+
+    def lt(self, column, value):
+        return self._add_filter(column, '<', value)
+
+    def lte(self, column, value):
+        return self._add_filter(column, '<=', value)
+
+    def in_(self, column, values):
+        return self._add_filter(column, 'IN', list(values))
+
+    def is_(self, column, value):
+        return self._add_filter(column, 'IS', value)
+
+    def order(self, column, desc=False):
+        self._orders.append((_check_identifier(column), desc))
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._single = 'maybe'
+        return self
+
+    # 組裝 SQL
+    def _where(self):
+        clauses, params = [], []
+        for column, op, value in self._filters:
+            if op == 'IN':
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            elif op == 'IS':
+                clauses.append(f"{column} IS ?")
+                params.append(value)
+            else:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _tail(self):
+        sql = ""
+        if self._orders:
+            sql += " ORDER BY " + ", ".join(f"{c} {'DESC' if d else 'ASC'}" for c, d in self._orders)
+        if self._limit is not None:
+            sql += f" LIMIT {int(self._limit)}"
+            if self._offset:
+                sql += f" OFFSET {int(self._offset)}"
+        return sql
+
+    def _select_columns(self):
+        if self._columns.strip() == '*':
+            return '*'
+        return ", ".join(_check_identifier(c.strip()) for c in self._columns.split(',') if c.strip())
+
+    def _finish(self, rows, count=None):
+        if self._single:
+            if len(rows) != 1:
+                if self._single == 'maybe' and not rows:
+                    return LocalResponse(None, count)
+                raise LocalStoreError(f"預期 1 筆資料，實際 {len(rows)} 筆")
+            return LocalResponse(rows[0], count)
+        return LocalResponse(rows, count)
+
+    def execute(self):
+        if self.rpc_name is not None:
+            return self._execute_rpc()
+
+        table = _check_identifier(self.table_name)
+        where, params = self._where()
+
+        if self._action == 'select':
+            count = None
+            if self._count:
+                count = self.store.query(f"SELECT COUNT(*) AS n FROM {table}{where}", params)[0]['n']
+            if self._head:
+                return LocalResponse([], count)
+            rows = self.store.query(f"SELECT {self._select_columns()} FROM {table}{where}{self._tail()}", params)
+            return self._finish(rows, count)
+
+        if self._action == 'delete':
+            rows = self.store.write_many(f"DELETE FROM {table}{where} RETURNING *", [params])
+            return LocalResponse(rows)
+
+        if self._action == 'update':
+            cols = [_check_identifier(c) for c in self._payload]
+            set_sql = ", ".join(f"{c} = ?" for c in cols)
+            values = [self._payload[c] for c in cols]
+            rows = self.store.write_many(f"UPDATE {table} SET {set_sql}{where} RETURNING *", [values + params])
+            return LocalResponse(rows)
+
+        # insert / upsert：依欄位組合分組後批次寫入
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        table_cols = self.store.columns(table)
+        groups = {}
+        for row in payload:
+            row = dict(row)
+            if 'id' in table_cols and not row.get('id'):
+                row['id'] = str(uuid.uuid4())
+            groups.setdefault(tuple(_check_identifier(c) for c in row), []).append(row)
+
+        results = []
+        with self.store.batch():
+            for cols, rows in groups.items():
+                sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+                if self._action == 'upsert':
+                    conflict = [c.strip() for c in (self._on_conflict or 'id').split(',')]
+                    updates = [c for c in cols if c not in conflict]
+                    if updates:
+                        sql += f" ON CONFLICT ({', '.join(map(_check_identifier, conflict))}) DO UPDATE SET "
+                        sql += ", ".join(f"{c} = excluded.{c}" for c in updates)
+                    else:
+                        sql += f" ON CONFLICT ({', '.join(map(_check_identifier, conflict))}) DO NOTHING"
+                sql += " RETURNING *"
+                results.extend(self.store.write_many(sql, [[r[c] for c in cols] for r in rows]))
+        return LocalResponse(results)
+
+    def _execute_rpc(self):
+        if self.rpc_name not in RPC_SQL:
+            raise LocalStoreError(f"本機模式未實作 RPC: {self.rpc_name}")
+        params = dict(RPC_DEFAULTS.get(self.rpc_name, {}), **self.rpc_params)
+        base = RPC_SQL[self.rpc_name]
+        where, filter_params = self._where()
+        # 將 RPC 結果視為子查詢，再套用 eq/order/range
+        sql = f"SELECT * FROM ({base}){where}{self._tail()}"
+        named = dict(params)
+        for i, value in enumerate(filter_params):
+            named[f"f{i}"] = value
+        counter = iter(range(len(filter_params)))
+        sql = re.sub(r"\?", lambda _: f":f{next(counter)}", sql)
+        return self._finish(self.store.query(sql, named))
+
+
+# --- 本機帳號 ---
+
+def _hash_password(password, salt=None):
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 200_000)
+    return f"{salt}${digest.hex()}"
+
+
+def _verify_password(password, stored):
+    if not stored or '$' not in stored:
+        return False
+    salt, _ = stored.split('$', 1)
+    return secrets.compare_digest(_hash_password(password, salt), stored)
+
+
+class LocalAuth:
+    """對應 supabase.auth 常用方法；Session 只存在於此 client 實例"""
+
+    def __init__(self, store):
+        self.store = store
+        self._session = None
+        self.admin = SimpleNamespace(invite_user_by_email=self._invite_unsupported)
+
+    def _make_session(self, row):
+        user = SimpleNamespace(id=row['id'], email=row['email'])
+        self._session = SimpleNamespace(user=user, access_token=None)
+        return self._session
+
+    def sign_up(self, credentials):
+        email, password = credentials["email"], credentials["password"]
+        user_id = str(uuid.uuid4())
+        try:
+            with self.store.batch():
+                self.store.write_many(
+                    "INSERT INTO users (id, email, password_hash) VALUES (?, ?, ?) RETURNING id",
+                    [(user_id, email, _hash_password(password))],
+                )
+                self.store.write_many(
+                    "INSERT INTO profiles (id, email) VALUES (?, ?) RETURNING id", [(user_id, email)]
+                )
+        except sqlite3.IntegrityError:
+            raise LocalStoreError("User already exists")
+        return self._make_session({'id': user_id, 'email': email})
+
+    def sign_in_with_password(self, credentials):
+        rows = self.store.query("SELECT id, email, password_hash FROM users WHERE email = ?", (credentials["email"],))
+        if not rows or not _verify_password(credentials["password"], rows[0]['password_hash']):
+            raise LocalStoreError("Invalid login credentials")
+        return self._make_session(rows[0])
+
+    def sign_out(self):
+        self._session = None
+
+    def get_session(self):
+        return self._session
+
+    def refresh_session(self):
+        return self._session
+
+    def reset_password_for_email(self, email, options=None):
+        raise LocalStoreError("離線模式不支援寄送重設密碼郵件，請洽現場工作人員。")
+
+    def _invite_unsupported(self, email, options=None):
+        raise LocalStoreError("離線模式不支援寄送邀請郵件。")
+
+
+# --- Client ---
+
+class LocalClient:
+    """supabase.Client 的本機替代品"""
+
+    def __init__(self, store):
+        self.store = store
+        self.auth = LocalAuth(store)
+
+    def table(self, name):
+        return LocalQuery(self.store, table=name)
+
+    def from_(self, name):
+        return self.table(name)
+
+    def rpc(self, name, params=None):
+        return LocalQuery(self.store, rpc=name, params=params)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_local_store(path=DEFAULT_DB_PATH):
+    """同一個檔案在整個程序只開一次"""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = LocalStore(path)
+        return _stores[path]
+
+
+def create_local_client(path=DEFAULT_DB_PATH):
+    return LocalClient(get_local_store(path))
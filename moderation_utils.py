@@ -0,0 +1,112 @@
+import streamlit as st
+from supabase import Client
+
+UNDO_LIMIT = 10
+
+# 刪除主表時會被 ON DELETE CASCADE 一併刪除的子表 (表名, 外鍵欄位)
+CHILD_TABLES = {
+    'suggestions': ('votes', 'suggestion_id'),
+    'posts': ('reactions', 'post_id'),
+}
+
+
+def _undo_buffer():
+    if "moderation_undo" not in st.session_state:
+        st.session_state.moderation_undo = []
+    return st.session_state.moderation_undo
+
+
+def _push_undo(entry):
+    buffer = _undo_buffer()
+    buffer.append(entry)
+    del buffer[:-UNDO_LIMIT]
+
+
+def undo_available():
+    return len(_undo_buffer()) > 0
+
+
+def last_undo_label():
+    buffer = _undo_buffer()
+    if not buffer:
+        return None
+    entry = buffer[-1]
+    action = "刪除" if entry["action"] == "delete" else ("隱藏" if entry["hidden"] else "取消隱藏")
+    return f"{action} {entry['count']} 筆 ({entry['table']})"
+
+
+def bulk_delete(client: Client, table, ids):
+    """備份後以單一 in_ 請求批次刪除，回傳刪除筆數"""
+    ids = [str(i) for i in ids]
+    if not ids:
+        return 0
+    rows = client.table(table).select("*").in_('id', ids).execute().data
+    children = []
+    if table in CHILD_TABLES:
+        child_table, fk = CHILD_TABLES[table]
+        children = client.table(child_table).select("*").in_(fk, ids).execute().data
+    client.table(table).delete().in_('id', ids).execute()
+    _push_undo({"action": "delete", "table": table, "count": len(rows), "rows": rows, "children": children})
+    return len(rows)
+
+
+def bulk_set_hidden(client: Client, table, ids, hidden=True):
+    """以單一 in_ 請求批次隱藏/取消隱藏，回傳筆數"""
+    ids = [str(i) for i in ids]
+    if not ids:
+        return 0
+    client.table(table).update({"is_hidden": hidden}).in_('id', ids).execute()
+    _push_undo({"action": "hide", "table": table, "count": len(ids), "ids": ids, "hidden": hidden})
+    return len(ids)
+
+
+def undo_last(client: Client):
+    """復原最近一次批次操作，回傳被影響的表名"""
+    buffer = _undo_buffer()
+    if not buffer:
+        return None
+    entry = buffer[-1]
+    table = entry["table"]
+    if entry["action"] == "delete":
+        # 主表與子表是兩個請求：主表還原後即從紀錄移除，子表失敗時重試只需補子表；
+        # 主表以 id upsert，即使前一次已寫入也不會因主鍵重複而無法重試
+        if entry["rows"]:
+            client.table(table).upsert(entry["rows"], on_conflict='id').execute()
+            entry["rows"] = []
+        if entry["children"]:
+            child_table, _ = CHILD_TABLES[table]
+            client.table(child_table).insert(entry["children"]).execute()
+            entry["children"] = []
+    else:
+        client.table(table).update({"is_hidden": not entry["hidden"]}).in_('id', entry["ids"]).execute()
+    buffer.pop()
+    return table
+
+
+def diff_rows(original, edited, columns):
+    """
+    比對 data_editor 編輯前後的表格 (以 id 為索引)，回傳 {id: {欄位: 新值}}；
+    只包含實際變動的儲存格，兩邊皆為空值者不算變動。
+    """
+    changes = {}
+    for column in columns:
+        before, after = original[column], edited[column].reindex(original.index)
+        changed = before.ne(after) & ~(before.isna() & after.isna())
+        for row_id, value in after[changed].items():
+            changes.setdefault(str(row_id), {})[column] = value
+    return changes
+
+
+def bulk_update(client: Client, table, changes):
+    """
+    將 {id: {欄位: 新值}} 依 (欄位, 值) 分組，每組以單一 update().in_() 送出
+    (例如 30 人改為 moderator 只需一個請求)；只更新指定欄位，不會新增資料列。
+    回傳送出的請求數。
+    """
+    groups = {}
+    for row_id, values in changes.items():
+        for column, value in values.items():
+            groups.setdefault((column, value), []).append(str(row_id))
+    for (column, value), ids in groups.items():
+        client.table(table).update({column: value}).in_('id', ids).execute()
+    return len(groups)
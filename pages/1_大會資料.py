@@ -1,7 +1,6 @@
 import streamlit as st
-import pandas as pd 
-import os
 from auth_utils import render_sidebar_auth
+from content_utils import load_content, render_table
 
 st.set_page_config(page_title="大會資料")
 
@@ -79,153 +78,45 @@ st.markdown("---")
 # --- 活動議程 ---
 st.header("📅 活動議程")
 
-data_day1 = {
-    "時間": ["10:00 - 10:30", "10:30 - 10:45", "10:45 - 11:20", "11:20 - 12:00", "12:00 - 13:00", "13:00 - 15:35", "15:35 - 15:45", "15:45 - 17:15", "17:15 - 17:40"],
-    "內容": ["報到", "開場", "議題說明與暖身", "地方成果分享與交流", "午餐", "演練I：資訊對齊", "休息時間", "演練II：議題對焦", "Day 1小結"],
-    "地點": ["5樓集會堂", "5樓集會堂", "5樓集會堂", "5樓大廳", "5樓集會堂", "分組教室", "分組教室","分組教室","5樓集會堂"] 
-}
-
-data_day2 = {
-    "時間": ["9:00 - 09:30", "09:30 - 09:50", "09:50 - 11:45", "11:45 - 11:50", "11:50 - 12:20", "12:20 - 12:40"],
-    "內容": ["第二天報到", "開場與Talk計畫說明", "部會入桌討論", "回到主會場", "成果發表", "閉幕"],
-    "地點": ["5樓集會堂", "5樓集會堂", "5樓集會堂", "5樓集會堂", "5樓集會堂", "5樓集會堂"]
-}
-
 tab1, tab2 = st.tabs(["Day 1", "Day 2"])
 
 with tab1:
     st.subheader("🗓️ 第一天：演練準備")
     with st.expander("點擊展開查看第一天議程表", expanded=True): # 預設展開第一天
-        st.dataframe(pd.DataFrame(data_day1), use_container_width=True, hide_index=True)
+        render_table('event_info', 'agenda', 'day1')
 
 with tab2:
     st.subheader("🗓️ 第二天：正式上場")
     with st.expander("點擊展開查看第二天議程表"):
-        st.dataframe(pd.DataFrame(data_day2), use_container_width=True, hide_index=True)
+        render_table('event_info', 'agenda', 'day2')
 
 st.markdown("---")
 # --- 團隊名單 ---
 st.header("主持與專家團隊")
 
-data_host = {
-    "角色": ["大場", "大場", "大場", "大場", "桌長", "桌長", "桌長", "桌長"],
-    "姓名": ["曾廣芝", "崔家瑋", "林玟圻", "阮敬瑩", "沈鈺琪", "廖宇雯", "施建廷", "張為然"],
-    "簡歷": [
-        "青年好政審議業師 \n第二/三屆行政院青年諮詢委員", 
-        "青年好政審議業師 \nvTaiwan社群專案貢獻者", 
-        "教育部青發署青諮小組", 
-        "青年好政審議業師", 
-        "青年好政審議業師", 
-        "青年好政審議業師", 
-        "青年好政審議業師", 
-        "青年好政審議業師"
-    ] 
-}
-
-data_coach = {
-    "組別": ["AI教育與素養培育", "勞動轉型與產業應用", "文化傳承與地方發展", "資訊安全與社會防護", "數位平權與共融治理"],
-    "姓名": ["陳以婕", "丁玉珍", "趙式隆", "柯維然", "李欣穎"],
-    "簡歷": [
-        "g0v 社群揪松團決策委員", 
-        "勞動部秘書處處長", 
-        "臺北市資訊局長 \n曾任行政院青年顧問團", 
-        "國家資通安全研究院研究員", 
-        "開放文化基金會執行長"
-    ],
-    "專長領域或計畫": [
-        "資料開放與在地行動", 
-        "勞動部專線AI協作計畫", 
-        "智慧城市與AI在公共服務的應用", 
-        "數位安全政策", 
-        "開放文化與數位平權倡議"
-    ]
-}
-
-data_department = {
-    "角色": ["主辦單位", "入桌討論部會", "入桌討論部會", "出席部會會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席部會", "出席局處", "出席局處", "出席局處", "出席局處", "出席局處", "出席局處", "出席局處", "出席局處", "出席局處", "出席局處"],
-    "機關單位": ["教育部青年發展署", "教育部", "勞動部", "數發部", "經濟部", "文化部", "原住民族委員會", "交通部", "農業部", "環境部", "內政部", "個人資料保護委員會籌備處", "國家通訊傳播委員會", "衛生福利部", "國家發展委員會", "新北市青年局", "宜蘭縣勞工處", "新竹縣教育局", "桃園市青年局", "彰化縣青年發展處", "基隆市產業發展處", "雲林縣勞動暨青年事務發展處", "高雄市青年局", "嘉義縣勞動暨青年發展處", "苗栗縣勞動及青年發展處"],
-    "對應組別": ["N/A", "A、C、E", "B", "B、D、E", "B、C", "B、C", "C", "C", "C", "C", "D、E", "D", "D", "D、E", "E", "地方展板", "地方展板", "地方展板", "地方展板", "地方展板", "地方展板", "地方展板", "地方展板", "地方展板", "地方展板"]
-}
-
 tab3, tab4, tab5 = st.tabs(["主持團隊", "專家教練", "相關單位"])
 
-def render_team_table(data):
-    """
-    使用 st.columns 和 st.markdown 模擬表格。
-    """
-    if not data:
-        st.info("無數據可顯示。")
-        return
-
-    # 獲取欄位名稱，並設定比例
-    keys = list(data.keys())
-    
-    # 標題行 
-    cols_header = st.columns([1, 1, 3] if len(keys) == 3 else [1, 1, 2, 2])
-    for i, key in enumerate(keys):
-        cols_header[i].markdown(f"**<u>{key}</u>**", unsafe_allow_html=True)
-    st.markdown("---")
-    
-    # 數據行
-    df = pd.DataFrame(data)
-    for index, row in df.iterrows():
-        cols_data = st.columns([1, 1, 3] if len(keys) == 3 else [1, 1, 2, 2])
-        
-        for i in range(len(keys) - 1):
-            cols_data[i].write(row[keys[i]])
-
-        last_key = keys[-1]
-        # 使用 <br> 替換 \n 進行 HTML 渲染
-        last_content = row[last_key].replace('\n', '<br>')
-        cols_data[len(keys) - 1].markdown(last_content, unsafe_allow_html=True)
-
 with tab3:
     st.subheader("主持團隊")
     with st.expander("點擊展開查看主持團隊名單"): 
-        render_team_table(data_host)
+        render_table('event_info', 'teams', 'host')
 
 with tab4:
     st.subheader("專家教練")
     with st.expander("點擊展開查看專家教練名單"):
-        render_team_table(data_coach) 
+        render_table('event_info', 'teams', 'coach')
 
 with tab5:
     st.subheader("相關單位")
     with st.expander("感謝相關部會局處出席及參與"):
-        st.dataframe(pd.DataFrame(data_department), use_container_width=True, hide_index=True)
+        render_table('event_info', 'teams', 'department')
 
 st.markdown("---")
 
 # --- 參考資料 ---
 st.header("📚 核心參考資料")
 st.caption("請點擊下方按鈕，查閱與本次活動相關的背景資料。")
-reference_links = [
-    {
-        "label": "👉 青年工作小組彙整的建議與洞見",
-        "url": "https://wonderl.ink/@kclt25",
-        "help": "跳轉至外部資料彙整平台"
-    },
-    {
-        "label": "📝 初步書面回應",
-        "url": "https://youthhub.yda.gov.tw/news/detail?id=163",
-        "help": "到青年好政網站查閱初步書面回應資料"
-    },
-    {
-        "label": "💻 大場簡報",
-        "url": "https://docs.google.com/presentation/d/14ELmqJNLsI_4lvEqoXxfbk1ojJZPVq1mig0nKZ1G9AY/edit?usp=sharing",
-        "help": "查看大場簡報"
-    },
-    {
-        "label": "🧪 (beta)Gemini洞見檢核助手",
-        "url": "https://gemini.google.com/gem/5e3aa78bcbf8?usp=sharing",
-        "help": "使用Gemini輔助思考洞見深化與資訊對齊方向"
-    },
-    {
-        "label": "💬 其他補充內容（目前暫無更新）",
-        "url": "https://docs.google.com/document/d/1H0RU-Glp-s3gJJcFZadaOeUe4rieOUiThFr-jl8ewuI/edit?usp=sharing",
-        "help": "其他即時更新之補充內容彙整"
-    }
-]
+reference_links = load_content('event_info')['reference_links']
 
 cols = []
 for i in range(0, len(reference_links), 2):
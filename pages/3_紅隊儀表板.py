@@ -2,25 +2,27 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from supabase import Client
-import time
-import datetime
-import pytz
-import os
-from auth_utils import render_sidebar_auth
+from zoneinfo import ZoneInfo
+from auth_utils import refresh_user_role, render_sidebar_auth
+from storage import create_storage_client
+from data_layer import get_read_client, format_snapshot_time, invalidate_reader
+from dedup_utils import build_index
+from rate_limit import rate_limited
+from moderation_utils import bulk_delete, bulk_set_hidden, undo_last, undo_available, last_undo_label
+from event_utils import active_event_id
+from scoring import SORT_MODES, sort_suggestions
+from snapshots import get_dashboard_reader
+from user_choices import get_my_choices, remember_my_choice
 
 st.set_page_config(page_title="紅隊儀表板")
 
 # --- 初始化與配置 ---
 @st.cache_resource(ttl=None)  
 def init_connection_for_page() -> Client:
-    if "supabase" in st.secrets and "url" in st.secrets["supabase"]:
-        try:
-            url = st.secrets["supabase"]["url"]
-            key = st.secrets["supabase"]["key"] 
-            return create_client(url, key)
-        except Exception:
-            return None
-    return None 
+    try:
+        return create_storage_client(st.secrets)
+    except Exception:
+        return None
 
 if "supabase" not in st.session_state or st.session_state.supabase is None:
     st.session_state.supabase = init_connection_for_page()
@@ -33,6 +35,8 @@ else:
     supabase: Client = supabase
 
 
+refresh_user_role(supabase)  # 管理員變更角色後不需重新登入
+
 # 確定使用者 ID (用於投票)
 current_user_id = st.session_state.user.id if "user" in st.session_state and st.session_state.user else None
 is_logged_in = current_user_id is not None
@@ -41,11 +45,11 @@ is_admin_or_moderator = st.session_state.role in ['system_admin', 'moderator'] i
 supabase: Client = st.session_state.supabase
 render_sidebar_auth(st.session_state.supabase, True)
 
-TAIPEI_TZ = pytz.timezone('Asia/Taipei')
-current_time_taipei = datetime.datetime.now(TAIPEI_TZ).strftime('%H:%M:%S')
+TAIPEI_TZ = ZoneInfo('Asia/Taipei')
+EVENT_ID = active_event_id(st.secrets)  # 所有查詢與寫入皆限定於目前活動
 
 st.title("🛡️ 紅隊演練儀表板")
-st.caption(f"上次更新: {current_time_taipei}")
+update_caption = st.empty()
 st.markdown("---")
 
 # 定義類別與狀態
@@ -55,27 +59,33 @@ VOTE_STATUSES = ['所有狀態', '未解決', '部分解決', '已解決/有共
 
 
 # --- 即時數據讀取 ---
-@st.cache_data(ttl=1) 
+read_client = get_read_client() or supabase
+
+# 讀取函式與讀取器見 snapshots.py (啟動預熱時也會建立同一個讀取器)
+dashboard_reader = get_dashboard_reader(read_client, EVENT_ID)
+
+def mark_dashboard_dirty():
+    """寫入後要求提早更新，並記下本 Session 需要等到的快照版本"""
+    st.session_state.dashboard_min_generation = dashboard_reader.invalidate()
+
 def fetch_dashboard_data():
-    """獲取建議列表及其投票狀態（呼叫 Supabase RPC）"""
-    try:
-        # 呼叫RPC
-        response = supabase.rpc('get_suggestion_status', {}).execute()
-        df = pd.DataFrame(response.data)
-        
-        numeric_cols = ['unresolved_count', 'partial_count', 'resolved_count']
-        if not df.empty:
-            df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-            
-        return df
-    except Exception as e:
-        st.error(f"資料讀取失敗，請檢查 Supabase 後端: {e}")
+    """讀取最近一次成功的快照，並更新頁首的資料時間"""
+    snapshot = dashboard_reader.get(min_generation=st.session_state.pop('dashboard_min_generation', None))
+    as_of = format_snapshot_time(snapshot, TAIPEI_TZ)
+    if snapshot.is_empty:
+        update_caption.caption(f"資料時間: {as_of}")
+        st.error(f"資料讀取失敗，請檢查 Supabase 後端: {snapshot.error}")
         return pd.DataFrame()
+    if snapshot.error:
+        update_caption.caption(f"⚠️ 資料時間: {as_of} (後端連線異常，顯示最後一次成功的資料)")
+    else:
+        update_caption.caption(f"資料時間: {as_of}")
+    return snapshot.value
 
 
 # --- 篩選邏輯與介面 ---
 
-col_cat, col_status = st.columns(2)
+col_cat, col_status, col_sort = st.columns(3)
 
 # 類別篩選
 selected_category = col_cat.selectbox(
@@ -91,6 +101,14 @@ selected_vote_status = col_status.selectbox(
     index=0
 )
 
+# 排序方式 (共識指標說明見 scoring.py)
+selected_sort = col_sort.selectbox(
+    "排序方式",
+    options=list(SORT_MODES),
+    index=0,
+    help="共識度：已解決比例的保守估計 (票數少時較低)；爭議度：意見分散且票數多；兩極化：未解決與已解決勢均力敵"
+)
+
 df = fetch_dashboard_data()
 
 # 執行篩選
@@ -135,8 +153,53 @@ else:
     st.info("根據您的篩選條件，目前沒有任何建議或投票數據。")
 
 
+# --- 共識變化時間軸 ---
+@st.cache_data(ttl=30)
+def fetch_consensus_timeline(suggestion_id, bucket_minutes, event_id):
+    """一次查詢取得降採樣後的累計票數時間序列"""
+    try:
+        response = supabase.rpc('get_consensus_timeline', {
+            "p_suggestion_id": suggestion_id,
+            "p_bucket_minutes": bucket_minutes,
+            "p_event_id": event_id,
+        }).execute()
+        df_timeline = pd.DataFrame(response.data)
+        if not df_timeline.empty:
+            df_timeline['bucket'] = pd.to_datetime(df_timeline['bucket']).dt.tz_convert(TAIPEI_TZ)
+            df_timeline['vote_type'] = df_timeline['vote_type'].replace({'已解決': '已解決/有共識'})
+        return df_timeline
+    except Exception as e:
+        st.error(f"時間軸讀取失敗: {e}")
+        return pd.DataFrame()
+
+with st.expander("📈 共識變化時間軸", expanded=False):
+    col_target, col_bucket = st.columns([3, 1])
+    timeline_options = [None] + (df['id'].tolist() if not df.empty else [])
+    content_by_id = dict(zip(df['id'], df['content'])) if not df.empty else {}
+    timeline_target = col_target.selectbox(
+        "選擇建議",
+        options=timeline_options,
+        format_func=lambda sid: "全部建議" if sid is None else content_by_id.get(sid, sid)
+    )
+    bucket_minutes = col_bucket.selectbox("時間粒度 (分鐘)", options=[1, 5, 15, 60], index=1)
+
+    df_timeline = fetch_consensus_timeline(timeline_target, bucket_minutes, EVENT_ID)
+    if not df_timeline.empty:
+        fig_timeline = px.line(
+            df_timeline, x='bucket', y='vote_count', color='vote_type',
+            labels={'bucket': '時間', 'vote_count': '累計票數', 'vote_type': '投票狀態'},
+            color_discrete_map={'未解決': 'red', '部分解決': 'orange', '已解決/有共識': 'green'},
+            line_shape='hv',
+            markers=True
+        )
+        st.plotly_chart(fig_timeline, config={'displayModeBar': False})
+    else:
+        st.info("目前尚無投票紀錄。")
+
+
 # --- 建議列表與投票區 ---
 
+@rate_limited('vote', fingerprint=lambda suggestion_id, vote_type: (suggestion_id, vote_type))
 def handle_vote(suggestion_id, vote_type):
     """處理投票邏輯，將顯示名稱轉換為 Supabase 內部名稱"""
     if not current_user_id:
@@ -149,10 +212,12 @@ def handle_vote(suggestion_id, vote_type):
         else:
              supabase_vote_type = vote_type
 
-        supabase.table('votes').upsert({"suggestion_id": suggestion_id, "user_id": current_user_id, "vote_type": supabase_vote_type}, on_conflict="suggestion_id, user_id").execute()
+        supabase.table('votes').upsert({"event_id": EVENT_ID, "suggestion_id": suggestion_id, "user_id": current_user_id, "vote_type": supabase_vote_type}, on_conflict="suggestion_id, user_id").execute()
+        remember_my_choice('votes', suggestion_id, supabase_vote_type)
         
         st.toast(f"投票成功: {vote_type}") 
-        st.cache_data.clear()
+        mark_dashboard_dirty()
+        fetch_consensus_timeline.clear()
         st.rerun()
     except Exception as e:
         st.error(f"投票失敗: {e}")
@@ -165,11 +230,72 @@ def admin_delete_suggestion(suggestion_id):
     try:
         supabase.table('suggestions').delete().eq('id', suggestion_id).execute()
         st.toast("建議已刪除！")
-        st.cache_data.clear()
+        mark_dashboard_dirty()
         st.rerun()
     except Exception as e:
         st.error(f"刪除失敗: {e}")
 
+# --- 批次管理 (管理員/版主) ---
+def render_bulk_moderation(df_source):
+    """多選建議後以單一請求刪除或隱藏，並提供復原"""
+    moderation_client = st.session_state.get('supabase_admin') or supabase
+
+    df_select = df_source[['id', 'cate', 'content']].copy()
+    df_select.insert(0, 'Select', False)
+    df_selected = st.data_editor(
+        df_select,
+        key="bulk_suggestion_editor",
+        column_config={
+            'Select': st.column_config.CheckboxColumn("選取", required=True),
+            'id': None,
+            'cate': st.column_config.TextColumn("類別", disabled=True),
+            'content': st.column_config.TextColumn("內容", disabled=True),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    selected_ids = df_selected.loc[df_selected['Select'], 'id'].tolist()
+
+    col_del, col_hide, col_undo = st.columns(3)
+    try:
+        if col_del.button(f"🗑️ 刪除已選 ({len(selected_ids)})", disabled=not selected_ids):
+            count = bulk_delete(moderation_client, 'suggestions', selected_ids)
+            st.toast(f"已刪除 {count} 筆建議。")
+            mark_dashboard_dirty()
+            st.rerun()
+        if col_hide.button(f"🙈 隱藏已選 ({len(selected_ids)})", disabled=not selected_ids):
+            count = bulk_set_hidden(moderation_client, 'suggestions', selected_ids, hidden=True)
+            st.toast(f"已隱藏 {count} 筆建議。")
+            mark_dashboard_dirty()
+            st.rerun()
+        if col_undo.button(f"↩️ 復原：{last_undo_label() or '無'}", disabled=not undo_available()):
+            undone = undo_last(moderation_client)
+            if undone == 'suggestions':
+                mark_dashboard_dirty()
+            elif undone == 'posts':
+                # 復原的是新聞牆的操作：讓新聞牆下次載入時重新讀取
+                invalidate_reader(f'wall:{EVENT_ID}')
+                st.session_state.reaction_version = st.session_state.get('reaction_version', 0) + 1
+            st.toast("已復原上一步操作。")
+            st.rerun()
+    except Exception as e:
+        st.error(f"批次操作失敗: {e}")
+
+    hidden_res = supabase.table('suggestions').select("id, cate, content").eq('event_id', EVENT_ID).eq('is_hidden', True).execute()
+    if hidden_res.data:
+        with st.expander(f"已隱藏的建議 ({len(hidden_res.data)})"):
+            df_hidden = pd.DataFrame(hidden_res.data)
+            st.dataframe(df_hidden[['cate', 'content']], use_container_width=True, hide_index=True)
+            if st.button("全部取消隱藏"):
+                bulk_set_hidden(moderation_client, 'suggestions', df_hidden['id'].tolist(), hidden=False)
+                mark_dashboard_dirty()
+                st.rerun()
+
+if is_admin_or_moderator and not df_filtered.empty:
+    if st.toggle("🧹 批次管理模式", key="bulk_mode_suggestions"):
+        render_bulk_moderation(df_filtered)
+        st.markdown("---")
+
 st.subheader("🗳️ 建議列表與投票")
 st.caption(f"目前顯示 {len(df_filtered)} 筆建議 (總計 {len(df)} 筆)")
 if not is_logged_in:
@@ -177,26 +303,35 @@ if not is_logged_in:
     st.markdown("---") 
 
 if not df_filtered.empty:
-    suggestions = df_filtered.sort_values('created_at', ascending=False).to_dict('records')
+    suggestions = sort_suggestions(df_filtered, selected_sort).to_dict('records')
+    score_column = SORT_MODES[selected_sort][0]
     
     show_warning = not is_logged_in 
+
+    # 本 Session 的投票 (一次查詢，標示已選的按鈕)
+    my_votes = get_my_choices(supabase, 'votes', 'suggestion_id', 'vote_type', current_user_id, EVENT_ID)
+
+    def vote_button_type(suggestion_id, vote_type):
+        return "primary" if my_votes.get(str(suggestion_id)) == vote_type else "secondary"
     
     for index, item in enumerate(suggestions):
         col_meta, col_content, col_un, col_par, col_res, col_del = st.columns([0.4, 1.2, 0.9, 0.9, 0.9, 0.4])
         
         col_meta.markdown(f"**[{item['cate']}]**")
+        if score_column in ('consensus_score', 'controversy', 'polarization'):
+            col_meta.caption(f"{item[score_column]:.2f}")
         col_content.write(f"**{item['content']}**")
         
         # 投票按鈕登入後才顯示
         if is_logged_in:
             with col_un:
-                if st.button(f"🔴 未解決 ({int(item['unresolved_count'])})", key=f"un_{item['id']}", help="點擊投票為此狀態"):
+                if st.button(f"🔴 未解決 ({int(item['unresolved_count'])})", key=f"un_{item['id']}", help="點擊投票為此狀態", type=vote_button_type(item['id'], '未解決')):
                     handle_vote(item['id'], '未解決')
             with col_par:
-                if st.button(f"🟡 部分解決 ({int(item['partial_count'])})", key=f"par_{item['id']}", help="點擊投票為此狀態"):
+                if st.button(f"🟡 部分解決 ({int(item['partial_count'])})", key=f"par_{item['id']}", help="點擊投票為此狀態", type=vote_button_type(item['id'], '部分解決')):
                     handle_vote(item['id'], '部分解決')
             with col_res:
-                if st.button(f"🟢 已解決/有共識 ({int(item['resolved_count'])})", key=f"res_{item['id']}", help="點擊投票為此狀態"):
+                if st.button(f"🟢 已解決/有共識 ({int(item['resolved_count'])})", key=f"res_{item['id']}", help="點擊投票為此狀態", type=vote_button_type(item['id'], '已解決')):
                     handle_vote(item['id'], '已解決/有共識') 
         else:
             # 未登入時，顯示計數但隱藏按鈕
@@ -222,6 +357,15 @@ if is_admin_or_moderator:
     
     tab1, tab2 = st.tabs(["單筆新增", "CSV 批次匯入"])
 
+    # 以既有建議建立相似度索引 (MinHash/LSH)
+    @st.cache_resource(max_entries=4)
+    def get_dedup_index(items):
+        return build_index(items)
+
+    dedup_index = get_dedup_index(
+        tuple(zip(df['id'], df['content'])) if not df.empty else tuple()
+    )
+
     with tab1:
         with st.form("add_suggestion_form", clear_on_submit=True):
             new_cate = st.selectbox(
@@ -230,19 +374,30 @@ if is_admin_or_moderator:
                 key="new_cate_select"
             )
             new_content = st.text_area("新的建議/意見內容")
+            force_add = st.checkbox("仍要新增 (忽略相似建議提醒)", value=False)
             
             if st.form_submit_button("新增單筆建議"):
                 if new_content and new_cate:
-                    try:
-                        supabase.table('suggestions').insert({
-                            "content": new_content, 
-                            "cate": new_cate,
-                        }).execute()
-                        st.toast("單筆建議新增成功！")
-                        st.cache_data.clear()
-                        st.rerun()
-                    except Exception as e:
-                        st.error(f"新增失敗: {e}")
+                    duplicates = dedup_index.find_duplicates(new_content)
+                    if duplicates and not force_add:
+                        # 只略過本次新增，頁面其餘部分照常顯示
+                        st.warning("已有相似的建議，為避免票數分散，本次未新增。若確定要新增，請勾選「仍要新增」後再送出。")
+                        st.dataframe(
+                            pd.DataFrame(duplicates, columns=['id', '相似建議', '相似度']).drop(columns='id'),
+                            use_container_width=True, hide_index=True
+                        )
+                    else:
+                        try:
+                            supabase.table('suggestions').insert({
+                                "event_id": EVENT_ID,
+                                "content": new_content, 
+                                "cate": new_cate,
+                            }).execute()
+                            st.toast("單筆建議新增成功！")
+                            mark_dashboard_dirty()
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"新增失敗: {e}")
                 else:
                     st.warning("類別和內容不可為空。")
 
@@ -250,6 +405,11 @@ if is_admin_or_moderator:
         st.info("上傳的 CSV 檔案必須包含兩欄：`content` (建議內容) 和 `cate` (類別，必須為 '建議', '洞察', 或 '其他')。")
         
         uploaded_file = st.file_uploader("選擇 CSV 檔案", type=["csv"])
+        dedup_mode = st.radio(
+            "重複/相似建議處理方式",
+            options=["略過相似列 (不匯入)", "仍全部匯入"],
+            horizontal=True
+        )
         
         if st.button("確認批次匯入"):
             if uploaded_file is not None:
@@ -269,7 +429,24 @@ if is_admin_or_moderator:
                         st.dataframe(invalid_categories, width=True)
                         st.stop()
 
-                    data_to_insert = df_upload.to_dict('records')
+                    # 與既有建議及同批次先前列比對
+                    batch_index = build_index([])
+                    data_to_insert = []
+                    dup_report = []
+                    for row_no, record in enumerate(df_upload.to_dict('records')):
+                        matches = dedup_index.find_duplicates(record['content'], limit=1)
+                        if not matches:
+                            matches = [(m_id, f"(同批次) {m_content}", score) for m_id, m_content, score in batch_index.find_duplicates(record['content'], limit=1)]
+                        if matches:
+                            dup_report.append({"content": record['content'], "相似建議": matches[0][1], "相似度": matches[0][2]})
+                            if dedup_mode.startswith("略過"):
+                                continue
+                        batch_index.add(row_no, record['content'])
+                        data_to_insert.append(dict(record, event_id=EVENT_ID))
+
+                    if dup_report:
+                        st.warning(f"偵測到 {len(dup_report)} 筆重複或相似建議。")
+                        st.dataframe(pd.DataFrame(dup_report), use_container_width=True, hide_index=True)
                     
                     if not data_to_insert:
                         st.warning("CSV 檔案中沒有找到有效數據可供插入。")
@@ -278,7 +455,9 @@ if is_admin_or_moderator:
                     supabase.table('suggestions').insert(data_to_insert).execute()
                     
                     st.success(f"成功匯入 {len(data_to_insert)} 筆建議/洞察！")
-                    st.cache_data.clear()
+                    if dup_report and dedup_mode.startswith("略過"):
+                        st.toast(f"已略過 {len(dup_report)} 筆相似建議。")
+                    mark_dashboard_dirty()
                     st.rerun()
 
                 except Exception as e:
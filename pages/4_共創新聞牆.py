@@ -1,11 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from supabase import create_client, Client
-import time
-import uuid 
-import os 
-from auth_utils import render_sidebar_auth
+from supabase import Client
+from zoneinfo import ZoneInfo
+from auth_utils import refresh_user_role, render_sidebar_auth
+from data_layer import get_read_client, format_snapshot_time, invalidate_reader
+from cluster_utils import IncrementalTopicClusterer, DEFAULT_CLUSTERS
+from rate_limit import rate_limited
+from moderation_utils import bulk_delete, bulk_set_hidden, undo_last, undo_available, last_undo_label
+from event_utils import active_event_id
+from scoring import WALL_SORT_MODES, rank_posts
+from snapshots import REACTION_TYPES, get_wall_reader
+from user_choices import get_my_choices, remember_my_choice
+from content_utils import normalize_post, render_post
 
 # 設置頁面標題
 st.set_page_config(page_title="共創新聞牆")
@@ -32,6 +38,12 @@ if "username" not in st.session_state:
     st.session_state.username = None
 if "reaction_version" not in st.session_state:
     st.session_state.reaction_version = 0
+if "wall_cursor" not in st.session_state:
+    st.session_state.wall_cursor = None
+if "wall_snapshot_version" not in st.session_state:
+    st.session_state.wall_snapshot_version = st.session_state.reaction_version
+
+refresh_user_role(supabase)  # 管理員變更角色後不需重新登入
 
 # 確定使用者 ID (確保是字串，用於 RLS 比較)
 current_user_id = str(st.session_state.user.id) if "user" in st.session_state and st.session_state.user else None
@@ -40,68 +52,50 @@ is_admin_or_moderator = st.session_state.role in ['system_admin', 'moderator'] i
 
 render_sidebar_auth(st.session_state.supabase, True) 
 
+TAIPEI_TZ = ZoneInfo('Asia/Taipei')
+EVENT_ID = active_event_id(st.secrets)  # 所有查詢與寫入皆限定於目前活動
+
 st.title("📢 共創新聞牆")
+update_caption = st.empty()
 st.markdown("---")
 
 TOPICS = [
     "教育與素養培育", "勞動與產業轉型", "文化與地方發展", 
     "資訊與社會防護", "數位平權與共融治理", "其他"
 ]
-REACTION_TYPES = ["支持", "中立", "反對"]
+NEW_POSTS_POLL_SECONDS = 10  # 新貼文提示列的檢查間隔
 
 # --- 資料讀取與處理 ---
-@st.cache_data(ttl=1)
-def fetch_posts_and_reactions(version): 
-    """從 Supabase 獲取所有貼文、作者暱稱及 Reactions (使用雙查詢穩定版)"""
-    
-    empty_reactions_df = pd.DataFrame(columns=['post_id', 'reaction_type'])
+# 讀取函式與讀取器見 snapshots.py (啟動預熱時也會建立同一個讀取器)
+read_client = get_read_client() or supabase
+wall_reader = get_wall_reader(read_client, EVENT_ID)
 
-    try:
-        # 查詢 1 (主貼文)
-        posts_res = supabase.table('posts').select(
-            "id, content, created_at, user_id, topic, post_type"
-        ).order("created_at", desc=True).execute()
-        
-        df_posts = pd.DataFrame(posts_res.data)
-        
-        # 查詢 2 (作者暱稱和角色)
-        if not df_posts.empty:
-            df_posts['id'] = df_posts['id'].astype(str)
-            df_posts['user_id'] = df_posts['user_id'].astype(str)
-            user_ids = df_posts['user_id'].unique().tolist()
-            
-            profiles_res = supabase.table('profiles').select("id, username, role").in_("id", user_ids).execute()
-            df_profiles = pd.DataFrame(profiles_res.data).rename(columns={'id': 'user_id'})
-            df_profiles['user_id'] = df_profiles['user_id'].astype(str)
-            
-            df_merged = pd.merge(df_posts, df_profiles, on='user_id', how='left')
-            
-        else:
-            df_merged = df_posts
-            
-        reactions_res = supabase.table('reactions').select("post_id, reaction_type").execute()
-        df_reactions = pd.DataFrame(reactions_res.data)
-        
-        if not df_reactions.empty:
-            df_reactions['post_id'] = df_reactions['post_id'].astype(str)
-        else:
-            df_reactions = empty_reactions_df.copy()
+def fetch_posts_and_reactions(version): 
+    """讀取最近一次成功的快照；本 Session 有寫入 (version 變動) 時等待包含該寫入的新快照"""
+    min_generation = None
+    if st.session_state.wall_snapshot_version != version:
+        min_generation = wall_reader.invalidate()
+        st.session_state.wall_snapshot_version = version
 
+    snapshot = wall_reader.get(min_generation=min_generation)
+    as_of = format_snapshot_time(snapshot, TAIPEI_TZ)
+    if snapshot.is_empty:
+        update_caption.caption(f"資料時間: {as_of}")
+        st.error(f"新聞牆數據載入失敗，請檢查 RLS 策略是否允許 SELECT 'posts' 和 'profiles'。錯誤：{snapshot.error}")
+        empty_posts_df = pd.DataFrame(columns=['id', 'content', 'user_id', 'topic', 'post_type', 'username', 'role', 'created_ts'] + REACTION_TYPES)
+        return empty_posts_df, pd.DataFrame(columns=['post_id', 'reaction_type']), rank_posts(empty_posts_df)
 
-        if 'username' not in df_merged.columns:
-            df_merged['username'] = None
-        if 'role' not in df_merged.columns:
-            df_merged['role'] = 'user'
-            
-        return df_merged, df_reactions
-        
-    except Exception as e:
-        st.error(f"新聞牆數據載入失敗，請檢查 RLS 策略是否允許 SELECT 'posts' 和 'profiles'。錯誤：{e}")
-        empty_posts_df = pd.DataFrame(columns=['id', 'content', 'user_id', 'topic', 'post_type', 'username', 'role'])
-        return empty_posts_df, empty_reactions_df.copy()
+    if snapshot.error:
+        update_caption.caption(f"⚠️ 資料時間: {as_of} (後端連線異常，顯示最後一次成功的資料)")
+    else:
+        update_caption.caption(f"資料時間: {as_of}")
+    df_posts, df_reactions, rankings = snapshot.value
+    # 快照為所有使用者共用，修改前先複製
+    return df_posts.copy(), df_reactions, rankings
 
 
 # --- 貼文提交邏輯 ---
+@rate_limited('post', fingerprint=lambda topic, post_type, content: (topic, post_type, content))
 def submit_post(topic, post_type, content):
     try:
         if not is_logged_in:
@@ -114,20 +108,28 @@ def submit_post(topic, post_type, content):
              st.error("發布失敗: 缺少連線客戶端。")
              return
 
+        # 寫入時清理內容；顯示用的 HTML 由 render_post 從 content 產生
+        content = normalize_post(content)
+        if not content:
+            st.warning("請填寫內容！")
+            return
         insert_client.table('posts').insert({
+            "event_id": EVENT_ID,
             "user_id": current_user_id, 
             "topic": topic, 
             "post_type": post_type, 
-            "content": content
+            "content": content,
         }).execute()
         
         st.toast("貼文已成功發布！")
         st.session_state.reaction_version += 1
+        st.session_state.wall_cursor = None  # 發文後直接顯示所有最新貼文
         st.rerun() 
     except Exception as e:
         st.error(f"發布失敗: {e}")
 
 # --- React處理 ---
+@rate_limited('reaction', fingerprint=lambda post_id, reaction_type: (post_id, reaction_type))
 def handle_reaction(post_id, reaction_type):
     try:
         if not is_logged_in:
@@ -141,10 +143,12 @@ def handle_reaction(post_id, reaction_type):
              return
             
         upsert_client.table('reactions').upsert({
+            "event_id": EVENT_ID,
             "post_id": post_id, 
             "user_id": current_user_id, 
             "reaction_type": reaction_type
         }, on_conflict="post_id, user_id").execute()
+        remember_my_choice('reactions', post_id, reaction_type)
         
         st.toast(f"已表達 '{reaction_type}'！")
         st.session_state.reaction_version += 1
@@ -169,12 +173,73 @@ def delete_post(post_id):
         except Exception as e:
             st.error(f"刪除失敗: {e}")
 
+# --- 版主批次管理 ---
+def render_bulk_moderation(df_source):
+    """多選貼文後以單一請求刪除或隱藏，並提供復原"""
+    moderation_client = supabase_admin if supabase_admin else supabase
+
+    df_select = df_source[['id', 'topic', 'content']].copy()
+    df_select.insert(0, 'Select', False)
+    df_selected = st.data_editor(
+        df_select,
+        key="bulk_post_editor",
+        column_config={
+            'Select': st.column_config.CheckboxColumn("選取", required=True),
+            'id': None,
+            'topic': st.column_config.TextColumn("主題", disabled=True),
+            'content': st.column_config.TextColumn("內容", disabled=True),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    selected_ids = df_selected.loc[df_selected['Select'], 'id'].tolist()
+
+    col_del, col_hide, col_undo = st.columns(3)
+    try:
+        if col_del.button(f"🗑️ 刪除已選 ({len(selected_ids)})", disabled=not selected_ids):
+            count = bulk_delete(moderation_client, 'posts', selected_ids)
+            st.toast(f"已刪除 {count} 則貼文。")
+            st.session_state.reaction_version += 1
+            st.rerun()
+        if col_hide.button(f"🙈 隱藏已選 ({len(selected_ids)})", disabled=not selected_ids):
+            count = bulk_set_hidden(moderation_client, 'posts', selected_ids, hidden=True)
+            st.toast(f"已隱藏 {count} 則貼文。")
+            st.session_state.reaction_version += 1
+            st.rerun()
+        if col_undo.button(f"↩️ 復原：{last_undo_label() or '無'}", disabled=not undo_available()):
+            undone = undo_last(moderation_client)
+            if undone == 'posts':
+                st.session_state.reaction_version += 1
+            elif undone == 'suggestions':
+                # 復原的是儀表板的操作：讓儀表板下次載入時等待新快照
+                st.session_state.dashboard_min_generation = invalidate_reader(f'dashboard:{EVENT_ID}')
+            st.toast("已復原上一步操作。")
+            st.rerun()
+    except Exception as e:
+        st.error(f"批次操作失敗: {e}")
+
+    hidden_res = moderation_client.table('posts').select("id, topic, content").eq('event_id', EVENT_ID).eq('is_hidden', True).execute()
+    if hidden_res.data:
+        with st.expander(f"已隱藏的貼文 ({len(hidden_res.data)})"):
+            df_hidden = pd.DataFrame(hidden_res.data)
+            st.dataframe(df_hidden[['topic', 'content']], use_container_width=True, hide_index=True)
+            if st.button("全部取消隱藏"):
+                bulk_set_hidden(moderation_client, 'posts', df_hidden['id'].tolist(), hidden=False)
+                st.session_state.reaction_version += 1
+                st.rerun()
+
 # --- 介面渲染 ---
 
 if not is_logged_in:
     st.warning("您目前是訪客模式。發言、投票和反應功能需要登入後才能使用。")
 
-posts_df, reactions_df = fetch_posts_and_reactions(st.session_state.reaction_version)
+posts_df, reactions_df, post_rankings = fetch_posts_and_reactions(st.session_state.reaction_version)
+
+# 本 Session 已看到的最新貼文時間：之後的新貼文先不插入列表 (避免閱讀中版面跳動)，改以提示列通知
+if st.session_state.wall_cursor is None and not posts_df.empty:
+    st.session_state.wall_cursor = posts_df['created_ts'].max()
+if st.session_state.wall_cursor is not None and not posts_df.empty:
+    posts_df = posts_df[posts_df['created_ts'] <= st.session_state.wall_cursor]
 
 
 if is_logged_in:
@@ -192,48 +257,88 @@ if is_logged_in:
                 st.warning("請填寫內容！")
 
 st.markdown("---")
-# --- 計算支持比例  ---
-if not posts_df.empty:
-    
-    # 計數
-    reaction_counts = reactions_df.groupby(['post_id', 'reaction_type']).size().reset_index(name='count')
 
-    #  樞紐化
-    reaction_pivot = reaction_counts.pivot(index='post_id', columns='reaction_type', values='count').fillna(0).reset_index()
-    reaction_pivot = reaction_pivot.rename(columns={'post_id': 'id'})
-    
-    # 合併 Reactions 數據到 Posts 中
-    posts_df['id'] = posts_df['id'].astype(str)
-    posts_df = pd.merge(posts_df, reaction_pivot, on='id', how='left').fillna(0)
-    
-    for col_name in ['支持', '中立', '反對']:
-        if col_name not in posts_df.columns:
-            posts_df[col_name] = 0
-        posts_df[col_name] = posts_df[col_name].astype(int) 
-            
-    # 支持比例
-    posts_df['Total_Reactions'] = posts_df['支持'] + posts_df['中立'] + posts_df['反對']
-    
-    # 防止除以零
-    posts_df['Support_Ratio'] = posts_df.apply(
-        lambda row: row['支持'] / row['Total_Reactions'] if row['Total_Reactions'] > 0 else 0, axis=1
-    )
-    
-    # 支持比例、發布時間降序
-    posts_df = posts_df.sort_values(
-        ['Support_Ratio', 'created_at'], 
-        ascending=[False, False]
-    )
+# --- 新貼文通知 ---
+def count_new_posts():
+    """由共用快照 (背景排程持續更新) 計算游標之後的新貼文，不另外查詢資料庫"""
+    snapshot = wall_reader.get()
+    if snapshot.is_empty:
+        return 0, None
+    df_latest = snapshot.value[0]
+    if df_latest.empty:
+        return 0, None
+    latest = df_latest['created_ts'].max()
+    cursor = st.session_state.wall_cursor
+    if cursor is None:
+        return len(df_latest), latest
+    return int((df_latest['created_ts'] > cursor).sum()), latest
+
+def render_new_posts_banner():
+    new_count, latest = count_new_posts()
+    if new_count and st.button(f"🔔 有 {new_count} 則新貼文，點擊顯示", type="primary", use_container_width=True):
+        # 新貼文已在快照中，只需移動游標並重繪，不重新讀取整面牆
+        st.session_state.wall_cursor = latest
+        st.rerun()
+
+# 只有提示列每 NEW_POSTS_POLL_SECONDS 秒重新執行，列表本身不重繪
+if hasattr(st, 'fragment'):
+    render_new_posts_banner = st.fragment(run_every=NEW_POSTS_POLL_SECONDS)(render_new_posts_banner)
+render_new_posts_banner()
+
+# --- 子主題分群 (版主) ---
+@st.cache_resource
+def get_topic_clusterer(n_clusters, event_id):
+    """每場活動共用一個分群器，新貼文進來時只增量更新"""
+    return IncrementalTopicClusterer(n_clusters=n_clusters)
+
+if is_admin_or_moderator and not posts_df.empty:
+    with st.expander("🧩 子主題分群摘要 (版主)", expanded=False):
+        n_clusters = st.number_input("群集數量", min_value=2, max_value=12, value=DEFAULT_CLUSTERS, step=1)
+        clusterer = get_topic_clusterer(int(n_clusters), EVENT_ID)
+        # 依發布時間由舊到新餵入，確保增量順序穩定
+        ordered = posts_df.sort_values('created_at')
+        try:
+            clusterer.partial_fit(list(zip(ordered['id'], ordered['content'])))
+            cluster_summary = clusterer.summary(active_ids=posts_df['id'])
+        except Exception as e:
+            # 分群失敗不影響新聞牆本身
+            st.warning(f"子主題分群失敗: {e}")
+        else:
+            if cluster_summary:
+                st.dataframe(pd.DataFrame(cluster_summary), use_container_width=True, hide_index=True)
+            else:
+                st.info(f"貼文數少於 {int(n_clusters)} 則，暫時無法分群。")
 
 # --- 新增篩選器 ---
-st.subheader("主題篩選")
-selected_topic = st.selectbox("選擇主題以篩選列表", options=['所有主題'] + TOPICS)
+st.subheader("主題篩選與排序")
+col_topic, col_sort = st.columns(2)
+selected_topic = col_topic.selectbox("選擇主題以篩選列表", options=['所有主題'] + TOPICS)
+selected_sort = col_sort.selectbox(
+    "排序方式",
+    options=list(WALL_SORT_MODES),
+    index=0,
+    help="支持度：依反應數平滑後的支持比例；熱門：淨支持數隨時間衰減；爭議：支持與反對數量接近且反應多"
+)
+# 依快照中預先排好的索引取列，不需重新排序 (略過游標之後尚未顯示的新貼文)
+ranking = post_rankings[selected_sort]
+posts_df = posts_df.loc[ranking[ranking.isin(posts_df.index)]]
 if selected_topic != '所有主題' and not posts_df.empty:
     posts_df = posts_df[posts_df['topic'] == selected_topic]
     
 st.markdown("---")
+if is_admin_or_moderator and not posts_df.empty:
+    if st.toggle("🧹 批次管理模式", key="bulk_mode_posts"):
+        render_bulk_moderation(posts_df)
+        st.markdown("---")
+
 st.subheader(f"📰 所有貼文列表")
 
+# 本 Session 的反應 (一次查詢，標示已選的按鈕)
+my_reactions = get_my_choices(supabase, 'reactions', 'post_id', 'reaction_type', current_user_id, EVENT_ID)
+
+def reaction_button_type(post_id, reaction_type):
+    return "primary" if my_reactions.get(str(post_id)) == reaction_type else "secondary"
+
 for index, row in posts_df.iterrows():
     col_content, col_react = st.columns([4, 1])
     
@@ -257,7 +362,7 @@ for index, row in posts_df.iterrows():
 
     with col_content:
         st.markdown(f"**[{row['topic']}] ({row['post_type']}) - {final_author_name}**") 
-        st.write(row['content'])
+        render_post(row['content'])
         
         support = int(row.get('支持', 0))
         neutral = int(row.get('中立', 0))
@@ -270,11 +375,11 @@ for index, row in posts_df.iterrows():
     with col_react:
         if is_logged_in:
             react_col1, react_col2, react_col3 = st.columns([1, 1, 1])
-            if react_col1.button("👍", key=f"sup_{row['id']}"):
+            if react_col1.button("👍", key=f"sup_{row['id']}", type=reaction_button_type(row['id'], '支持')):
                 handle_reaction(row['id'], '支持')
-            if react_col2.button("😐", key=f"neu_{row['id']}"):
+            if react_col2.button("😐", key=f"neu_{row['id']}", type=reaction_button_type(row['id'], '中立')):
                 handle_reaction(row['id'], '中立')
-            if react_col3.button("👎", key=f"opp_{row['id']}"):
+            if react_col3.button("👎", key=f"opp_{row['id']}", type=reaction_button_type(row['id'], '反對')):
                 handle_reaction(row['id'], '反對')
         else:
             # 訪客模式：顯示總計數
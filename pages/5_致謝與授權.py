@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd 
 from auth_utils import render_sidebar_auth
+from content_utils import render_sections
 st.set_page_config(page_title="致謝與授權")
 if "supabase" not in st.session_state or st.session_state.supabase is None:
     st.error("🚨 基礎連線失敗，請先在主頁登入或檢查配置。")
@@ -72,33 +72,7 @@ st.caption("感謝所有貢獻者的時間與專業。")
 
 st.markdown("---")
 
-# 開發與維護
-st.subheader("開發與維護")
-st.markdown("""
-* **總體設計與開發：** [小工](https://jokctseng.github.io)
-* **網頁架構：** Streamlit
-* **資料庫管理：** Supabase
-""")
-
-# 內容與資料
-st.subheader("活動與資料支援")
-st.markdown("""
-* **資料集：** 政府開放資料平台
-* **議題內容彙整：** 台灣經濟研究院（官方資料）．小工（儀表板）．Peter（Day 1 Mentimeter互動版）
-* **分組洞見彙整：** 豆泥．Peter．小工
-* **活動策劃：** 教育部青年發展署．小工．Peter．豆泥．57．小阮．台灣經濟研究院研究九所
-* **審議桌長：** 請參考大會資料頁面主持團隊表格，感謝出席與貢獻
-* **議題專家：** 請參考大會資料頁面專家教練表格，感謝出席與貢獻
-""")
-
-# 協辦與支援單位
-st.subheader("協辦與支援單位")
-st.markdown("""
-* **指導單位：** 教育部
-* **主辦機關：** 教育部青年發展署
-* **協辦機關單位：** 請參考大會資料頁面相關單位表格，感謝出席與貢獻
-* **幕僚與執行單位：** 台灣經濟研究院研究八所、台灣經濟研究院研究九所
-* **場地與硬體支援：** 交通部集思會議中心
-""")
+# 開發與維護、活動與資料支援、協辦與支援單位
+render_sections('credits', 'sections')
 
 st.markdown("---")
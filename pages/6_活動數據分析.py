@@ -0,0 +1,134 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from zoneinfo import ZoneInfo
+from auth_utils import refresh_user_role, render_sidebar_auth
+from data_layer import get_reader, get_read_client, format_snapshot_time
+from event_utils import active_event_id
+
+st.set_page_config(page_title="活動數據分析")
+
+# --- 初始化與權限檢查 ---
+if "supabase" not in st.session_state or st.session_state.supabase is None:
+    st.error("🚨 基礎連線失敗，請先在主頁登入或檢查配置。")
+    st.stop()
+
+supabase = st.session_state.supabase
+refresh_user_role(supabase)
+render_sidebar_auth(supabase, True)
+
+# 只有主辦單位 (系統管理員/版主) 可以查看
+if st.session_state.get('role') not in ['system_admin', 'moderator']:
+    st.error("❌ 權限不足：此頁面僅供系統管理員與版主使用。")
+    st.stop()
+
+TAIPEI_TZ = ZoneInfo('Asia/Taipei')
+EVENT_ID = active_event_id(st.secrets)
+ACTIVE_MINUTES = 15     # 近幾分鐘內有操作視為活躍
+TIMELINE_MINUTES = 120  # 時間序列顯示範圍
+BUCKET_MINUTES = 5
+RATE_MINUTES = 5        # 每分鐘操作數以最近幾個完整分鐘平均
+
+METRIC_LABELS = {'vote': '投票', 'reaction': '反應', 'post': '貼文'}
+
+st.title("📈 活動數據分析")
+update_caption = st.empty()
+st.markdown("---")
+
+
+# --- 即時數據讀取 ---
+read_client = get_read_client() or supabase
+
+def load_analytics():
+    """只讀取觸發器維護的彙總表 (activity_totals / activity_minutes / participants)，不掃描原始資料"""
+    summary = read_client.rpc('get_activity_summary', {
+        'p_event_id': EVENT_ID, 'p_active_minutes': ACTIVE_MINUTES, 'p_rate_minutes': RATE_MINUTES,
+    }).execute()
+    timeline = read_client.rpc('get_activity_timeline', {
+        'p_event_id': EVENT_ID, 'p_since_minutes': TIMELINE_MINUTES, 'p_bucket_minutes': BUCKET_MINUTES,
+    }).execute()
+
+    df_summary = pd.DataFrame(summary.data, columns=['metric', 'dimension', 'total'])
+    df_summary['total'] = pd.to_numeric(df_summary['total'], errors='coerce').fillna(0).astype(int)
+    df_timeline = pd.DataFrame(timeline.data, columns=['bucket', 'metric', 'actions'])
+    df_timeline['bucket'] = pd.to_datetime(df_timeline['bucket'], utc=True).dt.tz_convert(TAIPEI_TZ)
+    df_timeline['actions'] = pd.to_numeric(df_timeline['actions'], errors='coerce').fillna(0).astype(int)
+    return df_summary, df_timeline
+
+# 所有主辦人員共用同一份快照，由背景排程定期更新
+analytics_reader = get_reader(f'analytics:{EVENT_ID}', load_analytics)
+
+snapshot = analytics_reader.get()
+as_of = format_snapshot_time(snapshot, TAIPEI_TZ)
+if snapshot.is_empty:
+    update_caption.caption(f"資料時間: {as_of}")
+    st.error(f"資料讀取失敗，請檢查 Supabase 後端: {snapshot.error}")
+    st.stop()
+if snapshot.error:
+    update_caption.caption(f"⚠️ 資料時間: {as_of} (後端連線異常，顯示最後一次成功的資料)")
+else:
+    update_caption.caption(f"資料時間: {as_of}")
+
+df_summary, df_timeline = snapshot.value
+
+
+def summary_value(metric, dimension=None):
+    rows = df_summary[df_summary['metric'] == metric]
+    if dimension is not None:
+        rows = rows[rows['dimension'] == dimension]
+    return int(rows['total'].sum())
+
+
+def per_minute(metric):
+    """最近 RATE_MINUTES 個完整分鐘的每分鐘操作數；期間無活動即為 0"""
+    return summary_value('recent', metric) / RATE_MINUTES
+
+
+# --- 總覽 ---
+col1, col2, col3, col4 = st.columns(4)
+col1.metric(f"活躍投票者 (近 {ACTIVE_MINUTES} 分鐘)", summary_value('active', 'vote'),
+            help=f"累計投票人數：{summary_value('participants', 'vote')}")
+col2.metric("每分鐘投票數", f"{per_minute('vote'):.1f}", help=f"最近 {RATE_MINUTES} 個完整分鐘平均")
+col3.metric("貼文數", summary_value('post'), help=f"發文人數：{summary_value('participants', 'post')}")
+col4.metric("反應數", summary_value('reaction'), help=f"反應人數：{summary_value('participants', 'reaction')}")
+
+
+# --- 時間序列 ---
+st.subheader(f"活動量 (近 {TIMELINE_MINUTES} 分鐘，每 {BUCKET_MINUTES} 分鐘)")
+if df_timeline.empty:
+    st.info("這段時間內尚無活動。")
+else:
+    df_plot = df_timeline.assign(類型=df_timeline['metric'].map(METRIC_LABELS).fillna(df_timeline['metric']))
+    fig = px.line(df_plot, x='bucket', y='actions', color='類型', markers=True,
+                  labels={'bucket': '時間', 'actions': '操作次數'})
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# --- 分布 ---
+col_topic, col_reaction = st.columns(2)
+
+with col_topic:
+    st.subheader("各主題貼文數")
+    df_posts = df_summary[(df_summary['metric'] == 'post') & (df_summary['total'] > 0)]
+    if df_posts.empty:
+        st.info("尚無貼文。")
+    else:
+        fig = px.bar(df_posts.sort_values('total'), x='total', y='dimension', orientation='h',
+                     labels={'total': '貼文數', 'dimension': '主題'})
+        st.plotly_chart(fig, use_container_width=True)
+
+with col_reaction:
+    st.subheader("反應分布")
+    df_reactions = df_summary[(df_summary['metric'] == 'reaction') & (df_summary['total'] > 0)]
+    if df_reactions.empty:
+        st.info("尚無反應。")
+    else:
+        fig = px.pie(df_reactions, values='total', names='dimension')
+        st.plotly_chart(fig, use_container_width=True)
+
+st.subheader("投票分布")
+df_votes = df_summary[(df_summary['metric'] == 'vote') & (df_summary['total'] > 0)]
+if df_votes.empty:
+    st.info("尚無投票。")
+else:
+    st.bar_chart(df_votes.set_index('dimension')['total'])
@@ -1,9 +1,18 @@
 import streamlit as st
 import pandas as pd
-from supabase import Client, create_client
+from supabase import Client
+from storage import create_storage_client, create_remote_client, is_local_client
 import os 
-from postgrest.exceptions import APIError 
-import uuid 
+import tempfile
+import time
+from export_data import EXPORTS, FORMATS, export_dataset
+from rate_limit import get_rate_limiter
+from sync_engine import SyncEngine
+from startup_utils import get_startup_report, is_warmup_done, PROCESS_STARTED
+from event_utils import active_event_id
+from auth_utils import refresh_user_role
+from moderation_utils import bulk_update, diff_rows
+from shared_cache import bump_role_generation
 
 st.set_page_config(page_title="管理員後台")
 
@@ -14,8 +23,10 @@ if "supabase" not in st.session_state or st.session_state.supabase is None:
     st.warning("請先在主頁登入並確保 Supabase 連線成功。")
     st.stop()
 
+refresh_user_role(st.session_state.supabase)
+
 # 只有系統管理員可以存取此頁面
-if st.session_state.role != 'system_admin':
+if st.session_state.get('role') != 'system_admin':
     st.error("❌ 權限不足：您不是系統管理員。")
     st.stop()
 
@@ -23,12 +34,9 @@ supabase: Client = st.session_state.supabase
 
 
 # --- Admin Client ---
-if 'supabase' in st.secrets and 'service_role_key' in st.secrets.supabase:
+if is_local_client(supabase) or ('supabase' in st.secrets and 'service_role_key' in st.secrets.supabase):
     try:
-        supabase_admin: Client = create_client(
-            st.secrets.supabase.url,
-            st.secrets.supabase.service_role_key 
-        )
+        supabase_admin: Client = create_storage_client(st.secrets, is_admin=True)
     except Exception as e:
         st.error(f"無法初始化管理員 Client (Admin Key 連線錯誤)：{e}")
         supabase_admin = None
@@ -57,18 +65,48 @@ def fetch_all_profiles():
         st.error(f"資料庫讀取失敗：{e}")
         return pd.DataFrame()
 
-df_profiles = fetch_all_profiles()
+# 本頁保留一份本機表格：儲存變更後直接修補，不需重新讀取整張 profiles
+if "admin_profiles" not in st.session_state:
+    st.session_state.admin_profiles = fetch_all_profiles()
+    st.session_state.admin_editor_version = 0
+
+if st.button("🔄 重新載入使用者列表"):
+    fetch_all_profiles.clear()
+    st.session_state.admin_profiles = fetch_all_profiles()
+    st.session_state.admin_editor_version += 1
+
+df_profiles = st.session_state.admin_profiles
+
+EDITABLE_COLUMNS = ['role', 'username']
+
+
+def save_profile_changes(changes, success_message):
+    """依 (欄位, 值) 分組批次更新，成功後修補本機表格並重設編輯器"""
+    try:
+        requests = bulk_update(supabase, 'profiles', changes)
+    except Exception as e:
+        st.error(f"儲存失敗: {e}")
+        return
+    for uid, values in changes.items():
+        for column, value in values.items():
+            df_profiles.loc[uid, column] = value
+    st.session_state.admin_editor_version += 1  # 以修補後的表格重建編輯器
+    st.toast(f"{success_message} ({requests} 個請求)")
+    fetch_all_profiles.clear()
+    bump_role_generation()  # 只清除角色快取，讓各副本的使用者重新讀取角色
+    st.rerun()
+
 
 # --- 2. 批次權限調整功能 ---
 
 st.header("⚙️ 批次角色權限調整")
-st.caption("您可以直接在表格中修改角色，或勾選多筆使用者後統一變更角色。")
+st.caption("您可以直接在表格中修改角色與暱稱，或勾選多筆使用者後統一變更角色。")
 
 if not df_profiles.empty:
         
     df_edited = st.data_editor(
         df_profiles,
-        key="profile_editor", 
+        key=f"profile_editor_{st.session_state.admin_editor_version}",
         column_order=['Select', 'email', 'role', 'username', 'id'],
         column_config={
             'Select': st.column_config.CheckboxColumn(required=True),
@@ -85,7 +123,8 @@ if not df_profiles.empty:
         use_container_width=True
     )
 
-    modifications = st.session_state.get("profile_editor", {}).get("edited_rows", {})
+    # 與編輯前的表格比對，只送出實際變動的儲存格
+    modifications = diff_rows(df_profiles, df_edited, EDITABLE_COLUMNS)
     
     # 批次變更選單
     selected_uids = df_edited[df_edited['Select']].index.tolist()
@@ -104,21 +143,16 @@ if not df_profiles.empty:
         if not selected_uids:
             st.error("請先勾選要變更角色的使用者。")
             return
-            
-        updates = []
-        for uid in selected_uids:
-            updates.append({
-                "id": str(uid),
-                "role": batch_role
-            })
-            
-        try:
-            supabase.table('profiles').upsert(updates).execute()
-            st.toast(f"成功將 {len(selected_uids)} 位使用者角色更新為 {batch_role}！")
-            st.cache_data.clear()
-            st.experimental_rerun()
-        except Exception as e:
-            st.error(f"批次更新失敗: {e}")
+
+        # 角色已相同者不需更新
+        changes = {
+            str(uid): {"role": batch_role}
+            for uid in selected_uids if df_profiles.loc[uid, 'role'] != batch_role
+        }
+        if not changes:
+            st.info(f"勾選的使用者皆已是 {batch_role}。")
+            return
+        save_profile_changes(changes, f"成功將 {len(changes)} 位使用者角色更新為 {batch_role}！")
 
 
     if col2.button(f"確認批次變更 ({len(selected_uids)} 位使用者)"):
@@ -127,27 +161,16 @@ if not df_profiles.empty:
     st.markdown("---")
 
 
-    # 提交單行變更
+    # 提交單行變更 (角色與暱稱合併為一組變更)
     if modifications:
-        st.subheader("單行角色變更確認")
-        
-        updates = []
-        for index_int, values in modifications.items():
-            uid = df_edited.iloc[index_int].name 
-            if 'role' in values:
-                updates.append({
-                    "id": str(uid),
-                    "role": values['role']
-                })
+        st.subheader("單行變更確認")
+        st.dataframe(
+            pd.DataFrame.from_dict(modifications, orient='index').rename_axis('id'),
+            use_container_width=True
+        )
         
-        if st.button(f"儲存單行角色變更 ({len(updates)} 筆)"):
-            try:
-                supabase.table('profiles').upsert(updates).execute()
-                st.toast(f"成功更新 {len(updates)} 筆單行變更！")
-                st.cache_data.clear()
-                st.experimental_rerun()
-            except Exception as e:
-                st.error(f"儲存失敗: {e}")
+        if st.button(f"儲存單行變更 ({len(modifications)} 位使用者)"):
+            save_profile_changes(modifications, f"成功更新 {len(modifications)} 位使用者！")
 
 else:
     st.info("目前沒有使用者資料可供管理。")
@@ -183,8 +206,9 @@ if supabase_admin:
                     st.success(f"帳號新增成功！已發送密碼設定郵件到 {new_email}。")
                     st.info(f"使用者 ID: {new_user_id}，初始角色已設定為 '{initial_role}'。")
                     
-                    st.cache_data.clear()
-                    st.experimental_rerun()
+                    fetch_all_profiles.clear()
+                    st.session_state.pop("admin_profiles", None)  # 新帳號需重新讀取列表
+                    st.rerun()
 
                 except Exception as e:
                     if "User already exists" in str(e):
@@ -195,3 +219,115 @@ if supabase_admin:
                 st.error("Email 地址不可為空。")
 else:
     st.error("❌ Admin Client 未初始化：無法執行建立帳號功能。")
+
+
+# --- 4. 活動資料匯出 ---
+
+st.header("📦 活動資料匯出")
+st.caption(f"匯出目前活動 ({active_event_id(st.secrets)}) 的資料；以分頁方式逐批讀取並寫入檔案，適合活動結束後產出政策報告用的完整資料。亦可於命令列執行 `python export_data.py`。")
+
+EXPORT_LABELS = {
+    'suggestions': '建議與投票統計',
+    'posts': '貼文與反應統計',
+    'votes': '原始投票紀錄',
+    'reactions': '原始反應紀錄',
+}
+
+col_dataset, col_format = st.columns(2)
+export_name = col_dataset.selectbox("資料集", options=list(EXPORTS), format_func=lambda k: EXPORT_LABELS.get(k, k))
+export_format = col_format.selectbox("格式", options=FORMATS)
+
+# 匯出檔留在伺服器暫存目錄，Session 只記住路徑，不把整份檔案放進記憶體
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "lt25-exports")
+EXPORT_MAX_AGE = 3600  # 秒；超過此時間的匯出檔於下次匯出時刪除
+
+
+def prune_exports():
+    """刪除過期的匯出檔 (Session 結束時沒有通知，以此避免暫存檔累積)"""
+    now = time.time()
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > EXPORT_MAX_AGE:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def discard_export():
+    previous = st.session_state.pop("export_file", None)
+    if previous:
+        try:
+            os.remove(previous[0])
+        except OSError:
+            pass
+
+
+if st.button("產生匯出檔案"):
+    export_client = supabase_admin if supabase_admin else supabase
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prune_exports()
+    discard_export()  # 每個 Session 只保留最後一份
+    fd, export_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix=f".{export_format}")
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            rows, seconds = export_dataset(export_client, export_name, export_format, fp, event_id=active_event_id(st.secrets))
+        st.session_state.export_file = (export_path, f"{export_name}.{export_format}")
+        st.success(f"已匯出 {rows} 筆資料 ({seconds:.1f} 秒)。")
+    except Exception as e:
+        os.remove(export_path)
+        st.error(f"匯出失敗: {e}")
+
+if st.session_state.get("export_file"):
+    export_path, export_filename = st.session_state.export_file
+    if os.path.exists(export_path):
+        # 以檔案物件交給下載按鈕，由 Streamlit 讀取檔案提供下載
+        with open(export_path, 'rb') as fp:
+            st.download_button("下載匯出檔案", data=fp, file_name=export_filename)
+    else:
+        st.session_state.pop("export_file")
+        st.info("匯出檔已過期，請重新產生。")
+
+
+# --- 5. 流量限制統計 ---
+
+st.header("🚦 投票/反應/發文流量限制")
+st.caption("統計本程序啟動以來各動作的放行 (allowed)、合併重複點擊 (coalesced) 與拒絕 (rejected) 次數。")
+st.dataframe(pd.DataFrame(get_rate_limiter().stats()), use_container_width=True, hide_index=True)
+
+
+# --- 6. 離線資料同步 ---
+
+if is_local_client(supabase):
+    st.header("🔄 離線資料同步")
+    st.caption("將本機 SQLite 的建議、貼文、投票與反應與 Supabase 雙向同步；重複執行不會產生重複資料。亦可於命令列執行 `python sync_engine.py`。")
+
+    sync_direction = st.radio(
+        "同步方向", options=['both', 'push', 'pull'], horizontal=True,
+        format_func=lambda d: {'both': '雙向', 'push': '僅推送至雲端', 'pull': '僅從雲端拉取'}[d],
+    )
+    if st.button("開始同步"):
+        try:
+            remote = create_remote_client(st.secrets)
+            if remote is None:
+                st.error("找不到 Supabase service_role_key，無法同步。")
+            else:
+                report = SyncEngine(supabase, remote).run(sync_direction)
+                st.dataframe(pd.DataFrame([s.as_dict() for s in report]), use_container_width=True, hide_index=True)
+                st.success("同步完成。")
+        except Exception as e:
+            st.error(f"同步失敗: {e}")
+
+
+# --- 7. 冷啟動分析 ---
+
+st.header("⏱️ 冷啟動分析")
+st.caption(
+    f"本程序已運行 {(time.time() - PROCESS_STARTED) / 60:.1f} 分鐘。"
+    "下表為第一位訪客載入頁面後，背景預熱各項目的實際耗時 (含儀表板與新聞牆的首次查詢)。"
+)
+if not is_warmup_done():
+    st.info("預熱仍在進行中…")
+startup_report = get_startup_report()
+if startup_report:
+    st.dataframe(pd.DataFrame(startup_report), use_container_width=True, hide_index=True)
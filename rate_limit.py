@@ -0,0 +1,180 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import Counter
+
+import streamlit as st
+
+# 動作 -> (桶容量, 每秒補充的權杖數)
+DEFAULT_RULES = {
+    'vote': (10, 1.0),
+    'reaction': (10, 1.0),
+    'post': (3, 1 / 20),
+}
+COALESCE_WINDOW = 2.0  # 秒；同一使用者在此時間內重複相同操作視為重複點擊
+
+ALLOWED = 'allowed'
+COALESCED = 'coalesced'
+REJECTED = 'rejected'
+
+
+# --- 儲存後端 ---
+
+class MemoryBucketStore:
+    """單一程序內的權杖桶 (預設)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._recent = {}
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            return allowed
+
+    def seen_recently(self, key, window, now=None):
+        """若 key 在 window 秒內出現過回傳 True，否則記錄並回傳 False"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expires = self._recent.get(key)
+            if expires is not None and expires > now:
+                return True
+            self._recent[key] = now + window
+            if len(self._recent) > 10000:
+                self._recent = {k: v for k, v in self._recent.items() if v > now}
+            return False
+
+    def forget(self, key):
+        """取消 seen_recently 的紀錄 (操作未被放行時使用)"""
+        with self._lock:
+            self._recent.pop(key, None)
+
+
+class RedisBucketStore:
+    """多個 Streamlit 副本共用的權杖桶 (需安裝 redis 套件)"""
+
+    _TAKE_SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - updated) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return allowed
+    """
+
+    def __init__(self, url, prefix="lt25:ratelimit:"):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._take = self._redis.register_script(self._TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        return bool(self._take(keys=[self._prefix + key], args=[capacity, rate, now]))
+
+    def seen_recently(self, key, window, now=None):
+        created = self._redis.set(self._prefix + "recent:" + key, 1, nx=True, px=int(window * 1000))
+        return not created
+
+    def forget(self, key):
+        self._redis.delete(self._prefix + "recent:" + key)
+
+
+# --- 限流器 ---
+
+class RateLimiter:
+
+    def __init__(self, store=None, rules=None, coalesce_window=COALESCE_WINDOW):
+        self.store = store or MemoryBucketStore()
+        self.rules = dict(DEFAULT_RULES, **(rules or {}))
+        self.coalesce_window = coalesce_window
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def check(self, user_id, action, fingerprint=None):
+        """回傳 ALLOWED / COALESCED / REJECTED"""
+        key = f"{action}:{user_id}"
+        recent_key = None
+        if fingerprint is not None:
+            recent_key = f"{key}:" + hashlib.sha1(repr(fingerprint).encode('utf-8')).hexdigest()[:16]
+        if recent_key is not None and self.store.seen_recently(recent_key, self.coalesce_window):
+            outcome = COALESCED
+        else:
+            capacity, rate = self.rules[action]
+            outcome = ALLOWED if self.store.take(key, capacity, rate) else REJECTED
+            if outcome == REJECTED and recent_key is not None:
+                # 被拒絕的操作沒有寫入，稍後重試不應被當成重複點擊
+                self.store.forget(recent_key)
+        with self._lock:
+            self._counters[(action, outcome)] += 1
+        return outcome
+
+    def stats(self):
+        """[{'動作', 'allowed', 'coalesced', 'rejected'}, ...]"""
+        with self._lock:
+            counters = dict(self._counters)
+        rows = []
+        for action in self.rules:
+            row = {'動作': action}
+            for outcome in (ALLOWED, COALESCED, REJECTED):
+                row[outcome] = counters.get((action, outcome), 0)
+            rows.append(row)
+        return rows
+
+
+@st.cache_resource
+def get_rate_limiter():
+    """整個程序共用的限流器；secrets 中設定 [rate_limit] redis_url 時改用共用後端"""
+    store = None
+    try:
+        redis_url = st.secrets.get("rate_limit", {}).get("redis_url")
+        if redis_url:
+            store = RedisBucketStore(redis_url)
+    except Exception:
+        store = None
+    return RateLimiter(store=store)
+
+
+def rate_limited(action, fingerprint=None):
+    """
+    在寫入 Supabase 前先檢查限流。
+    fingerprint(*args) 回傳值相同的連續操作會被合併 (不重複寫入)。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            user = st.session_state.get("user")
+            if user is None:
+                return func(*args, **kwargs)
+
+            fp = fingerprint(*args, **kwargs) if fingerprint else None
+            try:
+                outcome = get_rate_limiter().check(str(user.id), action, fp)
+            except Exception:
+                outcome = ALLOWED  # 限流後端 (例如 Redis) 異常時放行，不影響投票與發文
+            if outcome == COALESCED:
+                st.toast("已收到您的操作，請勿重複點擊。")
+                return None
+            if outcome == REJECTED:
+                st.warning("操作太頻繁，請稍候再試。")
+                return None
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
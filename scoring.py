@@ -0,0 +1,174 @@
+"""
+建議的共識指標與新聞牆排序分數 (向量化)。
+
+以 NumPy 對整張表一次計算，不逐列 .apply；由 data_layer 的讀取器在每次取得新快照時計算一次，
+所有 Session 共用結果，投票與反應變動後隨下一份快照更新。
+"""
+import numpy as np
+import pandas as pd
+
+# get_suggestion_status 的三個票數欄位：未解決 / 部分解決 / 已解決
+TALLY_COLUMNS = ['unresolved_count', 'partial_count', 'resolved_count']
+WILSON_Z = 1.96  # 95% 信賴區間
+
+
+def wilson_lower_bound(successes, totals, z=WILSON_Z):
+    """Wilson score 區間下界：票數少時較保守，0 票為 0"""
+    successes = np.asarray(successes, dtype='float64')
+    totals = np.asarray(totals, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = successes / totals
+        z2 = z * z
+        centre = p + z2 / (2 * totals)
+        margin = z * np.sqrt((p * (1 - p) + z2 / (4 * totals)) / totals)
+        bound = (centre - margin) / (1 + z2 / totals)
+    return np.where(totals > 0, bound, 0.0)
+
+
+def normalized_entropy(counts):
+    """各列票數分布的 Shannon entropy，除以 log(類別數) 正規化至 0~1；0 票為 0"""
+    counts = np.asarray(counts, dtype='float64')
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = counts / totals
+        terms = np.where(p > 0, -p * np.log(p), 0.0)
+    return terms.sum(axis=1) / np.log(counts.shape[1])
+
+
+def polarization(low, high, totals):
+    """
+    兩端 (未解決 vs 已解決) 同時佔多數且勢均力敵時接近 1；
+    意見集中在單一端或中間 (部分解決) 時接近 0。
+    """
+    low = np.asarray(low, dtype='float64')
+    high = np.asarray(high, dtype='float64')
+    totals = np.asarray(totals, dtype='float64')
+    poles = low + high
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = 1 - np.abs(low - high) / poles
+        share = poles / totals
+    return np.where(poles > 0, share * balance, 0.0)
+
+
+def score_suggestions(df):
+    """
+    在票數表上加入共識指標欄位 (回傳新的 DataFrame)：
+    - total_votes：總票數
+    - consensus_score：「已解決」比例的 Wilson 下界 (部分解決計半票)
+    - entropy：票數分布的正規化 entropy (意見分散程度)
+    - controversy：entropy x log(1 + 總票數)，票數多且意見分散者優先
+    - polarization：兩極化程度
+    """
+    if df.empty:
+        return df.assign(total_votes=[], consensus_score=[], entropy=[], controversy=[], polarization=[])
+    counts = df[TALLY_COLUMNS].to_numpy(dtype='float64')
+    unresolved, partial, resolved = counts.T
+    totals = counts.sum(axis=1)
+    entropy = normalized_entropy(counts)
+    return df.assign(
+        total_votes=totals.astype('int64'),
+        consensus_score=wilson_lower_bound(resolved + 0.5 * partial, totals),
+        entropy=entropy,
+        controversy=entropy * np.log1p(totals),
+        polarization=polarization(unresolved, resolved, totals),
+    )
+
+
+# 頁面排序選項：顯示名稱 -> (欄位, 是否遞增)；同分時以建立時間新者優先
+SORT_MODES = {
+    '最新': ('created_at', False),
+    '共識度 (Wilson 下界)': ('consensus_score', False),
+    '爭議度': ('controversy', False),
+    '兩極化': ('polarization', False),
+    '最多票': ('total_votes', False),
+}
+
+
+def sort_suggestions(df, mode):
+    column, ascending = SORT_MODES.get(mode, SORT_MODES['最新'])
+    if column == 'created_at':
+        return df.sort_values('created_at', ascending=ascending)
+    return df.sort_values([column, 'created_at'], ascending=[ascending, False], kind='stable')
+
+
+# --- 共創新聞牆排序 ---
+
+BAYES_PRIOR_WEIGHT = 15.0  # 相當於先看過幾則反應；反應數少的貼文向中性先驗收斂
+BAYES_PRIOR = 0.5          # 固定的中性先驗 (不取自資料，避免整體支持率偏高時抬高少量反應的貼文)
+HOT_GRAVITY = 1.5         # 熱門度隨時間衰減的速度 (越大越快)
+
+
+def bayesian_support(support, totals, prior_weight=BAYES_PRIOR_WEIGHT, prior=BAYES_PRIOR):
+    """
+    貝氏平滑的支持比例：(支持 + C x 先驗) / (反應數 + C)，先驗固定為 0.5。
+    1/1 支持不會排在 90/100 之前：
+
+    >>> bayesian_support([1, 90], [1, 100]).round(3).tolist()
+    [0.531, 0.848]
+    """
+    support = np.asarray(support, dtype='float64')
+    totals = np.asarray(totals, dtype='float64')
+    return (support + prior_weight * prior) / (totals + prior_weight)
+
+
+def hot_score(support, oppose, age_hours, gravity=HOT_GRAVITY):
+    """(淨支持 + 1) / (小時數 + 2)^gravity：新貼文即使尚無反應也會先排在前面"""
+    points = np.maximum(np.asarray(support, dtype='float64') - np.asarray(oppose, dtype='float64'), 0) + 1
+    return points / np.power(np.asarray(age_hours, dtype='float64') + 2, gravity)
+
+
+def controversy_score(support, oppose):
+    """支持與反對數量相近且總數多者較高：(支持 + 反對)^(少數 / 多數)"""
+    support = np.asarray(support, dtype='float64')
+    oppose = np.asarray(oppose, dtype='float64')
+    larger = np.maximum(support, oppose)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = np.where(larger > 0, np.minimum(support, oppose) / larger, 0.0)
+    return np.where(larger > 0, np.power(support + oppose, balance), 0.0)
+
+
+def score_posts(df, now=None):
+    """
+    在含「支持 / 中立 / 反對」計數的貼文表上加入排序分數 (回傳新的 DataFrame)：
+    Total_Reactions、support_score (貝氏平滑)、hot_score (時間衰減)、controversy_score
+    """
+    if df.empty:
+        return df.assign(Total_Reactions=[], support_score=[], hot_score=[], controversy_score=[])
+    support = df['支持'].to_numpy(dtype='float64')
+    neutral = df['中立'].to_numpy(dtype='float64')
+    oppose = df['反對'].to_numpy(dtype='float64')
+    totals = support + neutral + oppose
+    created_at = pd.to_datetime(df['created_at'], utc=True, format='ISO8601')
+    now = now or pd.Timestamp.now(tz='UTC')
+    age_hours = ((now - created_at).dt.total_seconds() / 3600).clip(lower=0).to_numpy()
+    return df.assign(
+        Total_Reactions=totals.astype('int64'),
+        support_score=bayesian_support(support, totals),
+        hot_score=hot_score(support, oppose, age_hours),
+        controversy_score=controversy_score(support, oppose),
+    )
+
+
+# 頁面排序選項：顯示名稱 -> 分數欄位 (皆為遞減；同分時新貼文優先)
+WALL_SORT_MODES = {
+    '支持度': 'support_score',
+    '熱門': 'hot_score',
+    '爭議': 'controversy_score',
+    '最新': 'created_at',
+}
+
+
+def rank_posts(df):
+    """
+    每種排序方式預先排好的索引 (隨快照計算一次)：
+    頁面只需依索引取列 (df.loc[ranking])，不必每次重新排序，取前 K 則也只需切片。
+    """
+    rankings = {}
+    for mode, column in WALL_SORT_MODES.items():
+        if df.empty:
+            rankings[mode] = df.index
+        elif column == 'created_at':
+            rankings[mode] = df.sort_values('created_at', ascending=False, kind='stable').index
+        else:
+            rankings[mode] = df.sort_values([column, 'created_at'], ascending=[False, False], kind='stable').index
+    return rankings
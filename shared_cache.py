@@ -0,0 +1,302 @@
+"""
+多個 Streamlit 副本共用的快取與失效通知 (pub/sub)。
+
+st.cache_data 與 st.session_state 只存在單一程序內；在負載平衡後方執行多個副本時，
+以此模組讓各副本共用建議統計與新聞牆的快照，同一時間只有一個副本查詢 Supabase，
+寫入後的失效通知也會送達其他副本。在 secrets 設定：
+
+    [cache]
+    backend = "redis"              # redis / file / memory；未設定時維持單一程序行為
+    redis_url = "redis://localhost:6379/0"
+    # path = "/mnt/shared/lt25-cache"   # backend = "file" 時使用 (所有副本可讀寫的目錄)
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import streamlit as st
+
+FILE_POLL_INTERVAL = 0.5  # 秒；檔案後端檢查通知的間隔
+CLEAR_CHANNEL = "cache:clear"
+ROLE_CHANNEL = "cache:roles"
+
+_clear_count = 0  # 本程序收到的清除次數 (含其他副本)，供 Session 判斷快取是否已失效
+_role_count = 0   # 本程序收到的角色變更次數 (含其他副本)
+_role_listeners = []  # 角色變更時呼叫 (例如清除角色快取)
+
+
+# --- 後端 ---
+
+class MemoryCacheBackend:
+    """單一程序內的實作 (開發與測試用)，介面與共用後端相同"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self._locks = {}
+        self._subscribers = defaultdict(list)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+        if item is None or (item[0] is not None and item[0] < time.time()):
+            return None
+        return item[1]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.time() + ttl if ttl else None, value)
+
+    def acquire(self, key, ttl):
+        """取得跨副本的互斥鎖；ttl 秒後自動失效，回傳是否取得"""
+        now = time.time()
+        with self._lock:
+            if self._locks.get(key, 0) > now:
+                return False
+            self._locks[key] = now + ttl
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._locks.pop(key, None)
+
+    def publish(self, channel, message=""):
+        for callback in list(self._subscribers[channel]):
+            callback(message)
+
+    def subscribe(self, channel, callback):
+        self._subscribers[channel].append(callback)
+
+
+class FileCacheBackend:
+    """以共用目錄 (例如同一台主機或網路磁碟) 交換資料；不需額外服務"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._subscribers = defaultdict(list)
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _file(self, kind, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, f"{kind}-{digest}")
+
+    def get(self, key):
+        try:
+            with open(self._file('data', key), 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        target = self._file('data', key)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump((time.time() + ttl if ttl else None, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)  # 原子替換，讀取端不會讀到寫一半的檔案
+
+    def acquire(self, key, ttl):
+        lock_file = self._file('lock', key)
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file) > ttl:
+                    os.remove(lock_file)  # 持有者已逾時
+                    return self.acquire(key, ttl)
+            except OSError:
+                pass
+            return False
+        os.close(fd)
+        return True
+
+    def release(self, key):
+        try:
+            os.remove(self._file('lock', key))
+        except OSError:
+            pass
+
+    def publish(self, channel, message=""):
+        target = self._file('channel', channel)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(f"{time.time_ns()}\n{message}")
+        os.replace(tmp, target)
+
+    def _read_channel(self, channel):
+        try:
+            with open(self._file('channel', channel), encoding='utf-8') as f:
+                stamp, _, message = f.read().partition("\n")
+            return stamp, message
+        except OSError:
+            return None, None
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            if channel not in self._seen:
+                self._seen[channel] = self._read_channel(channel)[0]
+            self._subscribers[channel].append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name="shared-cache-poll", daemon=True)
+                self._thread.start()
+
+    def _poll(self):
+        while True:
+            time.sleep(FILE_POLL_INTERVAL)
+            with self._lock:
+                channels = list(self._subscribers.items())
+            for channel, callbacks in channels:
+                stamp, message = self._read_channel(channel)
+                if stamp is not None and stamp != self._seen.get(channel):
+                    self._seen[channel] = stamp
+                    for callback in callbacks:
+                        callback(message)
+
+
+class RedisCacheBackend:
+    """以 Redis (或相容服務) 共用 (需安裝 redis 套件)"""
+
+    _RELEASE_SCRIPT = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, url, prefix="lt25:cache:"):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._redis.ping()  # from_url 不會實際連線：在此確認可用，失敗時由 get_shared_cache 退回單一程序
+        self._prefix = prefix
+        self._token = uuid.uuid4().hex  # 只釋放自己持有的鎖
+        self._release = self._redis.register_script(self._RELEASE_SCRIPT)
+        self._subscribers = defaultdict(list)
+        self._lock = threading.Lock()
+        self._pubsub = None
+
+    def get(self, key):
+        raw = self._redis.get(self._prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._redis.set(self._prefix + key, raw, px=int(ttl * 1000) if ttl else None)
+
+    def acquire(self, key, ttl):
+        return bool(self._redis.set(self._prefix + "lock:" + key, self._token, nx=True, px=int(ttl * 1000)))
+
+    def release(self, key):
+        self._release(keys=[self._prefix + "lock:" + key], args=[self._token])
+
+    def publish(self, channel, message=""):
+        self._redis.publish(self._prefix + channel, message)
+
+    def subscribe(self, channel, callback):
+        # 整個程序只用一個 pubsub 連線與執行緒：以 pattern 訂閱所有頻道，再依頻道分派
+        with self._lock:
+            self._subscribers[channel].append(callback)
+            if self._pubsub is None:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(**{self._prefix + "*": self._dispatch})
+                pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+                self._pubsub = pubsub
+
+    def _dispatch(self, message):
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode('utf-8')
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel[len(self._prefix):], ()))
+        for callback in callbacks:
+            callback(message['data'])
+
+
+# --- 設定 ---
+
+def create_cache_backend(config):
+    """依 [cache] 設定建立後端；未設定時回傳 None (單一程序)"""
+    backend = config.get("backend")
+    if backend == "redis":
+        return RedisCacheBackend(config["redis_url"])
+    if backend == "file":
+        return FileCacheBackend(config.get("path", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".shared_cache")))
+    if backend == "memory":
+        return MemoryCacheBackend()
+    return None
+
+
+@st.cache_resource
+def get_shared_cache():
+    """整個程序共用的快取後端；連線失敗時退回單一程序行為"""
+    try:
+        backend = create_cache_backend(dict(st.secrets.get("cache", {})))
+        if backend is not None:
+            # 其他副本清除快取時，一併清除本程序的 st.cache_data
+            backend.subscribe(CLEAR_CHANNEL, lambda _message: _clear_local())
+            backend.subscribe(ROLE_CHANNEL, lambda _message: _roles_changed_local())
+    except Exception:
+        return None
+    return backend
+
+
+def _clear_local():
+    global _clear_count
+    st.cache_data.clear()
+    _clear_count += 1
+
+
+def cache_generation():
+    """每次 (本程序或其他副本) 清除快取後遞增"""
+    return _clear_count
+
+
+def clear_all_caches():
+    """清除本程序與其他副本的 st.cache_data (取代 st.cache_data.clear())"""
+    _clear_local()
+    backend = get_shared_cache()
+    if backend is not None:
+        try:
+            backend.publish(CLEAR_CHANNEL)
+        except Exception:
+            pass
+
+
+def on_role_change(callback):
+    """登記角色變更時要執行的清除動作 (本程序與其他副本變更時皆會呼叫)"""
+    if callback not in _role_listeners:
+        _role_listeners.append(callback)
+
+
+def _roles_changed_local():
+    global _role_count
+    for callback in list(_role_listeners):
+        try:
+            callback()
+        except Exception:
+            pass
+    _role_count += 1
+
+
+def role_generation():
+    """每次 (本程序或其他副本) 變更使用者角色後遞增"""
+    return _role_count
+
+
+def bump_role_generation():
+    """通知本程序與其他副本角色已變更：只清除角色快取，不影響其他 st.cache_data"""
+    _roles_changed_local()
+    backend = get_shared_cache()
+    if backend is not None:
+        try:
+            backend.publish(ROLE_CHANNEL)
+        except Exception:
+            pass
@@ -0,0 +1,93 @@
+"""
+儀表板與新聞牆的共用快照 (讀取函式與讀取器)。
+
+讀取函式放在頁面之外：頁面與啟動預熱 (startup_utils) 以相同名稱取得同一個讀取器，
+第一位訪客開啟頁面時，預熱中的首次查詢即可直接沿用，不需再查詢一次。
+"""
+import functools
+
+import pandas as pd
+
+from data_layer import get_reader
+from scoring import rank_posts, score_posts, score_suggestions
+
+REACTION_TYPES = ["支持", "中立", "反對"]
+
+
+# --- 紅隊儀表板 ---
+
+def load_dashboard_data(client, event_id):
+    """獲取建議列表及其投票狀態（呼叫 Supabase RPC），於背景執行緒執行；共識指標隨每份快照計算一次"""
+    response = client.rpc('get_suggestion_status', {'p_event_id': event_id}).execute()
+    df = pd.DataFrame(response.data)
+
+    numeric_cols = ['unresolved_count', 'partial_count', 'resolved_count']
+    if not df.empty:
+        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+        df = score_suggestions(df)
+
+    return df
+
+
+def get_dashboard_reader(client, event_id):
+    """所有使用者共用同一份建議統計快照：由背景排程定期更新，頁面讀取不需等待查詢；連續失敗則斷路"""
+    return get_reader(f'dashboard:{event_id}', functools.partial(load_dashboard_data, client, event_id))
+
+
+# --- 共創新聞牆 ---
+
+def load_posts_and_reactions(client, event_id):
+    """
+    從 Supabase 獲取所有貼文、作者暱稱及 Reactions (使用雙查詢穩定版)，於背景執行緒執行。
+    反應計數、排序分數與各排序方式的索引隨每份快照計算一次，所有使用者共用。
+    """
+    empty_reactions_df = pd.DataFrame(columns=['post_id', 'reaction_type'])
+
+    # 查詢 1 (主貼文)
+    posts_res = client.table('posts').select(
+        "id, content, created_at, user_id, topic, post_type"
+    ).eq('event_id', event_id).eq('is_hidden', False).order("created_at", desc=True).execute()
+
+    df_posts = pd.DataFrame(posts_res.data)
+
+    # 查詢 2 (作者暱稱和角色)
+    if not df_posts.empty:
+        df_posts['id'] = df_posts['id'].astype(str)
+        df_posts['user_id'] = df_posts['user_id'].astype(str)
+        user_ids = df_posts['user_id'].unique().tolist()
+
+        profiles_res = client.table('profiles').select("id, username, role").in_("id", user_ids).execute()
+        df_profiles = pd.DataFrame(profiles_res.data).rename(columns={'id': 'user_id'})
+        df_profiles['user_id'] = df_profiles['user_id'].astype(str)
+
+        df_merged = pd.merge(df_posts, df_profiles, on='user_id', how='left')
+
+    else:
+        df_merged = df_posts
+
+    reactions_res = client.table('reactions').select("post_id, reaction_type").eq('event_id', event_id).execute()
+    df_reactions = pd.DataFrame(reactions_res.data)
+
+    if not df_reactions.empty:
+        df_reactions['post_id'] = df_reactions['post_id'].astype(str)
+    else:
+        df_reactions = empty_reactions_df.copy()
+
+    if 'username' not in df_merged.columns:
+        df_merged['username'] = None
+    if 'role' not in df_merged.columns:
+        df_merged['role'] = 'user'
+
+    # 各貼文的反應計數 (向量化樞紐)
+    counts = df_reactions.groupby(['post_id', 'reaction_type']).size().unstack(fill_value=0)
+    counts = counts.reindex(index=df_merged.get('id', pd.Series(dtype=str)), columns=REACTION_TYPES, fill_value=0)
+    df_merged[REACTION_TYPES] = counts.to_numpy(dtype='int64')
+    df_merged['created_ts'] = pd.to_datetime(df_merged.get('created_at', pd.Series(dtype=str)), utc=True, format='ISO8601')
+    df_merged = score_posts(df_merged)
+
+    return df_merged, df_reactions, rank_posts(df_merged)
+
+
+def get_wall_reader(client, event_id):
+    """所有使用者共用同一份新聞牆快照：由背景排程定期更新，頁面讀取不需等待查詢；連續失敗則斷路"""
+    return get_reader(f'wall:{event_id}', functools.partial(load_posts_and_reactions, client, event_id))
@@ -0,0 +1,93 @@
+"""
+冷啟動分析與預熱。
+
+每個頁面都會載入 auth_utils，由其在程序第一次載入時呼叫 start_warmup() (不論第一位訪客開啟哪一頁)：
+在背景執行緒執行已註冊的預熱函式 (建立儀表板與新聞牆的讀取器並完成第一次查詢)，
+開啟這兩頁的訪客會直接沿用進行中的查詢或已完成的快照；各項目的耗時可在管理員後台查看。
+Streamlit 在第一個 Session 之前不執行任何使用者程式，因此預熱最早於第一位訪客載入頁面時開始。
+"""
+import sys
+import threading
+import time
+
+import streamlit as st
+
+PROCESS_STARTED = time.time()
+
+_warmups = {}
+_report = []
+_report_lock = threading.Lock()
+
+
+def _record(name, kind, seconds, new_modules):
+    with _report_lock:
+        _report.append({
+            '項目': name,
+            '類型': kind,
+            '秒數': round(seconds, 3),
+            '新載入模組數': new_modules,
+        })
+
+
+def register_warmup(func):
+    """裝飾器：註冊於啟動時在背景執行的預熱函式 (頁面重新執行時以同名覆蓋，不會重複註冊)"""
+    _warmups[func.__name__] = func
+    return func
+
+
+def _run_warmup():
+    for func in list(_warmups.values()):
+        before = len(sys.modules)
+        started = time.perf_counter()
+        try:
+            func()
+            kind = 'warmup'
+        except Exception:
+            kind = 'warmup (失敗)'
+        _record(func.__name__, kind, time.perf_counter() - started, len(sys.modules) - before)
+
+
+def _warm_reader(get_reader_for):
+    # 與頁面以相同名稱建立讀取器；頁面開啟時直接沿用這次查詢 (進行中則等待同一次結果)
+    from data_layer import get_read_client
+    from event_utils import active_event_id
+    client = get_read_client()
+    if client is None:
+        raise RuntimeError("無法建立讀取連線")
+    reader = get_reader_for(client, active_event_id(st.secrets))
+    snapshot = reader.get()
+    if snapshot.is_empty:
+        raise RuntimeError(f"{reader.name} 首次讀取失敗: {snapshot.error}")
+
+
+@register_warmup
+def warm_dashboard_snapshot():
+    """預先建立紅隊儀表板的讀取器並完成第一次查詢 (同時建立共用的讀取連線)"""
+    from snapshots import get_dashboard_reader
+    _warm_reader(get_dashboard_reader)
+
+
+@register_warmup
+def warm_wall_snapshot():
+    """預先建立共創新聞牆的讀取器並完成第一次查詢"""
+    from snapshots import get_wall_reader
+    _warm_reader(get_wall_reader)
+
+
+@st.cache_resource
+def start_warmup():
+    """每個程序只執行一次；立即返回，不阻塞目前的頁面"""
+    thread = threading.Thread(target=_run_warmup, name="startup-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_startup_report():
+    """[{'項目', '類型', '秒數', '新載入模組數'}, ...]"""
+    with _report_lock:
+        return list(_report)
+
+
+def is_warmup_done():
+    thread = start_warmup()
+    return not thread.is_alive()
@@ -0,0 +1,112 @@
+"""
+資料存取 client 的建立入口。
+
+依 `.streamlit/secrets.toml` 的 [storage] 設定選擇後端：
+
+    [storage]
+    backend = "supabase"          # 或 "sqlite" (離線 / 本機優先模式)
+    sqlite_path = "lt25_local.db"
+    offline_fallback = true       # Supabase 無法連線時自動改用本機 SQLite
+
+兩種後端都提供相同的 table(...) / rpc(...) / auth 介面，頁面程式不需區分。
+使用哪個後端在整個程序中只決定一次 (offline_fallback 只在第一次建立 client 時探測)，
+所有 Session 與讀寫 client 皆使用同一個後端；網路恢復後需重新啟動程序才會改回 Supabase。
+"""
+import os
+import threading
+
+from supabase import create_client
+
+from local_store import LocalClient, create_local_client, DEFAULT_DB_PATH
+
+_backend = None  # 本程序使用的後端：'supabase' 或 'sqlite'
+_backend_lock = threading.Lock()
+
+
+def _storage_config(secrets):
+    try:
+        return dict(secrets.get("storage", {}))
+    except Exception:
+        return {}
+
+
+def _create_supabase_client(secrets, is_admin):
+    if "supabase" not in secrets or "url" not in secrets["supabase"]:
+        return None
+    config_section = secrets["supabase"]
+    key = config_section.get("service_role_key") if is_admin else config_section.get("key")
+    if not key:
+        return None
+    return create_client(config_section["url"], key)
+
+
+def _is_reachable(client):
+    """以最小查詢確認 Supabase 可連線"""
+    try:
+        client.table('suggestions').select("id").limit(1).execute()
+        return True
+    except Exception:
+        return False
+
+
+def _decide_backend(secrets, config):
+    if config.get("backend", "supabase") == "sqlite":
+        return "sqlite"
+    if not config.get("offline_fallback", False):
+        return "supabase"
+    try:
+        client = _create_supabase_client(secrets, is_admin=False)
+    except Exception:
+        client = None
+    return "supabase" if client is not None and _is_reachable(client) else "sqlite"
+
+
+def storage_backend(secrets):
+    """回傳本程序使用的後端 ('supabase' / 'sqlite')；第一次呼叫時決定，之後不再探測"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _decide_backend(secrets, _storage_config(secrets))
+        return _backend
+
+
+def create_storage_client(secrets, is_admin=False):
+    """回傳 Supabase client 或本機 LocalClient；皆無法建立時回傳 None"""
+    if storage_backend(secrets) == "sqlite":
+        return create_local_client(_storage_config(secrets).get("sqlite_path", DEFAULT_DB_PATH))
+    try:
+        return _create_supabase_client(secrets, is_admin)
+    except Exception:
+        return None
+
+
+def is_local_client(client):
+    return isinstance(client, LocalClient)
+
+
+def load_cli_secrets():
+    """命令列工具用：讀取 .streamlit/secrets.toml (不存在時回傳空字典)"""
+    secrets_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.streamlit', 'secrets.toml')
+    if not os.path.exists(secrets_path):
+        return {}
+    import tomllib
+    with open(secrets_path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def load_cli_credentials():
+    """命令列工具用：優先讀取環境變數，其次讀取 .streamlit/secrets.toml 的 service_role_key"""
+    url = os.environ.get('SUPABASE_URL')
+    key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY') or os.environ.get('SUPABASE_KEY')
+    if url and key:
+        return url, key
+
+    section = load_cli_secrets().get('supabase', {})
+    if section:
+        return section.get('url'), section.get('service_role_key') or section.get('key')
+    return None, None
+
+
+def create_remote_client(secrets):
+    """同步用：不論 [storage] 設定，一律以 service_role_key 連線 Supabase"""
+    return _create_supabase_client(secrets, is_admin=True)
@@ -0,0 +1,124 @@
+"""
+大型開放資料 (數百 MB) 的分塊彙總。
+
+以 pd.read_csv(chunksize=...) 逐塊讀取，每塊只保留需要的欄位並先 groupby 累加，
+記憶體用量只與 chunksize 及群組數 (區域 x 年度) 有關，與檔案大小無關。
+輸出與 datasets.py 的圖表所需格式相同：
+- hotspot_region_year：['地區', '年度', '熱點數量'] (同 iTaiwan 熱點 melt 後的格式)
+- corpus_year_totals：['年度_西元', '採集數'] (同語料庫年度彙總)
+
+也可在命令列預先彙總成小檔：
+
+    python stream_agg.py hotspots iTaiwan_hotspot_records.csv --output hotspots_region_year.csv
+"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from cleaning_utils import MINGUO_OFFSET
+
+DEFAULT_CHUNKSIZE = 200_000
+
+# 與 iTaiwan_spots.csv 的區域分組一致；福建省 (金門、連江) 歸入離島區域
+COUNTY_REGIONS = {
+    '北部區域': ['臺北市', '新北市', '基隆市', '新竹市', '桃園市', '新竹縣', '宜蘭縣'],
+    '中部區域': ['臺中市', '苗栗縣', '彰化縣', '南投縣', '雲林縣'],
+    '南部區域': ['高雄市', '臺南市', '嘉義市', '嘉義縣', '屏東縣', '澎湖縣'],
+    '東部區域': ['花蓮縣', '臺東縣'],
+    '離島區域': ['金門縣', '連江縣'],
+}
+REGION_OF_COUNTY = {county: region for region, counties in COUNTY_REGIONS.items() for county in counties}
+
+
+def _to_gregorian(years):
+    # 同一份檔案可能混用民國與西元年
+    years = pd.to_numeric(years, errors='coerce')
+    return years.where(years > MINGUO_OFFSET, years + MINGUO_OFFSET)
+
+
+def aggregate_chunks(path, by, value=None, usecols=None, dtype=None, prepare=None,
+                     chunksize=DEFAULT_CHUNKSIZE, stats=None):
+    """
+    逐塊讀取並累加 groupby 結果；value 為 None 時計算筆數。
+    prepare(chunk) 可在彙總前轉換欄位 (例如對應區域、民國年轉西元)。
+    回傳以 by 為索引的 Series。
+    """
+    totals = None
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize, encoding='utf-8-sig'):
+        if stats is not None:
+            stats['rows'] = stats.get('rows', 0) + len(chunk)
+            stats['chunks'] = stats.get('chunks', 0) + 1
+        if prepare is not None:
+            chunk = prepare(chunk)
+        grouped = chunk.groupby(by, observed=True)
+        part = grouped.size() if value is None else grouped[value].sum()
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    return totals if totals is not None else pd.Series(dtype='float64')
+
+
+def hotspot_region_year(path, county_col='縣市', year_col='年度', chunksize=DEFAULT_CHUNKSIZE, stats=None):
+    """逐筆熱點資料 -> 各區域各年度熱點數量"""
+    def prepare(chunk):
+        county = chunk[county_col].str.strip().str.replace('台', '臺', regex=False)
+        return pd.DataFrame({
+            '地區': county.map(REGION_OF_COUNTY),
+            '年度': _to_gregorian(chunk[year_col]),
+        }).dropna()
+
+    totals = aggregate_chunks(
+        path, by=['地區', '年度'], usecols=[county_col, year_col],
+        dtype={county_col: 'category', year_col: 'float64'},
+        prepare=prepare, chunksize=chunksize, stats=stats,
+    )
+    df = totals.rename('熱點數量').reset_index()
+    df['年度'] = df['年度'].astype(int)
+    df['熱點數量'] = df['熱點數量'].astype(int)
+    return df.sort_values(['地區', '年度'], ignore_index=True)
+
+
+def corpus_year_totals(path, year_col='年度', value_col='採集數', chunksize=DEFAULT_CHUNKSIZE, stats=None):
+    """逐村里語料採集資料 -> 各年度採集數總和"""
+    def prepare(chunk):
+        return pd.DataFrame({'年度_西元': _to_gregorian(chunk[year_col]), value_col: chunk[value_col]})
+
+    totals = aggregate_chunks(
+        path, by='年度_西元', value=value_col, usecols=[year_col, value_col],
+        dtype={year_col: 'float64', value_col: 'float64'},
+        prepare=prepare, chunksize=chunksize, stats=stats,
+    )
+    df = totals.rename(value_col).reset_index()
+    df['年度_西元'] = df['年度_西元'].astype(int)
+    return df.sort_values('年度_西元', ignore_index=True)
+
+
+PIPELINES = {
+    'hotspots': hotspot_region_year,
+    'corpus': corpus_year_totals,
+}
+
+
+# --- 命令列 ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分塊彙總大型開放資料 CSV")
+    parser.add_argument('pipeline', choices=list(PIPELINES))
+    parser.add_argument('input')
+    parser.add_argument('--output', help="輸出 CSV 路徑，預設為 <pipeline>_aggregated.csv")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    stats = {}
+    started = time.perf_counter()
+    df = PIPELINES[args.pipeline](args.input, chunksize=args.chunksize, stats=stats)
+    seconds = time.perf_counter() - started
+
+    output = args.output or f"{args.pipeline}_aggregated.csv"
+    df.to_csv(output, index=False, encoding='utf-8-sig')
+    print(f"已彙總 {stats.get('rows', 0):,} 筆 ({stats.get('chunks', 0)} 塊) 為 {len(df)} 列至 {output} ({seconds:.1f} 秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""
+本機 SQLite 與 Supabase 之間的雙向同步。
+
+推送 (push)：將本機新增或修改的 suggestions / posts / votes / reactions 依 updated_at 游標分批讀出，
+以 upsert 寫入 Supabase；votes / reactions 以 unique_vote / unique_reaction 的欄位作為衝突鍵，重複執行不會產生重複資料。
+拉取 (pull)：依遠端 updated_at 游標增量讀取，寫回本機；遠端帳號依 Email 對應本機帳號。
+因帳號或上層資料不存在而略過的資料不會被游標越過，下次同步會再嘗試。
+刪除：兩端的建議與貼文刪除都記錄在 sync_tombstones，推送與拉取時互相套用 (子表由 CASCADE 處理)。
+
+衝突規則：以 updated_at 較新者為準；雙方時間相同視為已同步；一方刪除時以刪除為準。
+遠端的統計觸發器以資料列的 updated_at 歸入時間區間，離線期間的活動不會全部擠在同步當下；
+本機的統計則以寫入本機的時間為準 (拉回的資料計入同步當下)。
+遠端需使用 service_role_key (需代替其他使用者寫入投票與反應)。
+
+    python sync_engine.py --sqlite lt25_local.db --direction both
+"""
+import argparse
+import datetime
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+
+DEFAULT_BATCH_SIZE = 500
+
+# 表名 -> 同步設定；依外鍵順序排列
+TABLE_SPECS = {
+    'suggestions': {
+        'columns': ['id', 'event_id', 'content', 'cate', 'is_hidden', 'created_at', 'updated_at'],
+        'key': ['id'],
+        'user_col': None,
+    },
+    'posts': {
+        'columns': ['id', 'event_id', 'user_id', 'topic', 'post_type', 'content', 'is_hidden', 'created_at', 'updated_at'],
+        'key': ['id'],
+        'user_col': 'user_id',
+    },
+    'votes': {
+        'columns': ['event_id', 'suggestion_id', 'user_id', 'vote_type', 'created_at', 'updated_at'],
+        'key': ['suggestion_id', 'user_id'],
+        'user_col': 'user_id',
+    },
+    'reactions': {
+        'columns': ['event_id', 'post_id', 'user_id', 'reaction_type', 'created_at', 'updated_at'],
+        'key': ['post_id', 'user_id'],
+        'user_col': 'user_id',
+    },
+}
+SYNC_ORDER = list(TABLE_SPECS)
+
+
+@dataclass
+class SyncStats:
+    table: str
+    direction: str
+    rows: int = 0
+    unchanged: int = 0
+    conflicts: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            '資料表': self.table,
+            '方向': self.direction,
+            '寫入筆數': self.rows,
+            '未變動': self.unchanged,
+            '衝突 (保留較新者)': self.conflicts,
+            '略過': self.skipped,
+            '秒數': round(self.seconds, 2),
+            '筆/秒': round(self.throughput, 1),
+        }
+
+
+def _parse_ts(value):
+    if value is None:
+        return None
+    return datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
+
+def _row_key(row, key_cols):
+    return tuple(str(row[c]) for c in key_cols)
+
+
+class SyncEngine:
+
+    def __init__(self, local_client, remote_client, batch_size=DEFAULT_BATCH_SIZE):
+        self.local = local_client
+        self.store = local_client.store
+        self.remote = remote_client
+        self.batch_size = batch_size
+        self._local_user_ids = None  # 遠端帳號 id -> 本機帳號 id (pull_profiles 建立)
+
+    # --- 游標 ---
+
+    def _get_state(self, key, default=None):
+        rows = self.store.query("SELECT value FROM sync_state WHERE key = ?", (key,))
+        return rows[0]['value'] if rows else default
+
+    def _set_state(self, key, value):
+        self.store.write_many(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value RETURNING key",
+            [(key, value)],
+        )
+
+    # --- 使用者對應 ---
+
+    def pull_profiles(self):
+        """
+        將遠端帳號建立為本機帳號 (無密碼)，讓拉回的貼文與投票符合外鍵。
+        同一 Email 已在本機註冊為另一個帳號時，拉回的資料改掛在該本機帳號下。
+        回傳 (新增帳號數, 依 Email 對應到既有本機帳號的數量)。
+        """
+        remote_profiles = self.remote.table('profiles').select("id, email, role, username").execute().data or []
+        inserted = 0
+        remapped = 0
+        self._local_user_ids = {}
+        with self.store.batch():
+            for p in remote_profiles:
+                created = self.store.write_many(
+                    "INSERT INTO users (id, email) VALUES (?, ?) ON CONFLICT DO NOTHING RETURNING id",
+                    [(p['id'], p['email'])],
+                )
+                existing = self.store.query("SELECT id FROM users WHERE email = ?", (p['email'],))
+                if not existing:
+                    continue
+                self._local_user_ids[str(p['id'])] = existing[0]['id']
+                if existing[0]['id'] != p['id']:
+                    remapped += 1  # 同一 Email 已在本機註冊為另一個帳號
+                    continue
+                self.store.write_many(
+                    "INSERT INTO profiles (id, email, role, username) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET role = excluded.role, username = excluded.username RETURNING id",
+                    [(p['id'], p['email'], p['role'], p.get('username'))],
+                )
+                inserted += len(created)
+        return inserted, remapped
+
+    def _map_users(self, local_user_ids):
+        """本機帳號 id -> 遠端帳號 id (以 Email 對應)；找不到的帳號不在結果中"""
+        local_user_ids = list({str(u) for u in local_user_ids})
+        if not local_user_ids:
+            return {}
+        placeholders = ", ".join("?" * len(local_user_ids))
+        local_users = self.store.query(f"SELECT id, email FROM users WHERE id IN ({placeholders})", local_user_ids)
+        emails = [u['email'] for u in local_users]
+        remote_users = self.remote.table('profiles').select("id, email").in_('email', emails).execute().data or []
+        remote_by_email = {u['email']: u['id'] for u in remote_users}
+        return {u['id']: remote_by_email[u['email']] for u in local_users if u['email'] in remote_by_email}
+
+    def pull_events(self):
+        """活動列表以雲端為準，讓拉回的資料符合 event_id 外鍵"""
+        remote_events = self.remote.table('events').select("id, name, is_active").execute().data or []
+        if remote_events:
+            self.local.table('events').upsert(remote_events, on_conflict='id').execute()
+        return len(remote_events)
+
+    # --- 推送 ---
+
+    def _remote_versions(self, table, rows):
+        """一次查詢取得遠端同鍵資料的 updated_at"""
+        spec = TABLE_SPECS[table]
+        key_cols = spec['key']
+        query = self.remote.table(table).select(", ".join(key_cols + ['updated_at']))
+        for col in key_cols:
+            query = query.in_(col, list({str(r[col]) for r in rows}))
+        return {_row_key(r, key_cols): r['updated_at'] for r in (query.execute().data or [])}
+
+    def push_table(self, table):
+        spec = TABLE_SPECS[table]
+        stats = SyncStats(table, 'push')
+        started = time.perf_counter()
+        cursor_ts = self._get_state(f"push:{table}:ts", "")
+        cursor_id = self._get_state(f"push:{table}:id", "")
+        columns = ", ".join(spec['columns'] + (['id'] if 'id' not in spec['columns'] else []))
+
+        while True:
+            rows = self.store.query(
+                f"SELECT {columns} FROM {table} "
+                "WHERE updated_at > ? OR (updated_at = ? AND id > ?) "
+                "ORDER BY updated_at, id LIMIT ?",
+                (cursor_ts, cursor_ts, cursor_id, self.batch_size),
+            )
+            if not rows:
+                break
+            last = rows[-1]
+
+            if spec['user_col']:
+                user_map = self._map_users(r[spec['user_col']] for r in rows)
+                mapped = []
+                for r in rows:
+                    remote_user = user_map.get(str(r[spec['user_col']]))
+                    if remote_user is None:
+                        stats.skipped += 1  # 本機帳號在雲端不存在
+                        continue
+                    mapped.append(dict(r, **{spec['user_col']: remote_user}))
+                rows = mapped
+
+            payload = []
+            if rows:
+                remote_versions = self._remote_versions(table, rows)
+                for r in rows:
+                    remote_ts = _parse_ts(remote_versions.get(_row_key(r, spec['key'])))
+                    local_ts = _parse_ts(r['updated_at'])
+                    if remote_ts is not None and remote_ts == local_ts:
+                        stats.unchanged += 1
+                    elif remote_ts is not None and remote_ts > local_ts:
+                        stats.conflicts += 1
+                    else:
+                        payload.append({c: r[c] for c in spec['columns']})
+
+            if payload:
+                self.remote.table(table).upsert(payload, on_conflict=",".join(spec['key'])).execute()
+                stats.rows += len(payload)
+
+            cursor_ts, cursor_id = last['updated_at'], last['id']
+            self._set_state(f"push:{table}:ts", cursor_ts)
+            self._set_state(f"push:{table}:id", cursor_id)
+
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def push_deletes(self):
+        """將本機刪除的建議與貼文同步刪除 (子表由遠端 CASCADE 處理)"""
+        deleted = 0
+        for table in ['suggestions', 'posts']:
+            ids = [r['row_id'] for r in self.store.query(
+                "SELECT row_id FROM sync_tombstones WHERE table_name = ?", (table,)
+            )]
+            for start in range(0, len(ids), self.batch_size):
+                chunk = ids[start:start + self.batch_size]
+                self.remote.table(table).delete().in_('id', chunk).execute()
+                placeholders = ", ".join("?" * len(chunk))
+                self.store.write_many(
+                    f"DELETE FROM sync_tombstones WHERE table_name = ? AND row_id IN ({placeholders}) RETURNING row_id",
+                    [[table] + chunk],
+                )
+                deleted += len(chunk)
+        return deleted
+
+    # --- 拉取 ---
+
+    def pull_table(self, table):
+        spec = TABLE_SPECS[table]
+        stats = SyncStats(table, 'pull')
+        started = time.perf_counter()
+        cursor_ts = self._get_state(f"pull:{table}:ts")
+        push_cursor = _parse_ts(self._get_state(f"push:{table}:ts") or None)
+        pull_columns = spec['columns'] + (['id'] if 'id' not in spec['columns'] else [])
+        if spec['user_col'] and self._local_user_ids is None:
+            self.pull_profiles()
+
+        offset = 0
+        newest = previous = cursor_ts  # previous：newest 之前的上一個時間戳記
+        blocked = False  # 已遇到略過的資料：游標停在其之前
+        while True:
+            query = self.remote.table(table).select(", ".join(pull_columns))
+            if cursor_ts:
+                query = query.gt('updated_at', cursor_ts)
+            rows = query.order('updated_at').order('id').range(offset, offset + self.batch_size - 1).execute().data or []
+            if not rows:
+                break
+            offset += len(rows)
+
+            skipped = set()
+            mapped_rows = []
+            for i, r in enumerate(rows):
+                if spec['user_col']:
+                    local_user = self._local_user_ids.get(str(r[spec['user_col']]))
+                    if local_user is None:
+                        stats.skipped += 1  # 遠端帳號尚未同步到本機
+                        skipped.add(i)
+                        continue
+                    r = dict(r, **{spec['user_col']: local_user})
+                mapped_rows.append((i, r))
+
+            local_versions = self._local_versions(table, [r for _, r in mapped_rows]) if mapped_rows else {}
+            payload = []
+            for i, r in mapped_rows:
+                local_ts = _parse_ts(local_versions.get(_row_key(r, spec['key'])))
+                remote_ts = _parse_ts(r['updated_at'])
+                if local_ts is not None and local_ts == remote_ts:
+                    stats.unchanged += 1
+                elif local_ts is not None and local_ts > remote_ts and (push_cursor is None or local_ts > push_cursor):
+                    stats.conflicts += 1  # 本機有較新且尚未推送的修改
+                else:
+                    payload.append((i, r))
+            written, failed = self._write_local(table, [r for _, r in payload], stats)
+            stats.rows += written
+            skipped.update(payload[j][0] for j in failed)
+
+            # 游標只前進到第一筆略過資料之前 (不含同一時間戳記)，略過的資料下次會再拉取
+            for i, r in enumerate(rows):
+                if blocked:
+                    break
+                ts = r['updated_at']
+                if i in skipped:
+                    blocked = True
+                    if newest == ts:
+                        newest = previous
+                elif ts != newest:
+                    previous, newest = newest, ts
+
+            if len(rows) < self.batch_size:
+                break
+
+        if newest and newest != cursor_ts:
+            self._set_state(f"pull:{table}:ts", newest)
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def pull_deletes(self):
+        """套用遠端刪除的建議與貼文 (遠端 sync_tombstones 由 dashboard.sql 的觸發器記錄)"""
+        cursor_ts = self._get_state("pull:tombstones:ts")
+        query = self.remote.table('sync_tombstones').select("table_name, row_id, deleted_at")
+        if cursor_ts:
+            query = query.gt('deleted_at', cursor_ts)
+        tombstones = query.order('deleted_at').execute().data or []
+        deleted = 0
+        for table in ['suggestions', 'posts']:
+            ids = [str(t['row_id']) for t in tombstones if t['table_name'] == table]
+            for start in range(0, len(ids), self.batch_size):
+                chunk = ids[start:start + self.batch_size]
+                self.local.table(table).delete().in_('id', chunk).execute()
+                # 本機刪除觸發器產生的紀錄不需再推送回遠端
+                placeholders = ", ".join("?" * len(chunk))
+                self.store.write_many(
+                    f"DELETE FROM sync_tombstones WHERE table_name = ? AND row_id IN ({placeholders}) RETURNING row_id",
+                    [[table] + chunk],
+                )
+                deleted += len(chunk)
+        if tombstones:
+            self._set_state("pull:tombstones:ts", tombstones[-1]['deleted_at'])
+        return deleted
+
+    def _local_versions(self, table, rows):
+        key_cols = TABLE_SPECS[table]['key']
+        clauses, params = [], []
+        for col in key_cols:
+            values = list({str(r[col]) for r in rows})
+            clauses.append(f"{col} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        local_rows = self.store.query(
+            f"SELECT {', '.join(key_cols)}, updated_at FROM {table} WHERE {' AND '.join(clauses)}", params
+        )
+        return {_row_key(r, key_cols): r['updated_at'] for r in local_rows}
+
+    def _write_local(self, table, payload, stats):
+        """回傳 (寫入筆數, 寫入失敗的 payload 索引)"""
+        if not payload:
+            return 0, []
+        on_conflict = ", ".join(TABLE_SPECS[table]['key'])
+        try:
+            self.local.table(table).upsert(payload, on_conflict=on_conflict).execute()
+            return len(payload), []
+        except sqlite3.IntegrityError:
+            # 批次中有外鍵不符 (例如上層資料未同步)，改逐筆寫入並略過失敗者
+            written = 0
+            failed = []
+            for i, row in enumerate(payload):
+                try:
+                    self.local.table(table).upsert(row, on_conflict=on_conflict).execute()
+                    written += 1
+                except sqlite3.IntegrityError:
+                    stats.skipped += 1
+                    failed.append(i)
+            return written, failed
+
+    # --- 執行 ---
+
+    def run(self, direction='both'):
+        """回傳 [SyncStats, ...]"""
+        report = []
+        if direction in ('pull', 'both'):
+            self.pull_events()
+            self.pull_profiles()
+            for table in SYNC_ORDER:
+                report.append(self.pull_table(table))
+            deleted = self.pull_deletes()
+            if deleted:
+                report.append(SyncStats('tombstones', 'pull', rows=deleted))
+        if direction in ('push', 'both'):
+            for table in SYNC_ORDER:
+                report.append(self.push_table(table))
+            deleted = self.push_deletes()
+            if deleted:
+                report.append(SyncStats('tombstones', 'push', rows=deleted))
+        return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本機 SQLite 與 Supabase 雙向同步")
+    parser.add_argument('--sqlite', required=True, help="本機離線資料庫檔案")
+    parser.add_argument('--direction', choices=['push', 'pull', 'both'], default='both')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from storage import load_cli_credentials
+    from local_store import create_local_client
+    from supabase import create_client
+
+    url, key = load_cli_credentials()
+    if not url or not key:
+        print("找不到 Supabase 連線設定：請設定 SUPABASE_URL 與 SUPABASE_SERVICE_ROLE_KEY。", file=sys.stderr)
+        return 1
+
+    engine = SyncEngine(create_local_client(args.sqlite), create_client(url, key), args.batch_size)
+    for stats in engine.run(args.direction):
+        row = stats.as_dict()
+        print("  ".join(f"{k}={v}" for k, v in row.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+目前使用者自己的投票與反應 (用於標示已選的按鈕)。
+
+每個 Session 以一次查詢取得使用者在本活動的所有選擇，存成 {建議/貼文 id: 選項}，
+之後每次重新執行頁面都只查字典；寫入成功時直接更新字典，不需重新查詢。
+"""
+import time
+
+import streamlit as st
+from supabase import Client
+
+CHOICES_TTL = 60  # 秒；同一帳號在其他裝置的操作最晚於此時間後反映
+
+
+def _cache_key(table):
+    return f"my_choices:{table}"
+
+
+def get_my_choices(client: Client, table, key_col, value_col, user_id, event_id):
+    """回傳 {key_col: value_col}；使用者、活動不同或超過 CHOICES_TTL 時重新查詢"""
+    if not user_id or client is None:
+        return {}
+    cached = st.session_state.get(_cache_key(table))
+    if (cached is None or cached['user_id'] != user_id or cached['event_id'] != event_id
+            or time.monotonic() - cached['fetched_at'] > CHOICES_TTL):
+        try:
+            rows = client.table(table).select(f"{key_col}, {value_col}") \
+                .eq('user_id', user_id).eq('event_id', event_id).execute().data
+        except Exception:
+            return cached['choices'] if cached else {}
+        cached = {
+            'user_id': user_id,
+            'event_id': event_id,
+            'fetched_at': time.monotonic(),
+            'choices': {str(row[key_col]): row[value_col] for row in rows},
+        }
+        st.session_state[_cache_key(table)] = cached
+    return cached['choices']
+
+
+def remember_my_choice(table, key, value):
+    """寫入成功後更新本 Session 的選擇 (value 為 None 表示已取消)"""
+    cached = st.session_state.get(_cache_key(table))
+    if cached is None:
+        return
+    if value is None:
+        cached['choices'].pop(str(key), None)
+    else:
+        cached['choices'][str(key)] = value